@@ -1,9 +1,83 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Optional, List, Type, Union
-from bs4 import BeautifulSoup
 import html
 import re
 from templated_plugin import ScrapedField, DataType
+from html_document import as_document
+
+
+# Labels of the info list in every Cardmarket locale, matched after normalization
+# (lower case, single spaces, no trailing colon)
+_LABELS = {
+    "card_rarity": ["rarity", "seltenheit", "rareté", "rareza", "rarità"],
+    "card_number": ["number", "nummer", "numéro", "número", "numero"],
+    "card_expansion": ["printed in", "erschienen in", "edité dans", "édité dans", "impreso en", "stampato in"],
+    "available_items": ["available items", "verfügbare artikel", "articles disponibles", "artículos disponibles",
+                        "articoli disponibili"],
+    "lowest_price": ["from", "ab", "de", "desde", "da"],
+    "price_trend": ["price trend", "preis-trend", "preistrend", "tendance des prix", "tendance de prix",
+                    "tendencia de precio", "tendencia de precios", "tendenza di prezzo", "andamento prezzo"],
+    "avg_30_days": ["30-days average price", "30-tages-durchschnitt", "prix moyen 30 jours",
+                    "precio medio 30 días", "prezzo medio 30 giorni"],
+    "avg_7_days": ["7-days average price", "7-tages-durchschnitt", "prix moyen 7 jours",
+                   "precio medio 7 días", "prezzo medio 7 giorni"],
+    "avg_1_day": ["1-day average price", "1-tages-durchschnitt", "prix moyen 1 jour",
+                  "precio medio 1 día", "prezzo medio 1 giorno"],
+}
+
+_LABEL_INDEX = {label: field_name for field_name, labels in _LABELS.items() for label in labels}
+
+# Order in which the fields are returned
+_LABEL_FIELD_ORDER = ["card_rarity", "card_number", "available_items", "lowest_price", "price_trend",
+                      "avg_30_days", "avg_7_days", "avg_1_day", "card_expansion"]
+
+_PRICE_FIELDS = {"lowest_price", "price_trend", "avg_30_days", "avg_7_days", "avg_1_day"}
+
+_FIELD_DESCRIPTIONS = {
+    "card_rarity": "Rarity of the card",
+    "card_number": "Card number in the set",
+    "available_items": "Number of available items for sale",
+    "lowest_price": "Lowest price available for the card",
+    "price_trend": "Price trend of the card",
+    "avg_30_days": "Average price over the last 30 days",
+    "avg_7_days": "Average price over the last 7 days",
+    "avg_1_day": "Average price over the last day",
+    "card_expansion": "Expansion/set the card belongs to",
+}
+
+_PRICE_PATTERN = re.compile(r"\d[\d.,]*")
+_NON_DIGIT_PATTERN = re.compile(r"\D")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_DAY_TERMS = ("day", "jour", "tage", "día", "dia", "giorn")
+
+
+@lru_cache(maxsize=256)
+def _classify_label(label: str) -> Optional[str]:
+    """Keyword rules for labels missing from the index, e.g. after Cardmarket rewords one"""
+    if "number" in label or "nummer" in label:
+        return "card_number"
+    if any(term in label for term in ("available", "artikel", "articles")):
+        return "available_items"
+    if any(term in label for term in ("trend", "tendance")):
+        return "price_trend"
+    if any(term in label for term in _DAY_TERMS):
+        for days, field_name in (("30", "avg_30_days"), ("7", "avg_7_days"), ("1", "avg_1_day")):
+            if days in label:
+                return field_name
+    if any(term in label for term in ("printed in", "edité dans", "erschienen in")):
+        return "card_expansion"
+    return None
+
+
+def _field_for_label(label: str) -> Optional[str]:
+    """Return the field a dt label maps to, or None for labels the plugin does not extract"""
+    key = _WHITESPACE_PATTERN.sub(" ", label).strip().rstrip(":").strip().lower()
+    if key in _LABEL_INDEX:
+        return _LABEL_INDEX[key]
+    # Cached, so a recurring unknown label is only classified once, without growing the index
+    return _classify_label(key)
+
 
 
 class CardmarketPricePlugin:
@@ -12,6 +86,15 @@ class CardmarketPricePlugin:
     # Global configuration flag to control whether prices are stored as floats or formatted strings
     STORE_PRICES_AS_FLOAT = True  
     
+    # The worker passes the shared parsed document instead of the raw HTML
+    ACCEPTS_DOCUMENT = True
+    
+    # Only the title and the info list are read, the rest of the page is not built
+    PARSE_SCOPE = [".page-title-container", ".info-list-container"]
+    
+    # Fields whose changes make the page worth refetching sooner, the rest is noise for the recrawl scheduler
+    CHANGE_FIELDS = ["lowest_price", "price_trend"]
+    
     def get_name(self) -> str:
         """Return the name of the plugin."""
         return "Cardmarket Price Plugin"
@@ -148,45 +231,43 @@ class CardmarketPricePlugin:
         if not price_string:
             return 0.0
             
+        # Take the number, ignoring currency symbols and text around it
+        match = _PRICE_PATTERN.search(price_string)
+        if not match:
+            return 0.0
+        
+        # European number format: comma as decimal separator, dots as thousand separators
+        number = match.group(0).rstrip('.,')
+        if ',' in number:
+            number = number.replace('.', '').replace(',', '.')
+        
         try:
-            # Remove currency symbols and other non-numeric characters
-            cleaned = ''.join(c for c in price_string if c.isdigit() or c in ',.').strip()
-            
-            # Handle European number format (comma as decimal separator)
-            if ',' in cleaned and '.' in cleaned:
-                # If both are present, assume European format with thousand separators
-                cleaned = cleaned.replace('.', '')  # Remove thousand separators
-                cleaned = cleaned.replace(',', '.')  # Convert decimal separator
-            elif ',' in cleaned:
-                # Only comma present, assume it's a decimal separator
-                cleaned = cleaned.replace(',', '.')
-                
-            return float(cleaned)
+            return float(number)
         except ValueError:
             return 0.0
 
-    def parse(self, html_content: str) -> List[ScrapedField]:
+    def parse(self, document) -> List[ScrapedField]:
         """
         Parse HTML content and extract Cardmarket price information.
         
         Args:
-            html_content: Raw HTML string
+            document: HtmlDocument shared by the worker, or a raw HTML string
             
         Returns:
             List of ScrapedField objects with price data
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = as_document(document, scopes=self.PARSE_SCOPE)
         results = []
         
         # Extract card name and set
         try:
             title_container = soup.select_one('.page-title-container')
             if title_container:
-                h1 = title_container.select_one('h1')
+                h1 = title_container.find('h1')
                 if h1:
                     # Extract main card name (text before the span)
                     card_name = h1.get_text().strip()
-                    set_span = h1.select_one('span')
+                    set_span = h1.find('span')
                     if set_span:
                         card_name = card_name.replace(set_span.get_text(), '').strip()
                         card_set = set_span.get_text().strip()
@@ -218,199 +299,60 @@ class CardmarketPricePlugin:
             return results
             
         # Find the definition list containing the key-value pairs
-        dl = container.select_one('dl')
+        dl = container.find('dl')
         if not dl:
             return results
             
         # Extract all definition terms and values
-        dt_elements = dl.select('dt')
-        dd_elements = dl.select('dd')
-        
-        # Create a dictionary to map field keys to values
-        price_data = {}
-        for i in range(min(len(dt_elements), len(dd_elements))):
-            key = dt_elements[i].get_text().strip()
-            # For the value, extract the text or try to find a specific span
-            value_elem = dd_elements[i].select_one('span')
-            value = value_elem.get_text().strip() if value_elem else dd_elements[i].get_text().strip()
-            price_data[key] = value
+        dt_elements = dl.find_all('dt')
+        dd_elements = dl.find_all('dd')
         
-        # Extract card rarity
-        if "Rarity" in price_data:
-            # The actual text is in the SVG tooltip, so we'll extract the aria-label
-            rarity_dd = None
-            for i, dt in enumerate(dt_elements):
-                if dt.get_text().strip() == "Rarity" and i < len(dd_elements):
-                    rarity_dd = dd_elements[i]
-                    break
-                    
-            rarity_value = "Unknown"
-            if rarity_dd:
-                svg_elem = rarity_dd.select_one('svg')
+        # Map every dt/dd pair to its field in one pass, the first pair for a field wins
+        values = {}
+        for dt, dd in zip(dt_elements, dd_elements):
+            field_name = _field_for_label(dt.get_text())
+            if field_name is None or field_name in values:
+                continue
+            
+            if field_name == "card_rarity":
+                # The actual text is in the SVG tooltip, so we'll extract the aria-label
+                svg_elem = dd.find('svg')
                 if svg_elem and svg_elem.get('aria-label'):
-                    rarity_value = svg_elem.get('aria-label')
+                    values[field_name] = svg_elem.get('aria-label')
                 else:
                     # Try to get any text in the dd element
-                    rarity_value = rarity_dd.get_text().strip()
+                    values[field_name] = dd.get_text().strip()
+                continue
             
-            results.append(ScrapedField(
-                name="card_rarity",
-                value=rarity_value,
-                field_type=DataType.STRING,
-                description="Rarity of the card",
-                accumulate=True
-            ))
-        
-        # Extract card number
-        number_value = None
-        for key in price_data:
-            if 'Number' in key:
-                number_value = price_data[key]
-                break
-        
-        if number_value:
-            results.append(ScrapedField(
-                name="card_number",
-                value=number_value,
-                field_type=DataType.STRING,
-                description="Card number in the set",
-                accumulate=True
-            ))
-        
-        # Extract available items
-        available_items_value = None
-        for key in price_data:
-            if any(term in key.lower() for term in ['available', 'artikel', 'articles']):
-                available_items_value = price_data[key]
+            # For the value, extract the text or try to find a specific span
+            value_elem = dd.find('span')
+            value = value_elem.get_text().strip() if value_elem else dd.get_text().strip()
+            
+            if field_name == "available_items":
                 # Try to convert to integer
-                try:
-                    available_items_value = int(''.join(c for c in available_items_value if c.isdigit()))
-                except (ValueError, TypeError):
-                    pass
-                break
-        
-        if available_items_value is not None:
-            results.append(ScrapedField(
-                name="available_items",
-                value=available_items_value,
-                field_type=DataType.INTEGER if isinstance(available_items_value, int) else DataType.STRING,
-                description="Number of available items for sale",
-                accumulate=True
-            ))
-        
-        # Extract lowest price
-        lowest_price = None
-        for key in price_data:
-            if any(term == key.lower() for term in ['from', 'de', 'ab']):
-                cleaned_price = self._clean_price_string(price_data[key])
-                if self.STORE_PRICES_AS_FLOAT:
-                    lowest_price = self._parse_price_to_float(cleaned_price)
-                else:
-                    lowest_price = cleaned_price
-                break
+                digits = _NON_DIGIT_PATTERN.sub('', value)
+                values[field_name] = int(digits) if digits else value
+            elif field_name in _PRICE_FIELDS:
+                cleaned_price = self._clean_price_string(value)
+                values[field_name] = self._parse_price_to_float(cleaned_price) if self.STORE_PRICES_AS_FLOAT else cleaned_price
+            elif value:
+                values[field_name] = value
         
-        if lowest_price is not None:
+        for field_name in _LABEL_FIELD_ORDER:
+            if field_name not in values:
+                continue
+            value = values[field_name]
+            if field_name in _PRICE_FIELDS:
+                field_type = DataType.FLOAT if self.STORE_PRICES_AS_FLOAT else DataType.STRING
+            elif isinstance(value, int):
+                field_type = DataType.INTEGER
+            else:
+                field_type = DataType.STRING
             results.append(ScrapedField(
-                name="lowest_price",
-                value=lowest_price,
-                field_type=DataType.FLOAT if self.STORE_PRICES_AS_FLOAT else DataType.STRING,
-                description="Lowest price available for the card",
-                accumulate=True
-            ))
-        
-        # Extract price trend
-        price_trend = None
-        for key in price_data:
-            if any(term in key.lower() for term in ['trend', 'tendance']):
-                cleaned_price = self._clean_price_string(price_data[key])
-                if self.STORE_PRICES_AS_FLOAT:
-                    price_trend = self._parse_price_to_float(cleaned_price)
-                else:
-                    price_trend = cleaned_price
-                break
-        
-        if price_trend is not None:
-            results.append(ScrapedField(
-                name="price_trend",
-                value=price_trend,
-                field_type=DataType.FLOAT if self.STORE_PRICES_AS_FLOAT else DataType.STRING,
-                description="Price trend of the card",
-                accumulate=True
-            ))
-        
-        # Extract 30-day average
-        avg_30_days = None
-        for key in price_data:
-            if '30' in key and any(term in key.lower() for term in ['day', 'jour', 'tage']):
-                cleaned_price = self._clean_price_string(price_data[key])
-                if self.STORE_PRICES_AS_FLOAT:
-                    avg_30_days = self._parse_price_to_float(cleaned_price)
-                else:
-                    avg_30_days = cleaned_price
-                break
-        
-        if avg_30_days is not None:
-            results.append(ScrapedField(
-                name="avg_30_days",
-                value=avg_30_days,
-                field_type=DataType.FLOAT if self.STORE_PRICES_AS_FLOAT else DataType.STRING,
-                description="Average price over the last 30 days",
-                accumulate=True
-            ))
-        
-        # Extract 7-day average
-        avg_7_days = None
-        for key in price_data:
-            if '7' in key and any(term in key.lower() for term in ['day', 'jour', 'tage']):
-                cleaned_price = self._clean_price_string(price_data[key])
-                if self.STORE_PRICES_AS_FLOAT:
-                    avg_7_days = self._parse_price_to_float(cleaned_price)
-                else:
-                    avg_7_days = cleaned_price
-                break
-        
-        if avg_7_days is not None:
-            results.append(ScrapedField(
-                name="avg_7_days",
-                value=avg_7_days,
-                field_type=DataType.FLOAT if self.STORE_PRICES_AS_FLOAT else DataType.STRING,
-                description="Average price over the last 7 days",
-                accumulate=True
-            ))
-        
-        # Extract 1-day average
-        avg_1_day = None
-        for key in price_data:
-            if '1' in key and any(term in key.lower() for term in ['day', 'jour', 'tage']):
-                cleaned_price = self._clean_price_string(price_data[key])
-                if self.STORE_PRICES_AS_FLOAT:
-                    avg_1_day = self._parse_price_to_float(cleaned_price)
-                else:
-                    avg_1_day = cleaned_price
-                break
-        
-        if avg_1_day is not None:
-            results.append(ScrapedField(
-                name="avg_1_day",
-                value=avg_1_day,
-                field_type=DataType.FLOAT if self.STORE_PRICES_AS_FLOAT else DataType.STRING,
-                description="Average price over the last day",
-                accumulate=True
-            ))
-        
-        # Extract card expansion (though we already got it from the title)
-        card_expansion = None
-        for key in price_data:
-            if any(term in key.lower() for term in ['printed in', 'edité dans', 'erschienen in']):
-                card_expansion = price_data[key]
-                break
-        
-        if card_expansion:
-            results.append(ScrapedField(
-                name="card_expansion",
-                value=card_expansion,
-                field_type=DataType.STRING,
-                description="Expansion/set the card belongs to",
+                name=field_name,
+                value=value,
+                field_type=field_type,
+                description=_FIELD_DESCRIPTIONS[field_name],
                 accumulate=True
             ))
         
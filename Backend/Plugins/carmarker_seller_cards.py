@@ -1,6 +1,7 @@
-from bs4 import BeautifulSoup
+from html_document import as_document
+from record_batch import RecordBatch, Schema
 from dataclasses import dataclass
-from typing import List, Any, Optional
+from typing import List, Any, Optional, Iterator
 from enum import Enum, auto
 
 
@@ -23,6 +24,24 @@ class ScrapedField:
 
 
 class CardMarketSellerScraper:
+    ACCEPTS_DOCUMENT = True
+    PARSE_SCOPE = [".article-row"]
+
+    # Output columns, filled in a single pass over each listing row
+    SCHEMA = Schema([
+        ("card_name", DataType.STRING),
+        ("expansion", DataType.STRING),
+        ("rarity", DataType.STRING),
+        ("condition", DataType.STRING),
+        ("language", DataType.STRING),
+        ("is_foil", DataType.BOOLEAN),
+        ("quantity", DataType.INTEGER),
+        ("price", DataType.FLOAT)
+    ])
+
+    # Rows per yielded batch
+    BATCH_SIZE = 1000
+
     def get_name(self) -> str:
         return "CardMarketSellerScraper"
 
@@ -32,56 +51,94 @@ class CardMarketSellerScraper:
     def get_version(self) -> str:
         return "1.0.0"
 
-    def parse(self, html: str) -> List[List[ScrapedField]]:
-        soup = BeautifulSoup(html, 'html.parser')
-        card_rows = soup.select(".article-row")
-
-        parsed_cards = []
-        for row in card_rows:
-            # Extract card name
-            card_name_tag = row.select_one(".col-sellerProductInfo a")
-            card_name = card_name_tag.text.strip() if card_name_tag else None
-
-            # Extract expansion name
-            expansion_tag = row.select_one(".expansion-symbol")
-            expansion = expansion_tag["aria-label"] if expansion_tag else None
-
-            # Extract rarity
-            rarity_tag = row.select_one("svg[aria-label]")
-            rarity = rarity_tag["aria-label"] if rarity_tag else None
-
-            # Extract condition
-            condition_tag = row.select_one(".article-condition")
-            condition = condition_tag.text.strip() if condition_tag else None
-
-            # Extract language
-            language_tag = row.select_one(".icon[aria-label]")
-            language = language_tag["aria-label"] if language_tag else None
-
-            # Extract foil status
-            foil_tag = row.select_one(".st_SpecialIcon[aria-label='Foil']")
-            is_foil = foil_tag is not None
-
-            # Extract quantity
-            quantity_tag = row.select_one(".item-count")
-            quantity = int(quantity_tag.text.strip()) if quantity_tag else None
-
-            # Extract price
-            price_tag = row.select_one(".color-primary")
-            price = float(price_tag.text.replace("€", "").replace(",", ".").strip()) if price_tag else None
-
-            parsed_cards.append([
-                ScrapedField("card_name", card_name, DataType.STRING),
-                ScrapedField("expansion", expansion, DataType.STRING),
-                ScrapedField("rarity", rarity, DataType.STRING),
-                ScrapedField("condition", condition, DataType.STRING),
-                ScrapedField("language", language, DataType.STRING),
-                ScrapedField("is_foil", is_foil, DataType.BOOLEAN),
-                ScrapedField("quantity", quantity, DataType.INTEGER),
-                ScrapedField("price", price, DataType.FLOAT)
-            ])
-
-        return parsed_cards
+    def parse(self, document) -> Iterator[RecordBatch]:
+        """
+        Yield the listings in batches of BATCH_SIZE rows, one column per SCHEMA field.
+
+        The writer persists each batch before the next rows are extracted, so
+        the results of a large seller page are never held in memory at once.
+        """
+        soup = as_document(document, scopes=self.PARSE_SCOPE)
+        shared = {}
+
+        # lexbor matches selectors natively, for BeautifulSoup a plain loop beats soupsieve
+        if soup.backend == "selectolax":
+            rows = soup.select(".article-row")
+        else:
+            rows = self._iter_class(soup.descendants, "article-row")
+
+        batch = RecordBatch(self.SCHEMA)
+        for row in rows:
+            batch.append(self._extract_row(row, shared))
+            if len(batch) >= self.BATCH_SIZE:
+                yield batch
+                batch = RecordBatch(self.SCHEMA)
+        if batch:
+            yield batch
+
+    def _extract_row(self, row, shared) -> tuple:
+        """
+        Extract the values of one .article-row in SCHEMA order.
+
+        The row is walked once and every cell is taken from the first matching
+        element, the same element the per-field CSS selectors
+        (".expansion-symbol", "svg[aria-label]", ...) used to return.
+        """
+        card_name = expansion = rarity = condition = language = quantity = price = None
+        is_foil = False
+
+        for tag in row.descendants:
+            name = tag.name
+            if name is None:
+                continue  # Text node
+            attrs = tag.attrs
+            classes = attrs.get("class") or ()
+            if isinstance(classes, str):
+                classes = classes.split()
+            label = attrs.get("aria-label")
+
+            if card_name is None and "col-sellerProductInfo" in classes:
+                card_name_tag = next((link for link in tag.descendants if link.name == "a"), None)
+                card_name = card_name_tag.text.strip() if card_name_tag else None
+            if expansion is None and "expansion-symbol" in classes:
+                expansion = label
+            if rarity is None and name == "svg" and label is not None:
+                rarity = label
+            if condition is None and "article-condition" in classes:
+                condition = tag.text.strip()
+            # The expansion symbol also carries the icon class, so it is kept here like the old selector did
+            if language is None and "icon" in classes and label is not None:
+                language = label
+            if label == "Foil" and "st_SpecialIcon" in classes:
+                is_foil = True
+            if quantity is None and "item-count" in classes:
+                quantity = int(tag.text.strip())
+            if price is None and "color-primary" in classes:
+                price = float(tag.text.replace("€", "").replace(",", ".").strip())
+
+        # Few distinct values repeat on every row, keep one string object per value
+        return (
+            card_name,
+            shared.setdefault(expansion, expansion),
+            shared.setdefault(rarity, rarity),
+            shared.setdefault(condition, condition),
+            shared.setdefault(language, language),
+            is_foil,
+            quantity,
+            price
+        )
+
+    @staticmethod
+    def _iter_class(nodes, class_name):
+        """Yield the elements carrying a class"""
+        for tag in nodes:
+            if tag.name is None:
+                continue
+            classes = tag.attrs.get("class") or ()
+            if isinstance(classes, str):
+                classes = classes.split()
+            if class_name in classes:
+                yield tag
 
     def get_available_fields(self) -> List[ScrapedField]:
         return [
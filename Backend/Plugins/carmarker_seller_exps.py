@@ -1,4 +1,7 @@
-from bs4 import BeautifulSoup
+from cardmarket_planner import expansion_page_urls
+from follow_up import FollowUpUrl, follow_up
+from html_document import as_document
+from record_batch import RecordBatch, Schema
 from dataclasses import dataclass
 from typing import List, Any, Optional
 from enum import Enum, auto
@@ -23,6 +26,15 @@ class ScrapedField:
 
 
 class CardMarketSellerExpansionsScraper:
+    ACCEPTS_DOCUMENT = True
+    PARSE_SCOPE = ["select[name=idExpansion]"]
+
+    SCHEMA = Schema([
+        ("expansion_id", DataType.INTEGER),
+        ("expansion_name", DataType.STRING),
+        ("card_count", DataType.INTEGER)
+    ])
+
     def get_name(self) -> str:
         return "CardMarketSellerExpansionsScraper"
 
@@ -32,11 +44,17 @@ class CardMarketSellerExpansionsScraper:
     def get_version(self) -> str:
         return "1.0.0"
 
-    def parse(self, html: str) -> List[List[ScrapedField]]:
-        soup = BeautifulSoup(html, 'html.parser')
+    # Plugin for the listing pages, planned from each expansion's card_count
+    FOLLOW_UP_PLUGINS = ("carmarker_seller_cards.py",)
+
+    # (document, expansions) of the last parse, reused by get_follow_up_urls for the same page
+    _parsed = None
+
+    def parse(self, document) -> RecordBatch:
+        soup = as_document(document, scopes=self.PARSE_SCOPE)
         expansion_select = soup.find('select', {'name': 'idExpansion'})
 
-        expansions = []
+        expansions = RecordBatch(self.SCHEMA)
 
         for option in expansion_select.find_all('option'):
             if option.text == "All":
@@ -47,14 +65,28 @@ class CardMarketSellerExpansionsScraper:
             card_count = int(option.text.rsplit('(', 1)[1].replace(')', '').strip())
 
             if expansion_id != '0' and card_count > 0:
-                expansions.append([
-                    ScrapedField("expansion_id", expansion_id, DataType.INTEGER),
-                    ScrapedField("expansion_name", expansion_name, DataType.STRING),
-                    ScrapedField("card_count", card_count, DataType.INTEGER)
-                ])
+                expansions.append((expansion_id, expansion_name, card_count))
 
+        self._parsed = (document, expansions)
         return expansions
 
+    def get_follow_up_urls(self, document, url) -> List[FollowUpUrl]:
+        """
+        Return every listing page of every expansion, without fetching the first pages for their page count.
+
+        The card count is the version of an expansion's pages: with Revalidate on, the pages of
+        expansions whose count did not change since the last crawl reuse their previous rows.
+        """
+        if self._parsed is not None and self._parsed[0] is document:
+            expansions = self._parsed[1]
+        else:
+            expansions = self.parse(document)
+        # The page is done with, do not keep its document alive
+        self._parsed = None
+        return [follow_up(page_url, *self.FOLLOW_UP_PLUGINS, version=card_count)
+                for expansion_id, card_count in zip(expansions.column("expansion_id"), expansions.column("card_count"))
+                for page_url in expansion_page_urls(url, expansion_id, card_count)]
+
     def get_available_fields(self) -> List[ScrapedField]:
         return [
             ScrapedField("expansion_id", 0, DataType.INTEGER, found=False),
@@ -1,6 +1,8 @@
 import re
+from urllib.parse import parse_qs, urlsplit
 
-from bs4 import BeautifulSoup
+from follow_up import FollowUpUrl, follow_up, with_query
+from html_document import as_document
 from dataclasses import dataclass
 from typing import List, Any, Optional
 from enum import Enum, auto
@@ -25,6 +27,9 @@ class ScrapedField:
 
 
 class CardMarketSellerExpansionsPagesScraper:
+    ACCEPTS_DOCUMENT = True
+    PARSE_SCOPE = ["span.mx-1"]
+
     def get_name(self) -> str:
         return "CardMarketSellerExpansionsPagesScraper"
 
@@ -34,8 +39,14 @@ class CardMarketSellerExpansionsPagesScraper:
     def get_version(self) -> str:
         return "1.0.0"
 
-    def parse(self, html: str) -> List[List[ScrapedField]]:
-        soup = BeautifulSoup(html, 'html.parser')
+    # Plugin for the remaining pages of an expansion
+    FOLLOW_UP_PLUGINS = ("carmarker_seller_cards.py",)
+
+    # (document, page count rows) of the last parse, reused by get_follow_up_urls for the same page
+    _parsed = None
+
+    def parse(self, document) -> List[List[ScrapedField]]:
+        soup = as_document(document, scopes=self.PARSE_SCOPE)
         pagination_text = soup.find('span', class_='mx-1')
 
         page_count = 1
@@ -47,8 +58,25 @@ class CardMarketSellerExpansionsPagesScraper:
 
         page_count = [[ScrapedField("page_count", page_count, DataType.INTEGER)]]
 
+        self._parsed = (document, page_count)
         return page_count
 
+    def get_follow_up_urls(self, document, url) -> List[FollowUpUrl]:
+        """Return pages 2 to page_count when called on the first page of a listing."""
+        current_site = parse_qs(urlsplit(url).query).get("site", ["1"])[0]
+        if current_site != "1":
+            self._parsed = None
+            return []
+        if self._parsed is not None and self._parsed[0] is document:
+            rows = self._parsed[1]
+        else:
+            rows = self.parse(document)
+        # The page is done with, do not keep its document alive
+        self._parsed = None
+        page_count = rows[0][0].value
+        return [follow_up(with_query(url, site=site), *self.FOLLOW_UP_PLUGINS)
+                for site in range(2, page_count + 1)]
+
     def get_available_fields(self) -> List[ScrapedField]:
         return [
             ScrapedField("page_count", 0, DataType.INTEGER, found=False),
@@ -1,12 +1,15 @@
 from dataclasses import dataclass
 from typing import Any, Optional, List, Type, Union
 from enum import Enum, auto
-from bs4 import BeautifulSoup
 from templated_plugin import ScrapedField, DataType
+from html_document import as_document
 
 class DataAnalysisPlugin:
     """Base plugin that performs general HTML analysis."""
     
+    # Receive the page as the document parsed once by the worker
+    ACCEPTS_DOCUMENT = True
+    
     def get_name(self) -> str:
         """Return the name of the plugin."""
         return "Data Analysis Plugin"
@@ -88,23 +91,23 @@ class DataAnalysisPlugin:
             )
         ]
     
-    def parse(self, html: str) -> List[ScrapedField]:
+    def parse(self, document) -> List[ScrapedField]:
         """
         Parse HTML content and extract basic page metrics.
         
         Args:
-            html: Raw HTML string
+            document: HtmlDocument shared by the worker, or a raw HTML string
             
         Returns:
             List of ScrapedField objects with universal page data
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = as_document(document)
         results = []
         
         # Page size metrics
         results.append(ScrapedField(
             name="page_size_chars",
-            value=len(html),
+            value=len(soup.html),
             field_type=DataType.INTEGER,
             description="Total character count of the HTML",
             accumulate=True  # Accumulate character counts
@@ -2,571 +2,62 @@ import sys
 import os
 backend_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
 sys.path.append(backend_path)
-from PyQt5.QtWidgets import QApplication, QFileDialog, QTableWidgetItem
+from PyQt5.QtWidgets import QApplication, QFileDialog
 from PyQt5.QtCore import QThread, pyqtSignal
-from seleniumScrape import getHtmlAdvanced, create_driver_undetected, create_driver_stealth, create_driver_standard, create_driver_seleniumbase
 from scraper_gui import DarkThemeApp
-from heroPy import scrape_with_js
-from enum import Enum, auto
+from scrape_pipeline import ScrapePipeline
+from sharded_run import ShardedRun
+from url_queue import UrlQueue
+from url_sources import LARGE_URL_LIST_LINES, normalize_urls, open_url_source
 
 class ScraperWorker(QThread):
     url_status = pyqtSignal(int, str)  # Signal for URL status: 0=success, 1=warning, 2=error
     finished = pyqtSignal()           # Signal for completion notification
-    remove_url = pyqtSignal(str)      # Signal to remove a successful URL from the input box
     suspend_execution = pyqtSignal(int, str)  # Signal to suspend execution with timeout and reason
     plugin_results = pyqtSignal(list)  # Signal to send plugin results to the app
     
-    def __init__(self, options, urls, timeout_value, output_file=None):
+    def __init__(self, options, urls, timeout_value, output_file=None, plugin_files=None):
         super().__init__()
-        self.options = options
-        self.urls = urls
-        self.stop_execution = False    # Flag to stop execution completely
-        self.is_suspended = False      # Flag to suspend execution temporarily
-        self.timeout_seconds = timeout_value  # Timeout value in seconds
-        self.custom_output_file = output_file
-        
-    def run(self):
-        """Main execution method for the worker thread"""
-        try:
-            # Process headless selection
-            headless = self.options["Headless"] == "true"
-            
-            # Check which mode to use - Playwright, Ulixee Hero or Selenium
-            playwright_mode = self.options.get("Playwright")
-            
-            if playwright_mode in ["standard", "puppeteer +stealth"]:
-                # Map the UI selection to the engine parameter
-                engine = "playwright" if playwright_mode == "standard" else "playwright-stealth"
-                print(f"\n> Using Playwright ({playwright_mode})")
-                self.process_urls_with_playwright(self.urls, engine, headless)
-            else:
-                # Check Ulixee Hero modes
-                hero_mode = self.options["Ulixee Hero Mode"]
-                if hero_mode == "standard":
-                    # Use Ulixee Hero
-                    print(f"\n> Using Ulixee Hero")
-                    self.process_urls_with_hero(self.urls, headless)
-                elif hero_mode == "puppeteer":
-                    # Use Puppeteer
-                    print(f"\n> Using Puppeteer")
-                    self.process_urls_with_puppeteer(self.urls, "puppeteer", headless)
-                elif hero_mode == "<- extra":
-                    # Use Puppeteer Extra
-                    print(f"\n> Using Puppeteer Extra")
-                    self.process_urls_with_puppeteer(self.urls, "puppeteer-extra", headless)
-                elif hero_mode == "<- +stealth":
-                    # Use Puppeteer Extra with Stealth
-                    print(f"\n> Using Puppeteer Extra + Stealth")
-                    self.process_urls_with_puppeteer(self.urls, "puppeteer-stealth", headless)
-                else:
-                    # Use Selenium
-                    selenium_mode = self.options["Selenium Mode"].lower()
-                    human_behavior = self.options["Human Behavior"] == "true"
-                    behavior_intensity = self.options["Behavior Intensity"].lower() if human_behavior else "medium"
-                    
-                    print(f"\n> Using Selenium ({selenium_mode})")
-                    self.process_urls_with_selenium(self.urls, selenium_mode, headless, human_behavior, behavior_intensity)
-        except Exception as e:
-            print(f"\n> Error in worker thread: {str(e)}")
-        finally:
-            self.finished.emit()
+        # The scraping itself runs in the pipeline, the worker turns its callbacks into signals
+        processes = int(options.get("Processes") or 1)
+        if processes > 1:
+            # Shards pause by themselves on errors and blocks, the GUI only follows their progress
+            self.pipeline = ShardedRun(options, urls, timeout_value, processes, options.get("Shard By") or "domain",
+                                       output_file, plugin_files,
+                                       status_callback=self.url_status.emit,
+                                       results_callback=self.plugin_results.emit)
+        else:
+            self.pipeline = ScrapePipeline(options, urls, timeout_value, output_file, plugin_files,
+                                           status_callback=self.url_status.emit,
+                                           suspend_callback=self.suspend_execution.emit,
+                                           results_callback=self.plugin_results.emit)
     
-    def is_cloudflare_detection_page(self, html_content):
-        # Convert to lowercase for case-insensitive matching
-        html_lower = html_content.lower()
-        
-        # More comprehensive set of Cloudflare indicators
-        cloudflare_indicators = [
-            # Title and meta indicators
-            "<title>just a moment...</title>",
-            '<meta name="robots" content="noindex,nofollow"',
-            '<meta http-equiv="refresh" content="390"',  # Common timeout refresh
-            
-            # Common element IDs and classes
-            'class="loading-spinner"',
-            'class="lds-ring"',
-            'class="main-wrapper"',
-            'class="challenge-',
-            'id="challenge-error-text"',
-            'id="challenge-success-text"',
-            
-            # Common text phrases unique to Cloudflare
-            "verifying you are human",
-            "this may take a few seconds",
-            "needs to review the security of your connection",
-            "enable javascript and cookies to continue",
-            "waiting for",
-            "to respond",
-            "verification successful",
-            "performance & security by",
-            "ray id:",
-            
-            # Cloudflare-specific script and resource references
-            "/cdn-cgi/challenge-platform/",
-            "/cdn-cgi/challenge-platform/h/b/orchestrate/chl_page",
-            "cloudflare",
-            "cloudflareinsights.com/beacon",
-            "cf_chl_opt",
-            "cf-ray",
-            "cf_chl_",
-            "chl_page",
-            
-            # Function calls and JS specific to Cloudflare
-            "turnstile",
-            "challenges.cloudflare.com",
-            "window._cf_chl_opt",
-            "cOgUHash",
-            "cOgUQuery",
-            
-            # Visual elements unique to Cloudflare
-            'div class="lds-ring"><div></div><div></div><div></div><div></div></div>',
-            'background-image:url(data:image/svg+xml;base64,',  # SVG base64 icons
-            
-            # Specific CSS patterns
-            "@keyframes lds-ring{",
-            "animation:lds-ring",
-            
-            # Footer elements
-            'role="contentinfo"',
-            '<a rel="noopener noreferrer" href="https://www.cloudflare.com?utm_source=challenge',
-        ]
-        
-        # Strong indicators that, if any are present, almost certainly indicate a Cloudflare page
-        strong_indicators = [
-            "ray id: <code>",
-            'class="ray-id">ray id:',
-            '/cdn-cgi/challenge-platform/',
-            "window._cf_chl_opt",
-            "cloudflare.com?utm_source=challenge",
-            "challenge-platform/h/b/orchestrate/chl_page"
-        ]
-        
-        # Check if any strong indicators are present
-        
-        # Count how many general indicators are found
-        indicators_found = sum(1 for indicator in cloudflare_indicators if indicator in html_lower)
-        indicators_found += sum(2 for indicator in strong_indicators if indicator in html_lower)
-        
-        # We require a higher threshold for confidence (65% of indicators)
-        threshold = int(len(cloudflare_indicators) * 0.65)
-        
-        print(f"Cloudflare indicators found: {indicators_found}/{len(cloudflare_indicators)}")
-        
-        return indicators_found >= threshold
+    @property
+    def url_queue(self):
+        return self.pipeline.url_queue
     
-    def process_urls_with_playwright(self, urls, engine_type, headless):
-        """Process URLs using Playwright variants"""
-        from playwrightPy import scrape_with_playwright_sync  # Import from your paste.txt file
-        
-        for i, url in enumerate(urls, 1):
-            if self.stop_execution:
-                print(f"\n> Execution stopped permanently")
-                break
-                
-            # Check if execution is suspended
-            while self.is_suspended:
-                # Wait while suspended (check every 100ms)
-                self.msleep(100)
-                
-            print(f"\n> [{i}/{len(urls)}] Processing with Playwright ({engine_type}): {url}")
-            
-            try:
-                html = scrape_with_playwright_sync(
-                    url=url, 
-                    engine=engine_type, 
-                    headless=headless
-                )
-                self.process_html(html, url, i)
-            except Exception as e:
-                print(f"> Error: {str(e)}")
-                # Report error in process_html with None
-                self.process_html(None, url, i)
-
-    def process_urls_with_hero(self, urls, headless):
-        """Process URLs using Ulixee Hero"""
-        from heroPy import scrape_with_js
-        
-        for i, url in enumerate(urls, 1):
-            if self.stop_execution:
-                print(f"\n> Execution stopped permanently")
-                break
-                
-            # Check if execution is suspended
-            while self.is_suspended:
-                # Wait while suspended (check every 100ms)
-                self.msleep(100)
-                
-            print(f"\n> [{i}/{len(urls)}] Processing with Ulixee Hero: {url}")
-            
-            try:
-                html = scrape_with_js(url=url, engine="hero", headless=headless)
-                self.process_html(html, url, i)
-            except Exception as e:
-                print(f"> Error: {str(e)}")
-                # Report error in process_html with None
-                self.process_html(None, url, i)
+    @property
+    def stop_execution(self):
+        return self.pipeline.stop_execution
     
-    def process_urls_with_puppeteer(self, urls, engine_type, headless):
-        """Process URLs using Puppeteer variants"""
-        from heroPy import scrape_with_js
-        
-        for i, url in enumerate(urls, 1):
-            if self.stop_execution:
-                print(f"\n> Execution stopped permanently")
-                break
-                
-            # Check if execution is suspended
-            while self.is_suspended:
-                # Wait while suspended (check every 100ms)
-                self.msleep(100)
-                
-            print(f"\n> [{i}/{len(urls)}] Processing with {engine_type}: {url}")
-            
-            try:
-                html = scrape_with_js(url=url, engine=engine_type, headless=headless)
-                self.process_html(html, url, i)
-            except Exception as e:
-                print(f"> Error: {str(e)}")
-                # Report error in process_html with None
-                self.process_html(None, url, i)
+    @stop_execution.setter
+    def stop_execution(self, value):
+        self.pipeline.stop_execution = value
     
-    def process_urls_with_selenium(self, urls, method, headless, human_behavior, behavior_intensity):
-        """Process URLs using a single Selenium driver instance"""
-        from seleniumScrape import create_driver_undetected, create_driver_stealth, create_driver_seleniumbase, create_driver_standard
-        
-        # Create the driver first
-        print(f"\n> Creating driver ({method})...")
-        
-        driver = None
-        try:
-            # Create the appropriate driver based on method
-            if method == "undetected":
-                driver = create_driver_undetected(headless)
-            elif method == "stealth":
-                driver = create_driver_stealth(headless)
-            elif method == "base":
-                driver = create_driver_seleniumbase(headless)
-            else:  # standard
-                driver = create_driver_standard(headless)
-                
-            print("> Driver created successfully")
-            
-            # Process each URL
-            for i, url in enumerate(urls, 1):
-                if self.stop_execution:
-                    print(f"\n> Execution stopped permanently")
-                    break
-                    
-                # Check if execution is suspended
-                while self.is_suspended:
-                    # Wait while suspended (check every 100ms)
-                    self.msleep(100)
-                    
-                print(f"\n> [{i}/{len(urls)}] Processing: {url}")
-                
-                try:
-                    # Use driver.get directly
-                    print("> Navigating to URL...")
-                    driver.get(url)
-                    
-                    # Apply human behavior if enabled
-                    if human_behavior:
-                        print(f"> Applying human behavior ({behavior_intensity})...")
-                        from seleniumScrape import add_human_behavior
-                        add_human_behavior(driver, behavior_intensity)
-                    
-                    # Get page source
-                    html = driver.page_source
-                    self.process_html(html, url, i)
-                        
-                except Exception as e:
-                    print(f"> Error processing URL: {str(e)}")
-                    # Report error in process_html with None
-                    self.process_html(None, url, i)
-                    
-            print("\n> All URLs processed successfully")
-                
-        except Exception as e:
-            print(f"\n> Error creating driver: {str(e)}")
-        finally:
-            # Close the driver
-            if driver:
-                try:
-                    print("\n> Closing browser...")
-                    driver.quit()
-                    print("> Browser closed")
-                except Exception as e:
-                    print(f"> Error closing browser: {str(e)}")
+    @property
+    def is_suspended(self):
+        return self.pipeline.is_suspended
     
-
-    def process_html(self, html, url, index):
-        """Process HTML content that was scraped and emit appropriate status signal"""
-        import csv
-        import time
-        import os
-        
-        # Status tracking variable
-        status_code = 0  # Default to success
-            
-        # In ScraperWorker.process_html method, change this part:
-        if not hasattr(self, 'csv_filename'):
-            # Get the current unix timestamp
-            timestamp = int(time.time())
-            
-            # Initialize csv_filename (even if using custom path, to avoid attribute errors)
-            self.csv_filename = None
-            
-            # Check if we have a custom output file
-            if self.custom_output_file and self.custom_output_file.strip():
-                try:
-                    # Use the custom output file
-                    self.csv_path = self.custom_output_file.strip()
-                    
-                    # Ensure the directory exists
-                    output_dir = os.path.dirname(self.csv_path)
-                    if output_dir and not os.path.exists(output_dir):
-                        os.makedirs(output_dir)
-                        print(f"> Created directory: {output_dir}")
-                        
-                    print(f"> CSV output will be saved to custom path: {self.csv_path}")
-                    
-                    # Check if the file already exists to determine if we need to write headers
-                    self.csv_header_written = os.path.exists(self.csv_path) and os.path.getsize(self.csv_path) > 0
-                except Exception as e:
-                    print(f"> Error setting up custom output file: {str(e)}")
-                    print("> Falling back to default output file")
-                    # Fall back to default file path
-                    self.custom_output_file = None
-            
-            # If no custom output file or an error occurred, use the default path
-            if not hasattr(self, 'csv_path'):
-                # Get the selected plugin name
-                app = QApplication.instance()
-                plugin_name = "no_plugin"
-                for widget in app.topLevelWidgets():
-                    if isinstance(widget, ScraperApp):
-                        if widget.selected_plugin != "Download HTML":
-                            plugin_name = os.path.splitext(widget.selected_plugin)[0]
-                        break
-                
-                # Create the CSV filename
-                self.csv_filename = f"{timestamp}_{plugin_name}.csv"
-                self.csv_header_written = False
-                
-                # Create output directory if it doesn't exist
-                csv_dir = "scraped_data"
-                if not os.path.exists(csv_dir):
-                    os.makedirs(csv_dir)
-                    
-                self.csv_path = os.path.join(csv_dir, self.csv_filename)
-                print(f"> CSV output will be saved to: {self.csv_path}")
-                
-        # First determine status
-        if html is None:
-            # HTML is None, this is an error
-            print(f"> Error: No HTML content retrieved for {url}")
-            self.url_status.emit(2, url)
-            # Suspend execution on error
-            self.suspend_execution.emit(self.timeout_seconds, "Error: Failed to retrieve content")
-            self.is_suspended = True
-            status_code = 2  # Error
-            return
-                
-        # Check if this is a Cloudflare page
-        if self.is_cloudflare_detection_page(html):
-            print(f"> Cloudflare detection page found for {url}")
-            self.url_status.emit(1, url)
-            # Suspend execution on warning
-            self.suspend_execution.emit(self.timeout_seconds, "Warning: Cloudflare protection detected")
-            self.is_suspended = True
-            status_code = 1  # Warning
-            return
-        
-        # Check for HTTP 429 response
-        if "HTTP ERROR 429" in html or "Too Many Requests" in html:
-            print(f"> HTTP 429 Too Many Requests error for {url}")
-            self.url_status.emit(1, url)  # Using warning status for rate limiting
-            # Suspend execution to prevent further rate limiting
-            self.suspend_execution.emit(self.timeout_seconds, "Warning: Rate limit (HTTP 429) detected")
-            self.is_suspended = True
-            status_code = 1  # Warning
-            return
-                
-        # If we got here, it's a successful retrieval
-        print(f"> Success! Retrieved {len(html)} characters of HTML")
-        
-        # Apply the selected plugin if not in "Download HTML" mode
-        app = QApplication.instance()
-        main_window = None
-        
-        # Find the main window
-        for widget in app.topLevelWidgets():
-            if isinstance(widget, ScraperApp):
-                main_window = widget
-                break
-                
-        if main_window and main_window.selected_plugin != "Download HTML":
-            try:
-                # Import the selected plugin
-                import importlib.util
-                import sys
-                # Import here explicitly to avoid scope issues
-                import os as os_module
-                from enum import Enum, auto
-                
-                plugins_dir = os.path.abspath("./Plugins/")
-                plugin_path = os.path.join(plugins_dir, main_window.selected_plugin)
-                
-                print(f"> Loading plugin: {plugin_path}")
-                
-                # Add Plugins directory to Python path temporarily to help with imports
-                if plugins_dir not in sys.path:
-                    sys.path.insert(0, plugins_dir)
-                
-                # Copy templated_plugin.py contents for any plugin that needs it
-                # This defines the needed classes in memory
-                if "templated_plugin" not in sys.modules:
-                    try:
-                        # Define DataType enum and ScrapedField class directly
-                        class DataType(Enum):
-                            STRING = auto()
-                            INTEGER = auto()
-                            FLOAT = auto()
-                            BOOLEAN = auto()
-                            DATE = auto()
-                            DATETIME = auto()
-                            URL = auto()
-                            IMAGE = auto()
-                            ARRAY = auto()
-                            OBJECT = auto()
-
-                        class ScrapedField:
-                            """Represents a single piece of data extracted from HTML."""
-                            def __init__(self, name, value, field_type, found=True, description=None, accumulate=False):
-                                self.name = name
-                                self.value = value
-                                self.field_type = field_type
-                                self.found = found
-                                self.description = description
-                                self.accumulate = accumulate
-                        
-                        # Create a fake module to provide these classes to the plugins
-                        class FakeModule:
-                            pass
-                        
-                        fake_templated_plugin = FakeModule()
-                        fake_templated_plugin.DataType = DataType
-                        fake_templated_plugin.ScrapedField = ScrapedField
-                        
-                        # Add to sys.modules
-                        sys.modules['templated_plugin'] = fake_templated_plugin
-                        
-                        print("> Created templated_plugin module in memory")
-                    except Exception as e:
-                        print(f"> Error creating templated_plugin module: {str(e)}")
-                
-                # Load the module
-                spec = importlib.util.spec_from_file_location("plugin_module", plugin_path)
-                if spec is None:
-                    print(f"> Error: Could not find plugin at {plugin_path}")
-                else:
-                    plugin_module = importlib.util.module_from_spec(spec)
-                    sys.modules["plugin_module"] = plugin_module  # Add to sys.modules for imports to work
-                    spec.loader.exec_module(plugin_module)
-                    
-                    # Find the plugin class in the module
-                    # We're looking for a class that inherits from ScraperPlugin or DataAnalysisPlugin
-                    plugin_class = None
-                    for name, obj in plugin_module.__dict__.items():
-                        if isinstance(obj, type) and hasattr(obj, 'parse') and callable(obj.parse):
-                            plugin_class = obj
-                            break
-                    
-                    if plugin_class:
-                        print(f"> Found plugin class: {plugin_class.__name__}")
-                        
-                        # Create an instance and parse the HTML
-                        plugin_instance = plugin_class()
-                        parsed_results = plugin_instance.parse(html)
-
-                        # Initialize a list to hold all card data
-                        all_card_data = []
-
-                        # Assuming 'parsed_results' is a list of lists, where each inner list contains ScrapedField objects
-                        for card_fields in parsed_results:
-                            # Create a dictionary for the current card's data
-                            card_data = {'url': url}
-                            for field in card_fields:
-                                if field.found and field.name:
-                                    card_data[field.name] = str(field.value) if field.value is not None else ""
-                            all_card_data.append(card_data)
-
-                        # Determine the fieldnames (header) from the first card's data
-                        if all_card_data:
-                            fieldnames = ['url'] + [field.name for field in parsed_results[0]]
-                        else:
-                            fieldnames = []
-
-                        # Write all card data to the CSV file at once
-                        if all_card_data:
-                            with open(self.csv_path, mode='a', newline='', encoding='utf-8') as csv_file:
-                                writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-                                # Write header only if the file is empty
-                                if csv_file.tell() == 0:
-                                    writer.writeheader()
-                                writer.writerows(all_card_data)
-                            print(f"> CSV data saved to: {self.csv_path}")
-                        else:
-                            print("> No card data to write.")
-                        
-                    else:
-                        print(f"> Error: Could not find plugin class in {plugin_path}")
-                    
-                    # Clean up - remove our module to avoid conflicts
-                    if "plugin_module" in sys.modules:
-                        del sys.modules["plugin_module"]
-            except Exception as e:
-                print(f"> Error applying plugin: {str(e)}")
-                import traceback
-                traceback.print_exc()  # Print full traceback for debugging
+    @is_suspended.setter
+    def is_suspended(self, value):
+        self.pipeline.is_suspended = value
         
+    def run(self):
+        """Main execution method for the worker thread"""
         try:
-            # Import os explicitly to avoid scope issues
-            import os as os_module
-            
-            # Create output directory if it doesn't exist
-            output_dir = "scraped_html"
-            if not os_module.path.exists(output_dir):
-                os_module.makedirs(output_dir)
-                    
-            # Create a safe filename from the URL
-            safe_filename = url.replace("http://", "").replace("https://", "")
-            safe_filename = safe_filename.replace("/", "_").replace(":", "_")
-            if len(safe_filename) > 50:
-                safe_filename = safe_filename[:50]
-            safe_filename = f"{safe_filename}_{index}.html"
-            
-            # Save the file
-            file_path = os_module.path.join(output_dir, safe_filename)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(html)
-            print(f"> HTML saved to: {file_path}")
-            
-            # Emit success signal
-            self.url_status.emit(0, url)
-            status_code = 0  # Success
-            
-            # Signal to remove this URL from the input ONLY if it was successful
-            # This is the key change - only remove on success (status_code == 0)
-            if status_code == 0:
-                self.remove_url.emit(url)
-            
-        except Exception as e:
-            print(f"> Error saving HTML: {str(e)}")
-            # Error saving the file is still an error
-            self.url_status.emit(2, url)
-            # Stop execution on error
-            self.stop_execution = True
+            self.pipeline.run()
+        finally:
+            self.finished.emit()
 
 class ScraperApp(DarkThemeApp):
     def __init__(self):
@@ -582,9 +73,6 @@ class ScraperApp(DarkThemeApp):
         self.warning_count = 0
         self.error_count = 0
         
-        # Initialize dictionary to store accumulated results
-        self.accumulated_results = {}
-        
         # Initialize total URLs count
         self.total_urls = 0
 
@@ -606,27 +94,25 @@ class ScraperApp(DarkThemeApp):
         return dialog
     
     def load_url_list(self):
-        """Load a list of URLs from a file into the textbox"""
+        """Load a list of URLs from a file, streaming it from disk if it is too long for the textbox"""
         file_path, _ = self.get_file_dialog().getOpenFileName(
-            self, "Select URL List File", "", "Text Files (*.txt);;All Files (*)"
+            self, "Select URL List File", "",
+            "URL Lists (*.txt *.csv *.gz);;Text Files (*.txt);;CSV Files (*.csv);;All Files (*)"
         )
         if file_path:
             try:
-                with open(file_path, 'r') as file:
-                    # Read all lines from the file
-                    urls = file.readlines()
-                    
-                    # Process URLs - remove commas at the end and strip whitespace
-                    processed_urls = []
-                    for url in urls:
-                        url = url.strip()
-                        if url.endswith(','):
-                            url = url[:-1]
-                        if url:  # Only add non-empty URLs
-                            processed_urls.append(url)
-                    
+                # URLs are cleaned up (whitespace, trailing commas, empty lines) while they are read
+                source = open_url_source(file_path)
+                url_count = source.count()
+                
+                if url_count > LARGE_URL_LIST_LINES:
+                    # Too many to edit, the run reads them from the file as it goes
+                    print(f"> Streaming about {url_count:,} urls from {file_path}")
+                    self.show_url_queue(UrlQueue(source, url_count))
+                else:
                     # Set the processed URLs to the text box
-                    self.file_path_input.setText('\n'.join(processed_urls))
+                    self.show_url_input(keep_remaining=False)
+                    self.file_path_input.setText('\n'.join(source))
                     
             except Exception as e:
                 self.show_message_dialog(f"> Error loading file: {str(e)}")
@@ -637,31 +123,35 @@ class ScraperApp(DarkThemeApp):
         if self.is_scraping:
             return
         
-        # Clear accumulated results for a new run
-        self.accumulated_results = {}
-        
-        # Clear the results table
-        self.results_table.setRowCount(0)
+        # Clear the results table for a new run
+        self.results_model.clear()
             
         # Get all the selected options
         options = {k: v for k, v in self.selected_buttons.items()}
         
-        # Store the selected plugin
-        self.selected_plugin = self.plugin_dropdown.currentText()
+        # Store the selected plugins, all of them share each fetched page
+        self.selected_plugins = self.plugin_dropdown.checked_items()
         
         # Disable the plugin dropdown during scraping
         self.plugin_dropdown.setEnabled(False)
         
-        # Get URLs from the text edit
-        urls_text = self.file_path_input.toPlainText().strip()
-        if not urls_text:
-            return
-            
-        # Split into individual URLs
-        urls = [url.strip() for url in urls_text.split('\n') if url.strip()]
+        if self.url_queue_model.url_queue is not None:
+            # A long list loaded from a file, streamed from disk by the queue
+            url_queue = self.url_queue_model.url_queue
+        else:
+            # Get URLs from the text edit
+            urls_text = self.file_path_input.toPlainText().strip()
+            if not urls_text:
+                return
+                
+            # Split into individual URLs
+            url_queue = UrlQueue(list(normalize_urls(urls_text.split('\n'))))
+        
+        # The worker consumes the queue, the input box shows its remaining URLs during the run
+        self.show_url_queue(url_queue)
         
         # Set total URLs count
-        self.total_urls = len(urls)
+        self.total_urls = len(url_queue)
         
         # Update the counter
         self.update_done_total_counter()
@@ -673,12 +163,11 @@ class ScraperApp(DarkThemeApp):
         output_file = self.output_file_input.text().strip()
 
         # Create and configure the worker
-        self.worker = ScraperWorker(options, urls, timeout_seconds, output_file)
+        self.worker = ScraperWorker(options, url_queue, timeout_seconds, output_file, self.selected_plugins)
         
         # Connect signals
         self.worker.url_status.connect(self.handle_url_status)
         self.worker.finished.connect(self.scraping_finished)
-        self.worker.remove_url.connect(self.remove_url_from_input)
         self.worker.suspend_execution.connect(self.show_suspension_timer)
         self.worker.plugin_results.connect(self.handle_plugin_results)  # Connect the new signal
         
@@ -693,113 +182,18 @@ class ScraperApp(DarkThemeApp):
     
     def handle_plugin_results(self, results):
         """Handle the plugin results received from the worker thread"""
-        # Update accumulated results
-        for field in results:
-            field_name = field.name
-            field_value = field.value
-            
-            # Get the type name as a string for comparison
-            field_type_name = field.field_type.name if hasattr(field.field_type, 'name') else str(field.field_type)
-            
-            # Handle accumulation for numeric fields - check the field type name
-            if hasattr(field, 'accumulate') and field.accumulate and field_type_name in ['INTEGER', 'FLOAT']:
-                # Convert value to float or int if needed
-                if isinstance(field_value, str):
-                    try:
-                        if field_type_name == 'INTEGER':
-                            field_value = int(field_value)
-                        else:
-                            field_value = float(field_value)
-                    except (ValueError, TypeError):
-                        # If conversion fails, don't accumulate
-                        field_value = field.value
-                
-                # Accumulate the value
-                if field_name in self.accumulated_results:
-                    self.accumulated_results[field_name]['value'] += field_value
-                else:
-                    self.accumulated_results[field_name] = {
-                        'value': field_value,
-                        'type': field.field_type,
-                        'description': field.description
-                    }
-            else:
-                # For non-accumulated fields, just update the value
-                self.accumulated_results[field_name] = {
-                    'value': field_value,
-                    'type': field.field_type,
-                    'description': field.description
-                }
-        
-        # Update the table
-        self.update_results_table()
-
-    def update_results_table(self):
-        """Update the results table with the current accumulated results"""
-        print(f"> Updating results table with {len(self.accumulated_results)} fields")
-        
-        # Clear the table
-        self.results_table.setRowCount(0)
-        
-        # Add rows for each field
-        for i, (name, data) in enumerate(self.accumulated_results.items()):
-            self.results_table.insertRow(i)
-            
-            # Format the name with "Sum of" or "Last" prefix based on data type
-            value = data['value']
-            field_type = data.get('type')
-            
-            # Get the field type name as a string
-            field_type_name = field_type.name if hasattr(field_type, 'name') else str(field_type)
-            
-            # Check if this field should be displayed as accumulated
-            is_accumulated = False
-            if isinstance(value, (int, float)) and field_type_name in ['INTEGER', 'FLOAT']:
-                # Check if the field has been accumulated by looking at the original field
-                is_accumulated = True
-                
-                # If it's a numeric type, format with comma for thousands
-                value_str = f"{value:,}"
-            elif isinstance(value, list):
-                # Format lists with limited display
-                value_str = ", ".join(str(item) for item in value[:3])
-                if len(value) > 3:
-                    value_str += f"... ({len(value)} items)"
-            elif isinstance(value, dict):
-                # Format dictionaries with summary
-                value_str = f"{{...}} ({len(value)} key-value pairs)"
-            else:
-                # Format strings and other types
-                value_str = str(value)
-            
-            # Add the prefix to the field name
-            display_name = f"Sum of {name}" if is_accumulated else f"Last {name}"
-            
-            # Set the field name with appropriate prefix
-            self.results_table.setItem(i, 0, QTableWidgetItem(display_name))
-            
-            # Set the value
-            self.results_table.setItem(i, 1, QTableWidgetItem(value_str))
-            
-            # Add description if available
-            if data.get('description'):
-                self.results_table.setItem(i, 2, QTableWidgetItem(str(data['description'])))
-            
-            print(f">   Added row {i}: {display_name} = {value_str}")
-        
-        # Resize rows to contents
-        self.results_table.resizeRowsToContents()
-        
-        # Resize the first column to contents to make room for the prefixes
-        self.results_table.resizeColumnToContents(0)
-        
-        print(f"> Table updated with {self.results_table.rowCount()} rows")
+        # The model refreshes the table on its own timer
+        self.results_model.add_results(results)
         
         # Update the "done/total" counter
         self.update_done_total_counter()
 
     def update_done_total_counter(self):
         """Update the done/total counter"""
+        # Read the queue every time: skipped URLs leave it, follow-ups join it,
+        # and a streamed list only has an exact count once it was read to the end
+        if self.worker is not None:
+            self.total_urls = len(self.worker.url_queue)
         done = self.success_count
         total = self.total_urls
         
@@ -949,23 +343,6 @@ class ScraperApp(DarkThemeApp):
         # Update the "done/total" counter
         self.update_done_total_counter()
     
-    def remove_url_from_input(self, url):
-        """Remove a successfully processed URL from the input text box"""
-        # Get current URLs
-        urls_text = self.file_path_input.toPlainText().strip()
-        if not urls_text:
-            return
-            
-        # Split into individual URLs
-        urls = [u.strip() for u in urls_text.split('\n') if u.strip()]
-        
-        # Remove the processed URL
-        if url in urls:
-            urls.remove(url)
-            
-        # Update the text box
-        self.file_path_input.setText('\n'.join(urls))
-    
     def scraping_finished(self):
         """Called when the scraping process finishes"""
         print(f"\n> Scraping process completed! Success: {self.success_count}, Warnings: {self.warning_count}, Errors: {self.error_count}")
@@ -980,6 +357,14 @@ class ScraperApp(DarkThemeApp):
         # Re-enable the plugin dropdown
         self.plugin_dropdown.setEnabled(True)
         
+        # Put the URLs that were not scraped successfully back into the input box,
+        # or keep streaming them if there are still too many to edit
+        url_queue = self.url_queue_model.url_queue
+        if url_queue is not None and url_queue.remaining_count() > LARGE_URL_LIST_LINES:
+            self.show_url_queue(UrlQueue(url_queue.iter_remaining(), url_queue.remaining_count()))
+        else:
+            self.show_url_input()
+        
         # Update the counter to show "Completed"
         self.update_done_total_counter()
         
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML parser backends on saved pages.
+
+Parses every page with each installed backend, optionally runs a plugin on the
+parsed document, and prints the average and best time per backend. By default
+it uses the pages saved by previous runs in scraped_html/, so the numbers
+reflect real seller pages rather than synthetic markup.
+
+Usage:
+    python benchmark_parsers.py
+    python benchmark_parsers.py scraped_html/*.html --plugin carmarker_seller_cards.py --repeat 10
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+from html_document import HtmlDocument, PARSER_BACKENDS, combine_scopes, is_backend_available
+from plugin_loader import load_plugin
+from record_batch import iter_record_batches
+
+
+def benchmark_backend(pages, backend, plugin=None, repeat=5, scopes=None):
+    """
+    Time parsing (and optionally plugin extraction) of all pages with one backend.
+    When scopes are given, only those parts of the pages are built.
+
+    Returns:
+        Dictionary with average/best milliseconds per pass and the number of rows extracted
+    """
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        rows = 0
+        for html in pages:
+            document = HtmlDocument(html, backend, scopes)
+            if plugin is not None:
+                rows += sum(len(batch) for batch in iter_record_batches(plugin.parse(document)))
+        timings.append((time.perf_counter() - start_time) * 1000)
+
+    return {
+        "average_ms": sum(timings) / len(timings),
+        "best_ms": min(timings),
+        "rows": rows
+    }
+
+
+def main():
+    """Command line interface for the benchmark"""
+    parser = argparse.ArgumentParser(description='Compare HTML parser backends on saved pages')
+    parser.add_argument('files', nargs='*', help='HTML files to parse (default: scraped_html/*.html)')
+    parser.add_argument('--plugin', '-p', help='Plugin file from the Plugins directory to run on each document')
+    parser.add_argument('--repeat', '-r', type=int, default=5, help='Number of passes per backend (default: 5)')
+    parser.add_argument('--full', action='store_true', help="Build the full tree even if the plugin declares a PARSE_SCOPE")
+
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join("scraped_html", "*.html")))
+    if not files:
+        print("No HTML files to benchmark. Run a scrape first or pass files explicitly.", file=sys.stderr)
+        sys.exit(1)
+
+    pages = []
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    total_chars = sum(len(page) for page in pages)
+    print(f"Benchmarking {len(pages)} pages ({total_chars:,} characters), {args.repeat} passes per backend")
+
+    plugin = load_plugin(args.plugin) if args.plugin else None
+    if args.plugin and plugin is None:
+        sys.exit(1)
+    if plugin is not None and not getattr(plugin, 'ACCEPTS_DOCUMENT', False):
+        print(f"Plugin {args.plugin} does not accept a parsed document, timing the parse only")
+        plugin = None
+
+    scopes = None if args.full or plugin is None else combine_scopes([plugin])
+    if scopes:
+        print(f"Parsing limited to the plugin scope: {', '.join(scopes)}")
+
+    print(f"\n{'Backend':<14}{'Average (ms)':>14}{'Best (ms)':>12}{'Rows':>8}")
+    for backend in PARSER_BACKENDS:
+        if not is_backend_available(backend):
+            print(f"{backend:<14}{'not installed':>14}")
+            continue
+        result = benchmark_backend(pages, backend, plugin, args.repeat, scopes)
+        print(f"{backend:<14}{result['average_ms']:>14.1f}{result['best_ms']:>12.1f}{result['rows']:>8}")
+
+
+if __name__ == "__main__":
+    main()
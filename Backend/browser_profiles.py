@@ -0,0 +1,218 @@
+"""
+Persistent browser profiles reused across runs.
+
+Without a profile every page starts in a fresh browser: the clearance cookies
+Cloudflare set after a solved challenge are lost, and the CSS and scripts of
+the site are downloaded again. A profile keeps both between pages and runs,
+so a warm profile loads a protected page without the challenge wait.
+
+Profiles are directories under browser_profiles/<engine>/:
+  * Selenium, Playwright and Puppeteer use them as Chrome user-data-dir
+    (cookies, local storage and the HTTP cache)
+  * Ulixee Hero saves its exported user profile (cookies and storage) there
+
+Every profile keeps the user agent it was first used with, since clearance
+cookies are only honored for the same browser, and optionally the proxy it
+goes with (its `affinity`), since they are tied to the IP address too.
+
+A profile is used by one browser at a time, guarded by a lock file, so shard
+processes share the pool safely. Profiles are rotated, the least recently
+used free one is handed out and new ones are created when all are busy.
+They age out after `max_age_days`, or as soon as they were blocked
+`max_blocks` times, when the site has most likely flagged them.
+"""
+
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+
+PROFILES_DIR = "browser_profiles"
+USER_AGENTS_FILE = "user-agents.txt"
+DEFAULT_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                      "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+
+
+class BrowserProfile:
+    """One profile directory and what is known about it."""
+
+    # A lock untouched for this long belongs to a browser that is gone
+    LOCK_STALE_SECONDS = 600
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.metadata_path = os.path.join(path, "profile.json")
+        self.lock_path = os.path.join(path, "profile.lock")
+        self.metadata: Dict = {}
+        if os.path.exists(self.metadata_path):
+            try:
+                with open(self.metadata_path, encoding='utf-8') as f:
+                    self.metadata = json.load(f)
+            except (OSError, ValueError):
+                self.metadata = {}
+        self.metadata.setdefault("created_at", time.time())
+        self.metadata.setdefault("last_used", 0.0)
+        self.metadata.setdefault("uses", 0)
+        self.metadata.setdefault("blocks", 0)
+
+    @property
+    def user_agent(self) -> Optional[str]:
+        return self.metadata.get("user_agent")
+
+    @property
+    def affinity(self) -> Optional[str]:
+        return self.metadata.get("affinity")
+
+    def age_days(self) -> float:
+        return (time.time() - self.metadata["created_at"]) / 86400
+
+    def try_lock(self) -> bool:
+        """Take the profile for one browser, False if another browser has it"""
+        try:
+            if time.time() - os.path.getmtime(self.lock_path) > self.LOCK_STALE_SECONDS:
+                os.remove(self.lock_path)
+        except OSError:
+            pass
+        try:
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        os.write(fd, str(os.getpid()).encode('ascii'))
+        os.close(fd)
+        return True
+
+    def touch(self):
+        """Keep the lock of a long running browser from going stale"""
+        try:
+            os.utime(self.lock_path)
+        except OSError:
+            pass
+
+    def unlock(self):
+        try:
+            os.remove(self.lock_path)
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        with open(self.metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f)
+
+    def __repr__(self):
+        return f"BrowserProfile({self.path})"
+
+
+class ProfilePool:
+    """Rotating pool of persistent browser profiles, per engine."""
+
+    def __init__(self, directory: str = PROFILES_DIR, max_age_days: float = 7, max_blocks: int = 2):
+        """
+        Args:
+            directory: Directory of the profiles, one sub-directory per engine
+            max_age_days: Profiles older than this are deleted and replaced by fresh ones
+            max_blocks: Profiles blocked this many times are deleted after their browser closes
+        """
+        self.directory = directory
+        self.max_age_days = max_age_days
+        self.max_blocks = max_blocks
+        self._lock = threading.Lock()
+        self._user_agents: Optional[List[str]] = None
+
+    def _profiles(self, engine: str) -> List[BrowserProfile]:
+        engine_dir = os.path.join(self.directory, engine)
+        if not os.path.isdir(engine_dir):
+            return []
+        return [BrowserProfile(os.path.join(engine_dir, name)) for name in sorted(os.listdir(engine_dir))
+                if os.path.isdir(os.path.join(engine_dir, name))]
+
+    def _retire(self, profile: BrowserProfile, reason: str):
+        """Delete a profile, whose lock is held"""
+        print(f"> Retiring browser profile {profile.name}: {reason}")
+        shutil.rmtree(profile.path, ignore_errors=True)
+
+    def checkout(self, engine: str, affinity: Optional[str] = None) -> BrowserProfile:
+        """
+        Take a profile for one browser, until release.
+
+        Args:
+            engine: Engine name, profiles of different engines are kept apart
+            affinity: Optional proxy the browser goes through, its own profiles are preferred
+
+        Returns:
+            The least recently used free profile (one of `affinity` first), or a new one
+        """
+        with self._lock:
+            candidates = []
+            for profile in self._profiles(engine):
+                if not profile.try_lock():
+                    continue
+                if profile.age_days() > self.max_age_days:
+                    self._retire(profile, f"older than {self.max_age_days:g} days")
+                    continue
+                candidates.append(profile)
+
+            # Keep one profile, free the others
+            candidates.sort(key=lambda profile: (profile.affinity != affinity, profile.metadata["last_used"]))
+            for other in candidates[1:]:
+                other.unlock()
+            if candidates and (affinity is None or candidates[0].affinity in (affinity, None)):
+                profile = candidates[0]
+            else:
+                if candidates:
+                    candidates[0].unlock()
+                profile = self._create(engine)
+
+            if affinity is not None:
+                profile.metadata["affinity"] = affinity
+            if not profile.user_agent:
+                profile.metadata["user_agent"] = random.choice(self._load_user_agents())
+            profile.metadata["last_used"] = time.time()
+            profile.metadata["uses"] += 1
+            profile.save()
+            return profile
+
+    def _create(self, engine: str) -> BrowserProfile:
+        """Create and lock a new profile"""
+        engine_dir = os.path.join(self.directory, engine)
+        os.makedirs(engine_dir, exist_ok=True)
+        while True:
+            # Random names, so two processes never create the same profile
+            path = os.path.join(engine_dir, f"profile_{int(time.time())}_{random.randrange(16 ** 6):06x}")
+            try:
+                os.mkdir(path)
+                break
+            except FileExistsError:
+                continue
+        profile = BrowserProfile(path)
+        profile.try_lock()
+        print(f"> Created browser profile {profile.name}")
+        return profile
+
+    def _load_user_agents(self) -> List[str]:
+        # Read here rather than through an engine module, so no browser package is needed
+        if self._user_agents is None:
+            try:
+                with open(USER_AGENTS_FILE, encoding='utf-8') as f:
+                    self._user_agents = [line.strip() for line in f if line.strip()]
+            except OSError:
+                self._user_agents = []
+            self._user_agents = self._user_agents or [DEFAULT_USER_AGENT]
+        return self._user_agents
+
+    def release(self, profile: BrowserProfile, blocked: bool = False):
+        """Give a profile back after its browser closed, counting a block if the last page was blocked"""
+        with self._lock:
+            if blocked:
+                profile.metadata["blocks"] += 1
+            if profile.metadata["blocks"] >= self.max_blocks:
+                self._retire(profile, f"blocked {profile.metadata['blocks']} times")
+                return
+            if not blocked:
+                # A page got through, the clearance of the profile is good
+                profile.metadata["blocks"] = 0
+            profile.save()
+            profile.unlock()
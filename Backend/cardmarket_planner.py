@@ -0,0 +1,89 @@
+"""
+Fetch planning for CardMarket seller crawls.
+
+The expansions dropdown of a seller's offers page already gives the number of
+cards in every expansion (CardMarketSellerExpansionsScraper's card_count). That
+is enough to work out how many listing pages each expansion has, so the page
+URLs can be generated directly instead of fetching each expansion's first page
+to read its page count.
+
+Pages are planned at the largest page size the site accepts, to keep the number
+of requests down. A card_count above the number of listings only adds an empty
+last page, it never drops a page.
+
+Usage, to turn the CSV of the expansions plugin into a URL list for the cards plugin:
+    python cardmarket_planner.py scraped_data/1700000000_carmarker_seller_exps.csv -o seller_pages.txt
+"""
+
+import argparse
+import csv
+import math
+from typing import Iterable, Iterator, List, Tuple
+
+from follow_up import with_query
+
+# Listings per page when the URL does not ask for a size, and the largest size the offers pages accept
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+PAGE_SIZE_PARAMETER = "perSite"
+
+
+def page_count(card_count: int, page_size: int = MAX_PAGE_SIZE) -> int:
+    """Number of listing pages for `card_count` cards, at least one"""
+    return max(1, math.ceil(card_count / page_size))
+
+
+def expansion_page_urls(seller_url: str, expansion_id: int, card_count: int,
+                        page_size: int = MAX_PAGE_SIZE) -> List[str]:
+    """
+    Return the URLs of every listing page of one expansion of a seller.
+
+    Args:
+        seller_url: The seller's offers page, e.g. https://www.cardmarket.com/en/Magic/Users/Name/Offers/Singles
+        expansion_id: Value of the expansion in the idExpansion dropdown
+        card_count: Number of cards of the expansion, as shown in the dropdown
+        page_size: Listings per page
+    """
+    size = page_size if page_size != DEFAULT_PAGE_SIZE else None
+    url = with_query(seller_url, idExpansion=expansion_id, site=None, **{PAGE_SIZE_PARAMETER: size})
+    # The first page is the expansion URL itself, so it is deduplicated against links to it
+    return [url] + [with_query(url, site=site) for site in range(2, page_count(card_count, page_size) + 1)]
+
+
+def plan_seller_pages(seller_url: str, expansions: Iterable[Tuple[int, int]],
+                      page_size: int = MAX_PAGE_SIZE) -> Iterator[str]:
+    """Yield the listing page URLs of all (expansion_id, card_count) pairs of a seller"""
+    for expansion_id, card_count in expansions:
+        yield from expansion_page_urls(seller_url, expansion_id, card_count, page_size)
+
+
+def read_expansions_csv(path: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield (seller URL, expansion_id, card_count) from a CSV written by the expansions plugin"""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            try:
+                yield row["url"], int(row["expansion_id"]), int(row["card_count"])
+            except (KeyError, ValueError):
+                continue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan the listing page URLs of CardMarket sellers from their expansions CSV")
+    parser.add_argument("expansions_csv", help="CSV written by the CardMarketSellerExpansionsScraper plugin")
+    parser.add_argument("-o", "--output", default="seller_pages.txt", help="URL list to write, one URL per line")
+    parser.add_argument("--page-size", type=int, default=MAX_PAGE_SIZE, help="Listings per page")
+    args = parser.parse_args()
+
+    pages = 0
+    expansions = 0
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for seller_url, expansion_id, card_count in read_expansions_csv(args.expansions_csv):
+            for url in expansion_page_urls(seller_url, expansion_id, card_count, args.page_size):
+                f.write(url + "\n")
+                pages += 1
+            expansions += 1
+    print(f"> Planned {pages} pages for {expansions} expansions, saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
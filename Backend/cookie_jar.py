@@ -0,0 +1,163 @@
+"""
+Cookie jar shared by every engine, thread and worker process.
+
+Passing a Cloudflare challenge is expensive: a visible browser, the challenge
+wait, sometimes a click. What it buys is a handful of cookies (cf_clearance
+and friends) that let any browser through for a while, as long as it sends the
+same user agent. The jar keeps the cookies of successful fetches per domain
+and user agent, so they can be injected into the next session of any engine:
+one headful solve with SeleniumBase unlocks many cheap headless fetches with
+Playwright or Puppeteer, in any shard process.
+
+Cookies are kept in the format Puppeteer and Playwright use, which Chrome's
+DevTools protocol (Selenium) and Hero take as well:
+
+    {"name", "value", "domain", "path", "expires", "httpOnly", "secure", "sameSite"}
+
+with `expires` in seconds since the epoch, -1 for a session cookie. A domain
+with a leading dot (".example.com") is sent to the subdomains too, one without
+("www.example.com") only to that host, as every engine reports and takes them.
+Cookies handed out for a session leave `expires` out for session cookies.
+
+The jar is a SQLite file, safe to use from several threads and processes.
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+# Cookies a challenge solve sets, their user agent is the one a session needs to send
+CLEARANCE_COOKIES = ("cf_clearance",)
+
+
+def _expires(cookie: Dict) -> float:
+    """Expiry of a cookie of any engine in seconds since the epoch, -1 for a session cookie"""
+    value = cookie.get("expires", cookie.get("expiry"))
+    if value in (None, "", -1):
+        return -1
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        # Hero gives a date string
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return -1
+
+
+def normalize_cookie(cookie: Dict) -> Dict:
+    """Return a cookie of Selenium, Playwright, Puppeteer or Hero in the format of the jar"""
+    same_site = str(cookie.get("sameSite") or "Lax").capitalize()
+    return {
+        "name": cookie["name"],
+        "value": cookie.get("value", ""),
+        "domain": cookie.get("domain", ""),
+        "path": cookie.get("path") or "/",
+        "expires": _expires(cookie),
+        "httpOnly": bool(cookie.get("httpOnly", False)),
+        "secure": bool(cookie.get("secure", False)),
+        "sameSite": same_site if same_site in ("Strict", "Lax", "None") else "Lax",
+    }
+
+
+class CookieJar:
+    """Cookies of successful fetches, by domain and user agent."""
+
+    def __init__(self, path: str = "cookie_jar.sqlite", session_cookie_seconds: float = 3600):
+        """
+        Args:
+            path: SQLite file of the jar
+            session_cookie_seconds: How long cookies without an expiry are handed out after they were stored
+        """
+        self.path = path
+        self.session_cookie_seconds = session_cookie_seconds
+        self._lock = threading.Lock()
+        # Shard processes share the file, wait for their writes instead of failing
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cookies ("
+                "domain TEXT, user_agent TEXT, name TEXT, path TEXT, value TEXT, expires REAL, "
+                "http_only INTEGER, secure INTEGER, same_site TEXT, stored_at REAL, host_only INTEGER DEFAULT 0, "
+                "PRIMARY KEY (domain, user_agent, name, path))"
+            )
+            # Jars of earlier versions kept every cookie as a domain cookie
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(cookies)")]
+            if "host_only" not in columns:
+                self._connection.execute("ALTER TABLE cookies ADD COLUMN host_only INTEGER DEFAULT 0")
+
+    @staticmethod
+    def _domains(url: str) -> List[str]:
+        """The host of a URL and its parent domains, e.g. www.example.com, example.com, com"""
+        labels = (urlsplit(url).hostname or "").lower().split('.')
+        return ['.'.join(labels[i:]) for i in range(len(labels))]
+
+    def store(self, user_agent: str, cookies: List[Dict]) -> int:
+        """
+        Keep the cookies a session of `user_agent` ended with, returns how many were stored.
+
+        Args:
+            user_agent: Exact user agent the browser sent, the cookies are only handed out for it
+            cookies: Cookies of any engine, see normalize_cookie
+        """
+        if not user_agent or not cookies:
+            return 0
+        now = time.time()
+        rows = []
+        for cookie in map(normalize_cookie, cookies):
+            if 0 <= cookie["expires"] <= now or not cookie["domain"]:
+                continue
+            rows.append((cookie["domain"].lstrip('.').lower(), user_agent, cookie["name"], cookie["path"],
+                         cookie["value"], cookie["expires"], int(cookie["httpOnly"]), int(cookie["secure"]),
+                         cookie["sameSite"], now, int(not cookie["domain"].startswith('.'))))
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO cookies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._connection.execute(
+                "DELETE FROM cookies WHERE (expires >= 0 AND expires <= ?) OR (expires < 0 AND stored_at <= ?)",
+                (now, now - self.session_cookie_seconds))
+        return len(rows)
+
+    def _live_rows(self, url: str, user_agent: Optional[str] = None) -> list:
+        domains = self._domains(url)
+        now = time.time()
+        # Host-only cookies only go to their own host, domain cookies to the subdomains too
+        query = (f"SELECT domain, user_agent, name, path, value, expires, http_only, secure, same_site, stored_at, "
+                 f"host_only FROM cookies WHERE domain IN ({','.join('?' * len(domains))}) "
+                 f"AND (host_only = 0 OR domain = ?) "
+                 f"AND (expires > ? OR (expires < 0 AND stored_at > ?))")
+        parameters = [*domains, domains[0], now, now - self.session_cookie_seconds]
+        if user_agent is not None:
+            query += " AND user_agent = ?"
+            parameters.append(user_agent)
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchall()
+
+    def cookies_for(self, url: str, user_agent: str) -> List[Dict]:
+        """Return the unexpired cookies a session of `user_agent` may send to `url`"""
+        if not user_agent:
+            return []
+        cookies = []
+        for domain, _, name, path, value, expires, http_only, secure, same_site, _, host_only \
+                in self._live_rows(url, user_agent):
+            cookie = {"name": name, "value": value, "domain": domain if host_only else f".{domain}", "path": path,
+                      "httpOnly": bool(http_only), "secure": bool(secure), "sameSite": same_site}
+            # Without an expiry the engines keep it as a session cookie
+            if expires >= 0:
+                cookie["expires"] = expires
+            cookies.append(cookie)
+        return cookies
+
+    def clearance_user_agent(self, url: str) -> Optional[str]:
+        """Return the user agent holding the freshest unexpired clearance for `url`, None if there is none"""
+        clearances = [(stored_at, user_agent) for _, user_agent, name, _, _, _, _, _, _, stored_at, _
+                      in self._live_rows(url) if name in CLEARANCE_COOKIES]
+        return max(clearances)[1] if clearances else None
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
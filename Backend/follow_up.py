@@ -0,0 +1,44 @@
+"""
+Follow-up URLs emitted by plugins, to chain crawl stages in a single run.
+
+A plugin that finds links worth scraping next (e.g. the expansions of a seller,
+then the pages of each expansion) can define
+
+    def get_follow_up_urls(self, document, url) -> List[FollowUpUrl]
+
+Each FollowUpUrl names the page and the plugin(s) that should handle it. The
+worker appends them to the URL queue of the running scrape, where they are
+deduplicated like any other URL, and stops following links past the depth
+chosen with the "Crawl Depth" option.
+
+A follow-up can also carry a version: anything that changes when the content
+of the page changes, like the number of cards in an expansion. With Revalidate
+on, a page whose version is the same as when it was last scraped is not fetched
+again, the rows cached for it are written instead.
+"""
+
+from collections import namedtuple
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# A page to scrape next, the plugin files (e.g. "carmarker_seller_cards.py") to apply to it
+# and an optional version of its content
+FollowUpUrl = namedtuple("FollowUpUrl", ["url", "plugins", "version"], defaults=(None,))
+
+
+def follow_up(url: str, *plugins: str, version: Any = None) -> FollowUpUrl:
+    """Return a FollowUpUrl for `url`, handled by the given plugin files"""
+    plugins = tuple(plugin if plugin.endswith(".py") else f"{plugin}.py" for plugin in plugins)
+    return FollowUpUrl(url, plugins, None if version is None else str(version))
+
+
+def with_query(url: str, **params: Any) -> str:
+    """
+    Return `url` with some query parameters set, e.g. with_query(url, idExpansion=5, site=2).
+
+    A parameter set to None is removed. The other parameters keep their order.
+    """
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key not in params]
+    query.extend((key, str(value)) for key, value in params.items() if value is not None)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
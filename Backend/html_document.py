@@ -0,0 +1,304 @@
+"""
+Shared HTML document layer for AutoScrape plugins.
+
+The worker parses every scraped page once with the parser backend selected for
+the run and hands the resulting document to the plugins, instead of each plugin
+building its own BeautifulSoup tree with the slow 'html.parser' backend.
+
+All backends expose the small part of the BeautifulSoup API the plugins use:
+select / select_one / find / find_all on the document and on elements, plus
+.text, get_text(), get() and element["attribute"].
+
+Plugins that only need part of a page can declare it with a PARSE_SCOPE class
+attribute, a list of simple CSS selectors. The BeautifulSoup backends then only
+build the matching elements and their descendants instead of the whole tree.
+"""
+
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Backends in the order they are offered in the GUI
+PARSER_BACKENDS = ["lxml", "selectolax", "html.parser"]
+DEFAULT_PARSER = "lxml"
+
+# Attributes that BeautifulSoup treats as whitespace separated token lists
+_MULTI_VALUED_ATTRIBUTES = {"class", "rel", "rev", "accept-charset", "headers", "accesskey", "dropzone"}
+
+_backend_availability = {}
+
+
+def is_backend_available(backend: str) -> bool:
+    """Return True if the python package behind a parser backend is installed."""
+    if backend not in _backend_availability:
+        try:
+            if backend == "lxml":
+                import lxml  # noqa: F401
+            elif backend == "selectolax":
+                import selectolax.lexbor  # noqa: F401
+            elif backend != "html.parser":
+                raise ValueError(f"Parser backend must be one of: {', '.join(PARSER_BACKENDS)}")
+            _backend_availability[backend] = True
+        except ImportError:
+            _backend_availability[backend] = False
+    return _backend_availability[backend]
+
+
+def resolve_backend(backend: Optional[str]) -> str:
+    """Return the requested backend, falling back to html.parser if it is not installed."""
+    backend = backend or DEFAULT_PARSER
+    if is_backend_available(backend):
+        return backend
+    print(f"> Parser backend '{backend}' is not installed, falling back to html.parser")
+    return "html.parser"
+
+
+def _selector_from_filters(name=None, attrs=None, class_=None, **kwargs) -> str:
+    """Translate BeautifulSoup find() arguments into an equivalent CSS selector."""
+    attributes = dict(attrs or {})
+    attributes.update(kwargs)
+    if class_ is not None:
+        attributes["class"] = class_
+
+    selector = name if isinstance(name, str) else ""
+    for key, value in attributes.items():
+        if value is True:
+            selector += f"[{key}]"
+        elif value is not None and value is not False:
+            operator = "~=" if key in _MULTI_VALUED_ATTRIBUTES else "="
+            escaped = str(value).replace('"', '\\"')
+            selector += f'[{key}{operator}"{escaped}"]'
+    return selector or "*"
+
+
+# One compound selector: optional tag name followed by #id, .class and [attr] / [attr=value] parts
+_SCOPE_PART_PATTERN = re.compile(r"""#([\w-]+)|\.([\w-]+)|\[\s*([\w:-]+)\s*(?:=\s*(?:"([^"]*)"|'([^']*)'|([^\]\s]*)))?\s*\]""")
+_SCOPE_NAME_PATTERN = re.compile(r"^[a-zA-Z][\w-]*")
+
+
+def parse_scope_selector(selector: str):
+    """
+    Turn a simple CSS selector into a (tag name, attribute conditions) pair.
+
+    Only the first compound selector is used: for ".info-list-container dl" the
+    whole .info-list-container subtree is kept, which still contains the dl.
+
+    Returns:
+        Tuple of tag name (or None) and a list of (attribute, value) pairs,
+        where a value of None only requires the attribute to be present
+    """
+    compound = selector.strip().split()[0]
+    name_match = _SCOPE_NAME_PATTERN.match(compound)
+    name = name_match.group(0).lower() if name_match else None
+
+    conditions = []
+    for element_id, class_name, attribute, double_quoted, single_quoted, bare in _SCOPE_PART_PATTERN.findall(compound):
+        if element_id:
+            conditions.append(("id", element_id))
+        elif class_name:
+            conditions.append(("class", class_name))
+        else:
+            value = double_quoted or single_quoted or bare
+            conditions.append((attribute.lower(), value if value else None))
+    return name, conditions
+
+
+class ScopeStrainer(SoupStrainer):
+    """
+    SoupStrainer that keeps every element matching any of several scope selectors.
+
+    A plain SoupStrainer can only express one tag name with one set of
+    attributes, while a run with several plugins needs the union of their scopes.
+    """
+
+    def __init__(self, selectors: Sequence[str]):
+        super().__init__()
+        self.selectors = list(selectors)
+        self.scopes = [parse_scope_selector(selector) for selector in self.selectors]
+
+    def _matches_scope(self, name, attrs) -> bool:
+        attrs = attrs or {}
+        for scope_name, conditions in self.scopes:
+            if scope_name and scope_name != name:
+                continue
+            if all(self._matches_condition(attrs, attribute, value) for attribute, value in conditions):
+                return True
+        return False
+
+    @staticmethod
+    def _matches_condition(attrs, attribute, value) -> bool:
+        actual = attrs.get(attribute)
+        if actual is None:
+            return False
+        if value is None:
+            return True
+        if isinstance(actual, (list, tuple)):
+            actual = " ".join(actual)
+        if attribute in _MULTI_VALUED_ATTRIBUTES:
+            return value in actual.split()
+        return actual == value
+
+    # BeautifulSoup 4.13 and later
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return self._matches_scope(name, attrs)
+
+    def allow_string_creation(self, string) -> bool:
+        return False
+
+    # BeautifulSoup 4.12 and earlier
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return self._matches_scope(markup_name, markup_attrs)
+
+    @property
+    def excludes_everything(self) -> bool:
+        return not self.scopes
+
+    def __repr__(self) -> str:
+        return f"ScopeStrainer({self.selectors!r})"
+
+
+def combine_scopes(plugins) -> Optional[List[str]]:
+    """
+    Return the union of the PARSE_SCOPE of several plugins.
+
+    Returns None, meaning the whole document must be built, as soon as one of
+    the plugins does not declare a scope.
+    """
+    selectors = []
+    for plugin in plugins:
+        scope = getattr(plugin, 'PARSE_SCOPE', None)
+        if not scope:
+            return None
+        selectors.extend(selector for selector in scope if selector not in selectors)
+    return selectors or None
+
+
+class SelectolaxElement:
+    """Wraps a selectolax node behind the BeautifulSoup Tag API used by the plugins."""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def name(self) -> str:
+        return self.node.tag
+
+    @property
+    def attrs(self) -> Dict[str, Any]:
+        return self.node.attributes
+
+    @property
+    def text(self) -> str:
+        return self.node.text(deep=True)
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        return self.node.text(deep=True, separator=separator, strip=strip)
+
+    def get(self, key: str, default=None):
+        value = self.node.attributes.get(key, default)
+        # selectolax reports valueless attributes as None
+        return "" if value is None and key in self.node.attributes else value
+
+    def has_attr(self, key: str) -> bool:
+        return key in self.node.attributes
+
+    def __getitem__(self, key: str):
+        if key not in self.node.attributes:
+            raise KeyError(key)
+        return self.get(key)
+
+    @property
+    def descendants(self):
+        """Yield the descendant elements in document order, like Tag.descendants without the strings."""
+        nodes = self.node.traverse(include_text=False)
+        next(nodes, None)  # traverse() starts with the node itself
+        for node in nodes:
+            # Skip comments and other non-element nodes ("-comment", "-doctype")
+            if not node.tag.startswith("-"):
+                yield SelectolaxElement(node)
+
+    def select(self, selector: str) -> List["SelectolaxElement"]:
+        return [SelectolaxElement(node) for node in self.node.css(selector)]
+
+    def select_one(self, selector: str) -> Optional["SelectolaxElement"]:
+        node = self.node.css_first(selector)
+        return SelectolaxElement(node) if node is not None else None
+
+    def find(self, name=None, attrs=None, **kwargs) -> Optional["SelectolaxElement"]:
+        return self.select_one(_selector_from_filters(name, attrs, **kwargs))
+
+    def find_all(self, name=None, attrs=None, **kwargs) -> List["SelectolaxElement"]:
+        return self.select(_selector_from_filters(name, attrs, **kwargs))
+
+    def __repr__(self) -> str:
+        return self.node.html or ""
+
+
+class HtmlDocument:
+    """
+    A scraped page, parsed once with the selected backend.
+
+    Plugins receive this object instead of the raw HTML string. The raw markup
+    stays available as `html` for plugins that need it.
+
+    When `scopes` is given, the BeautifulSoup backends only build the elements
+    matching those selectors (and their descendants). selectolax always parses
+    the full page, its C parser is fast enough that scoping would not pay off.
+    """
+
+    def __init__(self, html: str, backend: Optional[str] = None, scopes: Optional[Sequence[str]] = None):
+        self.html = html
+        self.backend = resolve_backend(backend)
+        self.scopes = list(scopes) if scopes and self.backend != "selectolax" else None
+
+        start_time = time.perf_counter()
+        if self.backend == "selectolax":
+            from selectolax.lexbor import LexborHTMLParser
+            self.root = SelectolaxElement(LexborHTMLParser(html).root)
+        elif self.scopes:
+            self.root = BeautifulSoup(html, self.backend, parse_only=ScopeStrainer(self.scopes))
+        else:
+            self.root = BeautifulSoup(html, self.backend)
+        self.parse_time = time.perf_counter() - start_time
+
+    @property
+    def title(self):
+        """Return the <title> element, or None if the page has none."""
+        return self.root.find("title")
+
+    @property
+    def descendants(self):
+        """Iterate over every node below the root in document order (text nodes have no name)."""
+        return self.root.descendants
+
+    def select(self, selector: str) -> list:
+        return self.root.select(selector)
+
+    def select_one(self, selector: str):
+        return self.root.select_one(selector)
+
+    def find(self, name=None, attrs=None, **kwargs):
+        return self.root.find(name, attrs or {}, **kwargs)
+
+    def find_all(self, name=None, attrs=None, **kwargs) -> list:
+        return self.root.find_all(name, attrs or {}, **kwargs)
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        return self.root.get_text(separator=separator, strip=strip)
+
+
+def as_document(source, backend: Optional[str] = None, scopes: Optional[Sequence[str]] = None) -> HtmlDocument:
+    """
+    Return `source` as an HtmlDocument.
+
+    Plugins call this at the start of parse() so they work both when the worker
+    hands them a shared document and when they are called with a raw string,
+    in which case only their own scope is built.
+    """
+    if isinstance(source, HtmlDocument):
+        return source
+    return HtmlDocument(source, backend, scopes)
@@ -11,7 +11,15 @@ async def scrape_with_playwright(
     timeout: int = 30000, 
     output_file: Optional[str] = None,
     user_agents_file: str = "user-agents.txt",
-    simulate_human: bool = True
+    simulate_human: bool = True,
+    conditional_headers: Optional[Dict[str, str]] = None,
+    response_info: Optional[Dict[str, Any]] = None,
+    proxy: Optional[Dict[str, str]] = None,
+    user_data_dir: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    cookies: Optional[List[Dict[str, Any]]] = None,
+    behavior_budget: float = 3.0,
+    raw_capture: bool = False
 ) -> str:
     """
     Scrape a URL using Playwright with multiple engine configurations.
@@ -24,9 +32,19 @@ async def scrape_with_playwright(
         output_file (str): Optional path to save the HTML output
         user_agents_file (str): Path to file containing user agents
         simulate_human (bool): Whether to simulate human behavior
+        behavior_budget (float): Seconds the human behavior may take, it runs while the page is captured
+            and the browser closes once it is done or the budget is used up
+        raw_capture (bool): Return the HTML the server sent as soon as it is in, without rendering the page
+        conditional_headers (dict): Optional If-None-Match / If-Modified-Since headers for the page request
+        response_info (dict): Optional dict that receives the "status" and "headers" of the page response,
+            and after a successful fetch the "cookies" of the session and the "user_agent" it sent
+        proxy (dict): Optional proxy for the browser: "server" and optionally "username" and "password"
+        user_data_dir (str): Optional persistent profile directory, keeps cookies and cache between runs
+        user_agent (str): Optional user agent, instead of a random one of user_agents_file
+        cookies (list): Optional cookies to start the session with, e.g. the clearance of an earlier session
         
     Returns:
-        str: The HTML content of the page
+        str: The HTML content of the page, empty if it failed or was not modified (status 304)
     """
     from playwright.async_api import async_playwright
     
@@ -38,8 +56,9 @@ async def scrape_with_playwright(
     print(f"Scraping {url} with {engine} engine")
     
     # Load user agents
-    user_agents = _load_user_agents(user_agents_file)
-    user_agent = random.choice(user_agents)
+    if not user_agent:
+        user_agents = _load_user_agents(user_agents_file)
+        user_agent = random.choice(user_agents)
     
     html = ""
     
@@ -48,12 +67,15 @@ async def scrape_with_playwright(
     browser = None
     context = None
     page = None
+    behavior = None
     
     try:
         # Configure browser launch options based on engine
         launch_options = {
             "headless": headless,
         }
+        if proxy:
+            launch_options["proxy"] = proxy
         
         # Add stealth-specific options
         if engine in ['playwright-stealth', 'puppeteer-compat']:
@@ -63,9 +85,6 @@ async def scrape_with_playwright(
                 '--disable-site-isolation-trials',
             ]
         
-        # Launch browser
-        browser = await p.chromium.launch(**launch_options)
-        
         # Create browser context with options
         context_options = {
             "viewport": {'width': 1920, 'height': 1080},
@@ -91,7 +110,16 @@ async def scrape_with_playwright(
                 }
             })
         
-        context = await browser.new_context(**context_options)
+        if user_data_dir:
+            # Persistent profile: the browser and its only context are one
+            context = await p.chromium.launch_persistent_context(
+                os.path.abspath(user_data_dir), **launch_options, **context_options)
+        else:
+            browser = await p.chromium.launch(**launch_options)
+            context = await browser.new_context(**context_options)
+        
+        if cookies:
+            await context.add_cookies(cookies)
         
         # Apply stealth script for more advanced protection
         if engine in ['playwright-stealth', 'puppeteer-compat']:
@@ -135,26 +163,63 @@ async def scrape_with_playwright(
         # Create a new page for the actual scraping
         page = await context.new_page()
         
-        # Navigate to the page with timeout
-        response = await page.goto(url, timeout=timeout, wait_until="networkidle")
+        # Send the validators of the cached copy with the page request only, not with its resources.
+        # Routing turns the HTTP cache off, so the route is dropped as soon as the page request went out
+        if conditional_headers:
+            async def add_validators(route):
+                request = route.request
+                if request.is_navigation_request() and request.frame == page.main_frame:
+                    await page.unroute("**/*", add_validators)
+                    await route.continue_(headers={**request.headers, **conditional_headers})
+                else:
+                    await route.continue_()
+            await page.route("**/*", add_validators)
+        
+        # Navigate to the page with timeout, in raw capture only until the response starts
+        response = await page.goto(url, timeout=timeout, wait_until="commit" if raw_capture else "networkidle")
         
         if not response:
             print(f"Failed to load {url}: No response")
             return ""
+        
+        if response_info is not None:
+            response_info["status"] = response.status
+            response_info["headers"] = await response.all_headers()
+        
+        if response.status == 304:
+            print(f"Not modified since the last fetch: {url}")
+            return ""
             
         if response.status >= 400:
             print(f"Failed to load {url}: Status code {response.status}")
             return ""
         
-        # Wait to ensure page is fully loaded
-        await page.wait_for_load_state("networkidle")
-        
-        # Simulate human behavior if enabled
-        if simulate_human and engine != 'playwright':  # Only for advanced modes
-            await _simulate_human_behavior(page)
+        if raw_capture:
+            # The body as the server sent it, then stop loading the scripts, styles and images of the page
+            html = await response.text()
+            try:
+                await page.evaluate("window.stop()")
+            except Exception:
+                pass
+        else:
+            # Wait to ensure page is fully loaded
+            await page.wait_for_load_state("networkidle")
+            
+            # Simulate human behavior if enabled, next to the capture rather than in front of it
+            if simulate_human and engine != 'playwright':  # Only for advanced modes
+                behavior = asyncio.create_task(_simulate_human_behavior(page, behavior_budget))
+                # A budget of 0 is a single scroll without pauses, it is let finish
+                behavior_deadline = asyncio.get_running_loop().time() + behavior_budget if behavior_budget > 0 else None
+            
+            # Important: Get the HTML content
+            html = await page.content()
+            
+            if behavior is not None:
+                await _finish_human_behavior(behavior, behavior_deadline)
         
-        # Important: Get the HTML content
-        html = await page.content()
+        if response_info is not None:
+            response_info["cookies"] = await context.cookies()
+            response_info["user_agent"] = user_agent
         
         # Save to output file if specified
         if output_file:
@@ -168,6 +233,8 @@ async def scrape_with_playwright(
         print(f"Error accessing {url}: {str(e)}")
         return ""
     finally:
+        if behavior is not None:
+            behavior.cancel()
         # Critical: Make sure to close everything in the correct order
         if page:
             await page.close()
@@ -189,7 +256,15 @@ def scrape_with_playwright_sync(
     timeout: int = 30000, 
     output_file: Optional[str] = None,
     user_agents_file: str = "user-agents.txt",
-    simulate_human: bool = True
+    simulate_human: bool = True,
+    conditional_headers: Optional[Dict[str, str]] = None,
+    response_info: Optional[Dict[str, Any]] = None,
+    proxy: Optional[Dict[str, str]] = None,
+    user_data_dir: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    cookies: Optional[List[Dict[str, Any]]] = None,
+    behavior_budget: float = 3.0,
+    raw_capture: bool = False
 ) -> str:
     """
     Synchronous wrapper for scrape_with_playwright.
@@ -207,42 +282,55 @@ def scrape_with_playwright_sync(
             timeout=timeout,
             output_file=output_file,
             user_agents_file=user_agents_file,
-            simulate_human=simulate_human
+            simulate_human=simulate_human,
+            conditional_headers=conditional_headers,
+            response_info=response_info,
+            proxy=proxy,
+            user_data_dir=user_data_dir,
+            user_agent=user_agent,
+            cookies=cookies,
+            behavior_budget=behavior_budget,
+            raw_capture=raw_capture
         ))
         return result
     finally:
         loop.close()
 
-async def _simulate_human_behavior(page) -> None:
-    """Simulate human-like behavior on the page."""
+async def _simulate_human_behavior(page, budget: float = 3.0) -> None:
+    """Simulate human-like behavior on the page, spread over `budget` seconds (0 scrolls once)."""
     try:
-        # Random delay between 1-2 seconds (shorter to avoid timeouts)
-        await asyncio.sleep(random.uniform(0.5, 1))
-        
         # Get viewport and page dimensions
         viewport_height = await page.evaluate("window.innerHeight")
         page_height = await page.evaluate("document.body.scrollHeight")
         
         # Perform fewer scroll actions to reduce chances of errors
-        scroll_positions = [0, viewport_height, page_height // 2, page_height]
+        scroll_positions = [viewport_height, page_height // 2, page_height] if budget > 0 else [viewport_height]
+        pause = budget / (len(scroll_positions) + 1)
         for position in scroll_positions:
+            # Pauses share the budget
+            await asyncio.sleep(random.uniform(0.5, 1.0) * pause)
             # Scroll to position
             await page.evaluate(f"window.scrollTo(0, {position})")
-            # Shorter pause
-            await asyncio.sleep(random.uniform(0.3, 0.7))
         
         # Optionally move mouse once
-        if random.random() > 0.5:
+        if budget > 0 and random.random() > 0.5:
             x = random.randint(100, 800)
             y = random.randint(100, 600)
             await page.mouse.move(x, y)
-        
-        # Final short delay
-        await asyncio.sleep(0.5)
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         print(f"Error during human simulation: {str(e)}")
         # Continue execution even if human simulation fails
 
+async def _finish_human_behavior(behavior: "asyncio.Task", deadline: Optional[float]) -> None:
+    """Let the human behavior finish within what is left of its budget (no limit without deadline), then stop it."""
+    timeout = None if deadline is None else max(deadline - asyncio.get_running_loop().time(), 0)
+    try:
+        await asyncio.wait_for(behavior, timeout)
+    except asyncio.TimeoutError:
+        pass
+
 def _load_user_agents(user_agents_file: str) -> List[str]:
     """Load user agents from file."""
     try:
@@ -0,0 +1,101 @@
+"""
+Loading of parser plugins from the Plugins directory.
+"""
+
+import importlib.util
+import os
+import sys
+from enum import Enum, auto
+
+PLUGINS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Plugins")
+
+
+def _install_templated_plugin_module():
+    """Define the templated_plugin classes in memory for any plugin that needs them"""
+    if "templated_plugin" in sys.modules:
+        return
+
+    try:
+        # Define DataType enum and ScrapedField class directly
+        class DataType(Enum):
+            STRING = auto()
+            INTEGER = auto()
+            FLOAT = auto()
+            BOOLEAN = auto()
+            DATE = auto()
+            DATETIME = auto()
+            URL = auto()
+            IMAGE = auto()
+            ARRAY = auto()
+            OBJECT = auto()
+
+        class ScrapedField:
+            """Represents a single piece of data extracted from HTML."""
+            def __init__(self, name, value, field_type, found=True, description=None, accumulate=False):
+                self.name = name
+                self.value = value
+                self.field_type = field_type
+                self.found = found
+                self.description = description
+                self.accumulate = accumulate
+
+        # Create a fake module to provide these classes to the plugins
+        class FakeModule:
+            pass
+
+        fake_templated_plugin = FakeModule()
+        fake_templated_plugin.DataType = DataType
+        fake_templated_plugin.ScrapedField = ScrapedField
+
+        # Add to sys.modules
+        sys.modules['templated_plugin'] = fake_templated_plugin
+
+        print("> Created templated_plugin module in memory")
+    except Exception as e:
+        print(f"> Error creating templated_plugin module: {str(e)}")
+
+
+def load_plugin(plugin_file, plugins_dir=PLUGINS_DIR):
+    """
+    Load a plugin file and return an instance of the plugin class it defines.
+
+    Args:
+        plugin_file: File name of the plugin inside the plugins directory
+        plugins_dir: Directory containing the plugins
+
+    Returns:
+        Plugin instance, or None if no plugin class could be found
+    """
+    plugin_path = os.path.join(plugins_dir, plugin_file)
+    print(f"> Loading plugin: {plugin_path}")
+
+    # Add Plugins directory to Python path to help with imports
+    if plugins_dir not in sys.path:
+        sys.path.insert(0, plugins_dir)
+
+    _install_templated_plugin_module()
+
+    # Load the module
+    spec = importlib.util.spec_from_file_location("plugin_module", plugin_path)
+    if spec is None:
+        print(f"> Error: Could not find plugin at {plugin_path}")
+        return None
+
+    plugin_module = importlib.util.module_from_spec(spec)
+    sys.modules["plugin_module"] = plugin_module  # Add to sys.modules for imports to work
+    try:
+        spec.loader.exec_module(plugin_module)
+    finally:
+        # Clean up - remove our module to avoid conflicts
+        if "plugin_module" in sys.modules:
+            del sys.modules["plugin_module"]
+
+    # Find the plugin class in the module
+    # We're looking for a class that defines a callable parse method
+    for name, obj in plugin_module.__dict__.items():
+        if isinstance(obj, type) and hasattr(obj, 'parse') and callable(obj.parse):
+            print(f"> Found plugin class: {obj.__name__}")
+            return obj()
+
+    print(f"> Error: Could not find plugin class in {plugin_path}")
+    return None
@@ -0,0 +1,301 @@
+"""
+Runs a set of parser plugins over each scraped page.
+
+The page is parsed once into a shared HtmlDocument and every selected plugin
+extracts its rows from that same document. Each plugin writes to its own CSV
+table, so several views of a page (e.g. listings and page metrics) come out of
+a single fetch.
+
+Pages queued as follow-ups of another page (see follow_up) only get the
+plugins they were tagged with, which are loaded on first use.
+"""
+
+import csv
+import hashlib
+import os
+import time
+import traceback
+from itertools import repeat
+
+from html_document import HtmlDocument, DEFAULT_PARSER, combine_scopes
+from plugin_loader import load_plugin
+from record_batch import RecordBatch, Schema, iter_record_batches
+
+
+class PluginTarget:
+    """A loaded plugin together with the CSV table its rows are written to."""
+
+    def __init__(self, plugin_file, plugin, csv_path):
+        self.plugin_file = plugin_file
+        self.name = os.path.splitext(plugin_file)[0]
+        self.plugin = plugin
+        self.csv_path = csv_path
+        declared_fields = self._declared_fields()
+        # Use the fields the plugin declares so every page shares the same header
+        self.fieldnames = ['url'] + [field.name for field in declared_fields] if declared_fields else None
+        self.descriptions = {field.name: getattr(field, 'description', None) for field in declared_fields}
+        self.field_types = {field.name: getattr(field, 'field_type', None) for field in declared_fields}
+
+    def _declared_fields(self):
+        """Return the fields the plugin says it can extract, or an empty list"""
+        try:
+            return self.plugin.get_available_fields() or []
+        except Exception:
+            return []
+
+
+class PluginRunner:
+    """Loads the selected plugins once and applies all of them to each page."""
+
+    def __init__(self, plugin_files, parser_backend=DEFAULT_PARSER, output_file=None, output_dir="scraped_data",
+                 summary_callback=None, result_cache=None, follow_up_callback=None, recrawl_scheduler=None,
+                 follow_up_check=None):
+        """
+        Args:
+            plugin_files: File names of the plugins to run, inside the Plugins directory
+            parser_backend: Parser backend used to build the shared document
+            output_file: Optional custom CSV path, suffixed with the plugin name when several plugins run
+            output_dir: Directory for the default timestamped CSV files
+            summary_callback: Optional function called with the ColumnSummary list of every written batch
+            result_cache: Optional ResponseCache keeping the rows of each page, to reuse them when it is not modified
+            follow_up_callback: Optional function called with the page URL and the FollowUpUrl list a plugin returned
+            recrawl_scheduler: Optional RecrawlScheduler recording a fingerprint of the rows of each page
+            follow_up_check: Optional function telling from the page URL whether its follow-ups would be queued,
+                the plugins are not asked for them when it returns False
+        """
+        self.parser_backend = parser_backend
+        self.summary_callback = summary_callback
+        self.result_cache = result_cache
+        self.follow_up_callback = follow_up_callback
+        self.follow_up_check = follow_up_check
+        self.recrawl_scheduler = recrawl_scheduler
+        self.output_file = output_file
+        self.output_dir = output_dir
+        self.timestamp = int(time.time())
+        self.several_plugins = len(plugin_files) > 1
+        self.targets = []
+        self.targets_by_file = {}
+        self._plans = {}  # Targets and parse scopes per set of plugin files
+
+        for plugin_file in plugin_files:
+            target = self._load_target(plugin_file)
+            if target is not None:
+                self.targets.append(target)
+
+        # Build only the parts of each page the document plugins declared they need
+        self.document_plugins, self.parse_scopes = self._plan(None)[1:]
+        if self.parse_scopes:
+            print(f"> Parsing limited to: {', '.join(self.parse_scopes)}")
+
+    def _load_target(self, plugin_file):
+        """Load a plugin and set up its CSV table, or return None if it cannot be loaded"""
+        if plugin_file in self.targets_by_file:
+            return self.targets_by_file[plugin_file]
+        plugin = load_plugin(plugin_file)
+        target = None
+        if plugin is not None:
+            csv_path = self._csv_path_for(plugin_file, self.timestamp, self.output_file, self.output_dir,
+                                          self.several_plugins or bool(self.targets_by_file))
+            target = PluginTarget(plugin_file, plugin, csv_path)
+            print(f"> CSV output for {plugin_file} will be saved to: {csv_path}")
+        self.targets_by_file[plugin_file] = target
+        return target
+
+    def _plan(self, plugin_files):
+        """
+        Return the targets, document plugins and parse scopes for a set of plugin files.
+
+        None stands for the plugins selected for the run.
+        """
+        key = tuple(plugin_files) if plugin_files else None
+        if key not in self._plans:
+            if key is None:
+                targets = self.targets
+            else:
+                targets = [target for target in map(self._load_target, key) if target is not None]
+            document_plugins = [target.plugin for target in targets
+                                if getattr(target.plugin, 'ACCEPTS_DOCUMENT', False)]
+            self._plans[key] = (targets, document_plugins, combine_scopes(document_plugins))
+        return self._plans[key]
+
+    def plugin_names(self, plugin_files=None):
+        """Return the names of the plugins applied to pages tagged with `plugin_files` (None for the selected ones)"""
+        return [target.name for target in self._plan(plugin_files)[0]]
+
+    @staticmethod
+    def _csv_path_for(plugin_file, timestamp, output_file, output_dir, several_plugins):
+        """Return the CSV path for one plugin, creating its directory if needed"""
+        plugin_name = os.path.splitext(plugin_file)[0]
+
+        csv_path = None
+        if output_file and output_file.strip():
+            csv_path = output_file.strip()
+            if several_plugins:
+                base, extension = os.path.splitext(csv_path)
+                csv_path = f"{base}_{plugin_name}{extension or '.csv'}"
+            try:
+                # Ensure the directory exists
+                custom_dir = os.path.dirname(csv_path)
+                if custom_dir and not os.path.exists(custom_dir):
+                    os.makedirs(custom_dir)
+                    print(f"> Created directory: {custom_dir}")
+            except Exception as e:
+                print(f"> Error setting up custom output file: {str(e)}")
+                print("> Falling back to default output file")
+                csv_path = None
+
+        if csv_path is None:
+            # Create output directory if it doesn't exist
+            if not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+            csv_path = os.path.join(output_dir, f"{timestamp}_{plugin_name}.csv")
+
+        return csv_path
+
+    def emits_follow_ups(self, plugin_files=None):
+        """True if one of the plugins applied to pages tagged with `plugin_files` can return follow-up URLs"""
+        return any(hasattr(target.plugin, 'get_follow_up_urls') for target in self._plan(plugin_files)[0])
+
+    def process(self, html, url, plugin_files=None):
+        """
+        Parse the page once and run every plugin on it.
+
+        Args:
+            html: Page content
+            url: Page URL, written in the first column of every row
+            plugin_files: Plugins to apply, for a follow-up page; None for the plugins selected for the run
+
+        Returns:
+            Dictionary mapping plugin name to the number of rows it wrote
+        """
+        targets, _, parse_scopes = self._plan(plugin_files)
+        if not targets:
+            return {}
+
+        # Built when the first plugin that can use it comes up, shared by the others
+        document = None
+
+        # Digest of the rows that matter, to tell the scheduler whether the page changed
+        fingerprint = hashlib.blake2b(digest_size=16) if self.recrawl_scheduler is not None else None
+        complete = True
+
+        wants_follow_ups = self.follow_up_callback is not None and (
+            self.follow_up_check is None or self.follow_up_check(url))
+
+        results = {}
+        for target in targets:
+            try:
+                # Plugins that accept a document get the shared parsed tree, older plugins get the raw HTML
+                if getattr(target.plugin, 'ACCEPTS_DOCUMENT', False):
+                    if document is None:
+                        document = HtmlDocument(html, self.parser_backend, parse_scopes)
+                        print(f"> Parsed HTML with {document.backend} in {document.parse_time * 1000:.1f} ms")
+                    page = document
+                else:
+                    page = html
+                parsed_results = target.plugin.parse(page)
+
+                # Streaming plugins are written part by part while they parse, others in one piece
+                if fingerprint is not None:
+                    fingerprint.update(target.name.encode('utf-8'))
+                cache_writer = None
+                if self.result_cache is not None:
+                    cache_writer = self.result_cache.results_writer(url, target.name)
+                try:
+                    results[target.name] = self._write_batches(target, iter_record_batches(parsed_results), url,
+                                                               cache_writer, fingerprint)
+                    if cache_writer is not None:
+                        cache_writer.commit(target.fieldnames[1:] if target.fieldnames is not None else None)
+                finally:
+                    if cache_writer is not None:
+                        cache_writer.close()
+
+                # Links to scrape next, queued by the worker
+                if wants_follow_ups and hasattr(target.plugin, 'get_follow_up_urls'):
+                    follow_ups = target.plugin.get_follow_up_urls(page, url)
+                    if follow_ups:
+                        self.follow_up_callback(url, list(follow_ups))
+            except Exception as e:
+                # One failing plugin must not prevent the others from writing their rows
+                print(f"> Error applying plugin {target.plugin_file}: {str(e)}")
+                traceback.print_exc()  # Print full traceback for debugging
+                complete = False
+
+        if fingerprint is not None:
+            # Rows of a partly failed page are not compared, they would look like a change
+            self.recrawl_scheduler.record(url, fingerprint.hexdigest() if complete else None)
+        return results
+
+    def process_cached(self, url, plugin_files=None):
+        """
+        Write the rows cached for a page that was not modified since it was last fetched.
+
+        No follow-up URLs are emitted, see emits_follow_ups().
+
+        Returns:
+            Dictionary mapping plugin name to the number of rows it wrote
+        """
+        results = {}
+        for target in self._plan(plugin_files)[0]:
+            cached = self.result_cache.cached_batches(url, target.name)
+            if cached is None:
+                print(f"> No cached rows for {target.name}")
+                continue
+            fieldnames, batches = cached
+            schema = Schema([(name, target.field_types.get(name)) for name in fieldnames])
+            results[target.name] = self._write_batches(
+                target, (RecordBatch.from_rows(schema, rows) for rows in batches), url)
+        return results
+
+    def _write_batches(self, target, batches, url, cache_writer=None, fingerprint=None):
+        """
+        Append the records of one page to the plugin's CSV table.
+
+        Each batch is written and flushed as soon as it arrives, so the rows of a
+        streaming plugin are on disk before the plugin finishes the page.
+        The written rows (without the url) are also added to the `cache_writer` batch by batch if given,
+        and their CHANGE_FIELDS (all fields by default) to the `fingerprint` hash.
+
+        Returns:
+            Number of rows written
+        """
+        rows_written = 0
+        csv_file = None
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+
+                # Fall back to the batch's columns if the plugin declares no fields
+                if target.fieldnames is None:
+                    target.fieldnames = ['url'] + batch.schema.names
+
+                if csv_file is None:
+                    csv_file = open(target.csv_path, mode='a', newline='', encoding='utf-8')
+                    writer = csv.writer(csv_file)
+                    # Write header only if the file is empty
+                    if csv_file.tell() == 0:
+                        writer.writerow(target.fieldnames)
+
+                # Columns the plugin did not return stay empty, like cells of fields that were not found
+                columns = batch.select(target.fieldnames[1:])
+                writer.writerows(zip(repeat(url), *columns))
+                if cache_writer is not None:
+                    cache_writer.add(zip(*columns))
+                if fingerprint is not None:
+                    change_fields = getattr(target.plugin, 'CHANGE_FIELDS', None) or target.fieldnames[1:]
+                    fingerprint.update(repr(list(zip(*batch.select(change_fields)))).encode('utf-8'))
+                csv_file.flush()
+                rows_written += len(batch)
+
+                if self.summary_callback is not None:
+                    self.summary_callback(batch.summary(target.descriptions))
+        finally:
+            if csv_file is not None:
+                csv_file.close()
+
+        if rows_written:
+            print(f"> {rows_written} rows saved to: {target.csv_path}")
+        else:
+            print(f"> No data to write for {target.name}.")
+        return rows_written
@@ -0,0 +1,227 @@
+"""
+Compact column-oriented results for parser plugins.
+
+Returning one ScrapedField object per cell repeats the field name, type,
+description and found flag for every row of a page. A RecordBatch keeps the
+field names and types once in a Schema and the values in one plain list per
+column, with their native types (None for cells that were not found).
+
+Plugins may return a RecordBatch from parse(). Plugins that still return
+ScrapedField lists are converted with RecordBatch.from_fields(), so the
+writers only ever deal with batches.
+
+parse() may also be a generator that yields batches or single rows while it
+works through the page. The writer then persists each part before the next
+one is extracted, so the results of a page never have to be held in memory
+all at once.
+"""
+
+from collections import namedtuple
+from collections.abc import Iterator as IteratorABC
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Rows yielded one at a time by a streaming plugin are written in groups of this size
+STREAM_ROWS_PER_BATCH = 500
+
+# One column of a batch condensed to a single value for display
+ColumnSummary = namedtuple("ColumnSummary", ["name", "value", "field_type", "summed", "description"])
+
+
+class Schema:
+    """Ordered field names and types of a plugin's records, defined once per plugin."""
+
+    __slots__ = ("names", "types", "_positions")
+
+    def __init__(self, fields: Sequence[Tuple[str, Any]]):
+        """
+        Args:
+            fields: (name, field type) pairs in column order, the type being a DataType member
+        """
+        self.names = [name for name, _ in fields]
+        self.types = [field_type for _, field_type in fields]
+        self._positions = {name: position for position, name in enumerate(self.names)}
+
+    @classmethod
+    def from_fields(cls, fields) -> "Schema":
+        """Build a schema from ScrapedField templates, e.g. the result of get_available_fields()"""
+        return cls([(field.name, field.field_type) for field in fields])
+
+    def index(self, name: str) -> int:
+        return self._positions[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        return iter(zip(self.names, self.types))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Schema) and self.names == other.names and self.types == other.types
+
+    def __repr__(self) -> str:
+        return f"Schema({self.names!r})"
+
+
+class RecordBatch:
+    """The records extracted from one page, stored as one list per schema column."""
+
+    __slots__ = ("schema", "columns")
+
+    def __init__(self, schema: Schema, columns: Optional[List[list]] = None):
+        """
+        Args:
+            schema: Names and types of the columns
+            columns: One list of values per schema column, all of the same length
+        """
+        self.schema = schema
+        self.columns = columns if columns is not None else [[] for _ in schema.names]
+        if len(self.columns) != len(schema):
+            raise ValueError(f"Expected {len(schema)} columns, got {len(self.columns)}")
+
+    @classmethod
+    def from_rows(cls, schema: Schema, rows: Iterable[Sequence[Any]]) -> "RecordBatch":
+        """Build a batch from value tuples in schema order"""
+        rows = list(rows)
+        if not rows:
+            return cls(schema)
+        return cls(schema, [list(column) for column in zip(*rows)])
+
+    @classmethod
+    def from_fields(cls, parsed_results) -> "RecordBatch":
+        """
+        Convert the result of a plugin that returns ScrapedField objects.
+
+        Accepts a single row (a list of fields) or a list of rows. Fields that
+        were not found become None, and rows that lack a field get None in
+        that column.
+        """
+        if not parsed_results:
+            return cls(Schema([]))
+        if hasattr(parsed_results[0], 'name'):
+            parsed_results = [parsed_results]
+
+        fields = []
+        seen = set()
+        for row_fields in parsed_results:
+            for field in row_fields:
+                if field.name and field.name not in seen:
+                    seen.add(field.name)
+                    fields.append((field.name, field.field_type))
+
+        schema = Schema(fields)
+        batch = cls(schema)
+        for row_fields in parsed_results:
+            values = [None] * len(schema)
+            for field in row_fields:
+                if field.found and field.name:
+                    values[schema.index(field.name)] = field.value
+            batch.append(values)
+        return batch
+
+    def append(self, values: Sequence[Any]):
+        """Add one record, values in schema order"""
+        for column, value in zip(self.columns, values):
+            column.append(value)
+
+    def column(self, name: str) -> list:
+        return self.columns[self.schema.index(name)]
+
+    def rows(self) -> Iterator[tuple]:
+        """Iterate over the records as value tuples in schema order"""
+        return zip(*self.columns)
+
+    def select(self, names: Sequence[str]) -> List[list]:
+        """Return the columns for `names` in that order, missing columns as all None"""
+        missing = [None] * len(self)
+        return [self.column(name) if name in self.schema else missing for name in names]
+
+    def to_fields(self, field_class) -> list:
+        """Expand into ScrapedField rows for code that still expects them"""
+        return [
+            [field_class(name, value, field_type, found=value is not None)
+             for name, field_type, value in zip(self.schema.names, self.schema.types, row)]
+            for row in self.rows()
+        ]
+
+    def summary(self, descriptions: Optional[Dict[str, str]] = None) -> List[ColumnSummary]:
+        """
+        Condense each column to one value: numeric columns are summed, the others
+        give their last found value. Columns without any value are left out.
+
+        Args:
+            descriptions: Optional field name to description mapping
+        """
+        descriptions = descriptions or {}
+        summaries = []
+        for name, field_type, column in zip(self.schema.names, self.schema.types, self.columns):
+            type_name = getattr(field_type, 'name', str(field_type))
+            numbers = None
+            if type_name in ('INTEGER', 'FLOAT'):
+                numbers = [value for value in column
+                           if isinstance(value, (int, float)) and not isinstance(value, bool)]
+            if numbers:
+                summaries.append(ColumnSummary(name, sum(numbers), field_type, True, descriptions.get(name)))
+                continue
+            last_value = next((value for value in reversed(column) if value is not None), None)
+            if last_value is not None:
+                summaries.append(ColumnSummary(name, last_value, field_type, False, descriptions.get(name)))
+        return summaries
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __repr__(self) -> str:
+        return f"RecordBatch({self.schema.names!r}, {len(self)} rows)"
+
+
+def as_record_batch(parsed_results) -> RecordBatch:
+    """Return a plugin result as a RecordBatch, converting ScrapedField lists"""
+    if isinstance(parsed_results, RecordBatch):
+        return parsed_results
+    return RecordBatch.from_fields(parsed_results)
+
+
+def _is_field_row(item) -> bool:
+    """True for one row of ScrapedField objects, False for a list of rows"""
+    return isinstance(item, (list, tuple)) and bool(item) and hasattr(item[0], 'name')
+
+
+def iter_record_batches(parsed_results, rows_per_batch: int = STREAM_ROWS_PER_BATCH) -> Iterator[RecordBatch]:
+    """
+    Yield the result of a plugin's parse() as RecordBatches.
+
+    Handles all result shapes: a RecordBatch, a ScrapedField row or list of
+    rows, or a generator yielding any of these. Single rows from a generator
+    are grouped into batches of `rows_per_batch` rows.
+    """
+    if parsed_results is None:
+        return
+    if not isinstance(parsed_results, IteratorABC):
+        # A plain list or batch, returned in one piece
+        if parsed_results:
+            yield as_record_batch(parsed_results)
+        return
+
+    pending_rows = []
+    for item in parsed_results:
+        if _is_field_row(item):
+            pending_rows.append(item)
+            if len(pending_rows) >= rows_per_batch:
+                yield RecordBatch.from_fields(pending_rows)
+                pending_rows = []
+            continue
+
+        if pending_rows:
+            yield RecordBatch.from_fields(pending_rows)
+            pending_rows = []
+        if item:
+            yield as_record_batch(item)
+
+    if pending_rows:
+        yield RecordBatch.from_fields(pending_rows)
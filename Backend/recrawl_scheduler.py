@@ -0,0 +1,129 @@
+"""
+Recrawl priorities from per-URL fetch history.
+
+Refreshing a list of pages in input order spends as many requests on pages
+that never change as on pages whose prices move every day. The scheduler keeps
+a small history per URL in a SQLite file: when it was first and last fetched,
+how many times it was fetched, and how many of those fetches found different
+content than the previous one. Content is compared through a fingerprint of
+the rows the plugins extracted, restricted to the CHANGE_FIELDS a plugin
+declares (e.g. only the prices of a card page), so counters and other noise do
+not count as changes.
+
+Each URL gets an estimated change rate (changes per day, smoothed for pages
+with little history), and the priority of a page is the probability that it
+changed since its last fetch:
+
+    priority = 1 - exp(-change_rate * days_since_last_fetch)
+
+Pages never fetched come first. Stale pages that change often come next, and
+volatile pages climb back up the queue sooner after each fetch than stable ones,
+so a fixed daily request budget is spent where the content moves. With a
+"Recrawl Budget", a run only scrapes that many URLs of the top of the order,
+the others wait for a later run.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from url_dedup import canonicalize_url
+
+_DAY_SECONDS = 86400
+
+# URLs scraped per run at most, by "Recrawl Budget" option, the highest priority first
+RECRAWL_BUDGETS = {
+    "100": 100,
+    "1000": 1000,
+    "10000": 10000,
+}
+
+
+class RecrawlScheduler:
+    """Per-URL fetch and change history, and the recrawl order derived from it."""
+
+    # Smoothing for pages with little history: as if every page had changed once
+    # in its first week, until its own history says otherwise
+    PRIOR_CHANGES = 1.0
+    PRIOR_DAYS = 7.0
+
+    def __init__(self, path: str = "recrawl_history.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        # Several processes may record fetches at the same time, wait for the lock
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                "key TEXT PRIMARY KEY, url TEXT, first_fetched REAL, last_fetched REAL, "
+                "fetches INTEGER, changes INTEGER, fingerprint TEXT)"
+            )
+
+    def record(self, url: str, fingerprint: Optional[str]):
+        """
+        Record a successful fetch of a page.
+
+        Args:
+            url: The page
+            fingerprint: Digest of the content that matters, None if unknown (counts as unchanged)
+        """
+        key = canonicalize_url(url)
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT fingerprint FROM history WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._connection.execute(
+                    "INSERT INTO history VALUES (?, ?, ?, ?, 1, 0, ?)", (key, url, now, now, fingerprint)
+                )
+                return
+            previous = row[0]
+            changed = int(fingerprint is not None and previous is not None and fingerprint != previous)
+            self._connection.execute(
+                "UPDATE history SET last_fetched = ?, fetches = fetches + 1, changes = changes + ?, "
+                "fingerprint = COALESCE(?, fingerprint) WHERE key = ?",
+                (now, changed, fingerprint, key),
+            )
+
+    def record_unchanged(self, url: str):
+        """Record a fetch that found the page not modified, e.g. an HTTP 304"""
+        self.record(url, None)
+
+    def _history(self) -> Dict[str, Tuple[float, float, int]]:
+        """Return first fetch time, last fetch time and change count per canonical URL"""
+        with self._lock:
+            return {key: (first_fetched, last_fetched, changes) for key, first_fetched, last_fetched, changes
+                    in self._connection.execute("SELECT key, first_fetched, last_fetched, changes FROM history")}
+
+    def change_rate(self, first_fetched: float, last_fetched: float, changes: int) -> float:
+        """Estimated changes per day of a page, from its history"""
+        observed_days = (last_fetched - first_fetched) / _DAY_SECONDS
+        return (changes + self.PRIOR_CHANGES) / (observed_days + self.PRIOR_DAYS)
+
+    def priority(self, history: Optional[Tuple[float, float, int]], now: float) -> float:
+        """Probability that a page changed since its last fetch, 1.0 for a page never fetched"""
+        if history is None:
+            return 1.0
+        first_fetched, last_fetched, changes = history
+        days_since_fetch = max(now - last_fetched, 0) / _DAY_SECONDS
+        return 1.0 - math.exp(-self.change_rate(first_fetched, last_fetched, changes) * days_since_fetch)
+
+    def order(self, urls: Iterable[str]) -> List[str]:
+        """
+        Return the URLs sorted by priority, highest first.
+
+        URLs with the same priority keep their input order.
+        """
+        history = self._history()
+        now = time.time()
+        urls = list(urls)
+        priorities = [self.priority(history.get(canonicalize_url(url)), now) for url in urls]
+        order = sorted(range(len(urls)), key=lambda position: -priorities[position])
+        return [urls[position] for position in order]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
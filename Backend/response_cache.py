@@ -0,0 +1,181 @@
+"""
+Response metadata cache for conditional re-fetching.
+
+For every page fetched successfully with an engine that sees the HTTP
+headers, the cache keeps the validators the server sent (ETag and
+Last-Modified) together with the rows each plugin extracted from the page.
+
+On the next run the page is requested with If-None-Match / If-Modified-Since.
+When the server answers 304 Not Modified, the page is neither downloaded nor
+parsed: the cached rows are written again instead. Pages that rarely change,
+like product pages refreshed every night, then cost a single small request.
+
+Follow-up URLs that carry a version of their content (see follow_up) are not
+requested at all while their version matches the one stored with their rows.
+
+The cache is a SQLite file keyed by the canonical URL (see url_dedup), safe to
+use from the worker thread.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from url_dedup import canonicalize_url
+
+
+class ResponseCache:
+    """Validators and extracted rows of previously fetched pages."""
+
+    def __init__(self, path: str = "response_cache.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        # Shard processes share the file, wait for their writes instead of failing
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, url TEXT, etag TEXT, last_modified TEXT, fetched_at REAL)"
+            )
+            # The rows of a page are kept in the batches they were written in, see ResultsWriter
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS result_pages ("
+                "key TEXT, plugin TEXT, fieldnames TEXT, PRIMARY KEY (key, plugin))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS result_batches ("
+                "key TEXT, plugin TEXT, batch INTEGER, rows TEXT, PRIMARY KEY (key, plugin, batch))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS versions (key TEXT PRIMARY KEY, version TEXT)"
+            )
+
+    def has_results(self, url: str, plugins: Sequence[str]) -> bool:
+        """True if the rows of every given plugin are cached for the page"""
+        with self._lock:
+            cached_plugins = {plugin for (plugin,) in self._connection.execute(
+                "SELECT plugin FROM result_pages WHERE key = ?", (canonicalize_url(url),))}
+        return set(plugins) <= cached_plugins
+
+    def request_headers(self, url: str, plugins: Sequence[str]) -> Dict[str, str]:
+        """
+        Return the conditional request headers for a URL.
+
+        Validators are only sent when the rows of every plugin of the run are
+        cached, otherwise a 304 would leave a plugin without results.
+        """
+        key = canonicalize_url(url)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or not self.has_results(url, plugins):
+            return {}
+
+        etag, last_modified = row
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def store_response(self, url: str, headers: Dict[str, str]):
+        """Remember the validators of a successful response, or forget them if it has none"""
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        key = canonicalize_url(url)
+        with self._lock, self._connection:
+            if etag or last_modified:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (key, url, etag, last_modified, time.time()),
+                )
+            else:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def results_writer(self, url: str, plugin: str) -> "ResultsWriter":
+        """Return a writer replacing the cached rows one plugin extracts from a page, batch by batch"""
+        return ResultsWriter(self.path, canonicalize_url(url), plugin)
+
+    def store_version(self, url: str, version: str):
+        """Remember the content version of a page whose rows were just cached"""
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO versions VALUES (?, ?)", (canonicalize_url(url), version))
+
+    def is_unchanged(self, url: str, version: str, plugins: Sequence[str]) -> bool:
+        """True if the page was scraped at this version and the rows of every plugin are cached"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version FROM versions WHERE key = ?", (canonicalize_url(url),)
+            ).fetchone()
+        return row is not None and row[0] == version and self.has_results(url, plugins)
+
+    def cached_batches(self, url: str, plugin: str) -> Optional[Tuple[List[str], Iterator[List[list]]]]:
+        """Return the field names and the batches of rows cached for a page and plugin, or None"""
+        key = canonicalize_url(url)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT fieldnames FROM result_pages WHERE key = ? AND plugin = ?", (key, plugin)
+            ).fetchone()
+            batches = self._connection.execute(
+                "SELECT rows FROM result_batches WHERE key = ? AND plugin = ? ORDER BY batch", (key, plugin)
+            ).fetchall()
+        if row is None:
+            return None
+        return json.loads(row[0]), (json.loads(rows) for (rows,) in batches)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class ResultsWriter:
+    """
+    Replaces the cached rows of one plugin for a page while its batches are written.
+
+    The batches go to the cache as they arrive, in one transaction of the
+    writer's own connection: they replace the previous rows on commit(), and
+    the previous rows are kept if the plugin fails before.
+    """
+
+    def __init__(self, path: str, key: str, plugin: str):
+        self.key = key
+        self.plugin = plugin
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._batches = 0
+
+    def _clear(self):
+        # Starts the transaction, the other processes see the new rows only once they are complete
+        self._connection.execute("DELETE FROM result_batches WHERE key = ? AND plugin = ?", (self.key, self.plugin))
+
+    def add(self, rows: Iterable[tuple]):
+        """Cache one batch of rows (without the url)"""
+        if self._batches == 0:
+            self._clear()
+        self._connection.execute(
+            "INSERT INTO result_batches VALUES (?, ?, ?, ?)",
+            (self.key, self.plugin, self._batches, json.dumps(list(rows), default=str)),
+        )
+        self._batches += 1
+
+    def commit(self, fieldnames: Optional[Sequence[str]]):
+        """Keep the batches added for the page, nothing is cached if the field names are unknown"""
+        if fieldnames is None:
+            self._connection.rollback()
+            return
+        if self._batches == 0:
+            self._clear()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO result_pages VALUES (?, ?, ?)",
+            (self.key, self.plugin, json.dumps(list(fieldnames))),
+        )
+        self._connection.commit()
+
+    def close(self):
+        """Close the connection, dropping the batches of a page that was not committed"""
+        self._connection.rollback()
+        self._connection.close()
@@ -0,0 +1,826 @@
+"""
+The scraping pipeline of a run, independent of the GUI.
+
+ScrapePipeline takes the URLs from a UrlQueue, fetches each page with the
+engine selected in the options, checks it for blocks, applies the plugins and
+saves the HTML. It only talks to the outside through callbacks, so the GUI's
+worker thread, the shard processes of a sharded run and headless workers all
+run the same code.
+"""
+
+import time
+from urllib.parse import urlsplit
+
+from browser_profiles import ProfilePool
+from cookie_jar import CookieJar
+from html_document import DEFAULT_PARSER
+from plugin_runner import PluginRunner
+from proxy_pool import PROXIES_FILE, ProxyPool
+from recrawl_scheduler import RECRAWL_BUDGETS, RecrawlScheduler
+from response_cache import ResponseCache
+from url_dedup import FRESHNESS_WINDOWS, UrlDeduplicator, UrlHistory
+from url_queue import UrlQueue
+
+
+# Seconds of human behavior per page by intensity, while a site does not trust the session yet
+BEHAVIOR_BUDGETS = {"low": 1.0, "medium": 2.0, "high": 4.0}
+# Pages in a row a site let through before the session counts as trusted and behavior shrinks to one scroll
+TRUSTED_AFTER_PAGES = 3
+
+
+class ScrapePipeline:
+    """
+    Fetches the URLs of a run with the selected engine and processes every page.
+
+    Reports progress through plain callbacks, so the same pipeline runs in the
+    GUI's worker thread, in shard processes and in headless workers.
+    """
+    
+    def __init__(self, options, urls, timeout_value, output_file=None, plugin_files=None,
+                 status_callback=None, suspend_callback=None, results_callback=None,
+                 output_dir="scraped_data", html_dir="scraped_html"):
+        """
+        Args:
+            options: Selected option per GUI option row
+            urls: UrlQueue or iterable of the URLs to scrape
+            timeout_value: Seconds to pause after an error or a block
+            output_file: Optional custom CSV path for the plugin results
+            plugin_files: Plugins applied to every page, empty to only download HTML
+            status_callback: Called with (status, url) for every URL: 0=success, 1=warning, 2=error
+            suspend_callback: Called with (seconds, reason) when the run pauses; without it the run resumes by itself
+            results_callback: Called with the ColumnSummary list of every written batch
+            output_dir: Directory for the default timestamped CSV files
+            html_dir: Directory the HTML of every page is saved to
+        """
+        self.options = options
+        # The worker takes its URLs from the queue, the GUI shows the remaining ones
+        self.url_queue = urls if isinstance(urls, UrlQueue) else UrlQueue(urls)
+        self.stop_execution = False    # Flag to stop execution completely
+        self.is_suspended = False      # Flag to suspend execution temporarily
+        self.resume_at = None          # Time to resume by itself, when no suspend callback resumes the run
+        self.status_callback = status_callback
+        self.suspend_callback = suspend_callback
+        self.results_callback = results_callback
+        self.output_dir = output_dir
+        self.html_dir = html_dir
+        self.timeout_seconds = timeout_value  # Timeout value in seconds
+        self.custom_output_file = output_file
+        self.parser_backend = options.get("HTML Parser") or DEFAULT_PARSER  # Parser used for the plugin document
+        self.plugin_files = plugin_files or []  # Plugins applied to every page, empty to only download HTML
+        self.plugin_runner = None
+        self.url_history = None  # Fetches of previous runs, only kept when "Skip Fetched" is enabled
+        self.history_part_offset = 0  # First history file part this pipeline writes, unique per shard process
+        self.deduplicator = UrlDeduplicator()
+        self.response_cache = None  # Validators and rows of fetched pages, only kept when "Revalidate" is enabled
+        # Follow-up URLs returned by plugins are queued up to this many links away from the input URLs
+        self.max_crawl_depth = int(options.get("Crawl Depth") or 0)
+        self.crawl_tags = {}  # Follow-up URL -> (plugin files to apply, depth, content version)
+        self.recrawl_scheduler = None  # Fetch and change history, only kept when "Recrawl Order" is priority
+        self.reorder_urls = True  # Off in shard processes, the launcher orders the URLs before splitting them
+        self.proxy_pool = None  # Proxies of proxies.txt, only used when "Proxies" is enabled
+        self.profile_pool = None  # Persistent browser profiles, only used when "Profiles" is enabled
+        self.cookie_jar = None  # Cookies shared by every engine and process, only kept when "Cookie Jar" is enabled
+        self.session_trust = {}  # Site -> pages in a row it let through the current session, for the behavior budget
+        self._known_sessions = {}  # Trust of the sessions that carry over to the next browser, see new_browser_session
+        # Take the HTML the server sent as soon as it is in, instead of the rendered page
+        self.raw_capture = options.get("Capture") == "raw"
+        
+    def run(self):
+        """Scrape every URL of the queue, returns when the queue is exhausted or the run is stopped"""
+        try:
+            # Fetch every canonical URL once, and skip the recently fetched ones if asked to
+            freshness_window = FRESHNESS_WINDOWS.get(self.options.get("Skip Fetched"))
+            if freshness_window:
+                self.url_history = UrlHistory(window_seconds=freshness_window, part_offset=self.history_part_offset)
+                self.deduplicator.history = self.url_history
+            self.url_queue.url_filter = self.deduplicator.accept
+            
+            # Spend the requests on the pages most likely to have changed first
+            if self.options.get("Recrawl Order") == "priority":
+                self.recrawl_scheduler = RecrawlScheduler()
+                if self.reorder_urls:
+                    self.url_queue.reorder(self.recrawl_scheduler.order)
+                    print(f"> Ordered {self.url_queue.remaining_count()} URLs by recrawl priority")
+                    budget = RECRAWL_BUDGETS.get(self.options.get("Recrawl Budget"))
+                    if budget is not None:
+                        self.url_queue.take_limit = budget
+                        print(f"> Scraping the first {budget} of them, the others wait for the next run")
+            
+            # Load the selected plugins once for the whole run
+            if self.plugin_files:
+                # Unchanged pages are only worth revalidating when their rows can be reused
+                if self.options.get("Revalidate") == "true":
+                    self.response_cache = ResponseCache()
+                self.plugin_runner = PluginRunner(self.plugin_files, self.parser_backend, self.custom_output_file,
+                                                  output_dir=self.output_dir,
+                                                  summary_callback=self.results_callback,
+                                                  result_cache=self.response_cache,
+                                                  follow_up_callback=self.queue_follow_ups,
+                                                  follow_up_check=self.below_crawl_depth,
+                                                  recrawl_scheduler=self.recrawl_scheduler)
+            
+            # Spread the requests over the proxies of the proxy file
+            if self.options.get("Proxies") == "true":
+                try:
+                    self.proxy_pool = ProxyPool.from_file(PROXIES_FILE) or None
+                except (OSError, ValueError) as e:
+                    print(f"> Could not read {PROXIES_FILE}, scraping without proxies: {str(e)}")
+                if self.proxy_pool is not None:
+                    print(f"> Spreading requests over {len(self.proxy_pool)} proxies")
+            
+            # Keep cookies, clearance and cache in browser profiles reused across runs
+            if self.options.get("Profiles") == "true":
+                self.profile_pool = ProfilePool()
+            
+            # Reuse the cookies of solved challenges in every new browser session
+            if self.options.get("Cookie Jar") == "true":
+                self.cookie_jar = CookieJar()
+            
+            # Process headless selection
+            headless = self.options["Headless"] == "true"
+            
+            # Check which mode to use - Playwright, Ulixee Hero or Selenium
+            playwright_mode = self.options.get("Playwright")
+            
+            if playwright_mode in ["standard", "puppeteer +stealth"]:
+                # Map the UI selection to the engine parameter
+                engine = "playwright" if playwright_mode == "standard" else "playwright-stealth"
+                print(f"\n> Using Playwright ({playwright_mode})")
+                self.process_urls_with_playwright(self.url_queue, engine, headless)
+            else:
+                # Check Ulixee Hero modes
+                hero_mode = self.options["Ulixee Hero Mode"]
+                if hero_mode == "standard":
+                    # Use Ulixee Hero
+                    print(f"\n> Using Ulixee Hero")
+                    self.process_urls_with_hero(self.url_queue, headless)
+                elif hero_mode == "puppeteer":
+                    # Use Puppeteer
+                    print(f"\n> Using Puppeteer")
+                    self.process_urls_with_puppeteer(self.url_queue, "puppeteer", headless)
+                elif hero_mode == "<- extra":
+                    # Use Puppeteer Extra
+                    print(f"\n> Using Puppeteer Extra")
+                    self.process_urls_with_puppeteer(self.url_queue, "puppeteer-extra", headless)
+                elif hero_mode == "<- +stealth":
+                    # Use Puppeteer Extra with Stealth
+                    print(f"\n> Using Puppeteer Extra + Stealth")
+                    self.process_urls_with_puppeteer(self.url_queue, "puppeteer-stealth", headless)
+                else:
+                    # Use Selenium
+                    selenium_mode = self.options["Selenium Mode"].lower()
+                    human_behavior = self.options["Human Behavior"] == "true"
+                    behavior_intensity = self.options["Behavior Intensity"].lower() if human_behavior else "medium"
+                    
+                    print(f"\n> Using Selenium ({selenium_mode})")
+                    self.process_urls_with_selenium(self.url_queue, selenium_mode, headless, human_behavior, behavior_intensity)
+        except Exception as e:
+            print(f"\n> Error in scrape pipeline: {str(e)}")
+        finally:
+            self.url_queue.url_filter = None
+            if self.deduplicator.duplicates or self.deduplicator.recently_fetched:
+                print(f"\n> Skipped {self.deduplicator.duplicates} duplicate and "
+                      f"{self.deduplicator.recently_fetched} recently fetched URLs")
+            if self.url_history is not None:
+                try:
+                    self.url_history.save()
+                except Exception as e:
+                    print(f"> Error saving URL history: {str(e)}")
+            if self.response_cache is not None:
+                self.response_cache.close()
+            if self.recrawl_scheduler is not None:
+                self.recrawl_scheduler.close()
+            if self.cookie_jar is not None:
+                self.cookie_jar.close()
+            if self.proxy_pool is not None:
+                print("\n> Proxies:")
+                for line in self.proxy_pool.summary():
+                    print(f">   {line}")
+    
+    def report_status(self, status, url):
+        """Report the outcome of a URL: 0=success, 1=warning, 2=error"""
+        if self.status_callback is not None:
+            self.status_callback(status, url)
+    
+    def suspend(self, seconds, reason):
+        """Pause before the next URL, the GUI resumes the run when its timer runs out"""
+        self.is_suspended = True
+        if self.suspend_callback is not None:
+            self.suspend_callback(seconds, reason)
+        else:
+            print(f"> {reason}, pausing for {seconds} seconds")
+            self.resume_at = time.time() + seconds
+    
+    def wait_while_suspended(self):
+        """Block while the run is suspended (check every 100ms)"""
+        while self.is_suspended and not self.stop_execution:
+            if self.resume_at is not None and time.time() >= self.resume_at:
+                self.is_suspended = False
+                self.resume_at = None
+                break
+            time.sleep(0.1)
+    
+    def pause_after_failure(self, reason):
+        """Pause after an error or a block, or let the proxy pool route around it"""
+        if self.proxy_pool is not None:
+            # The proxy cools down on this site, the next request goes through another one
+            print(f"> {reason}, continuing with another proxy")
+        else:
+            self.suspend(self.timeout_seconds, reason)
+    
+    def acquire_proxy(self, url, current=None):
+        """
+        Return the proxy for the next request to `url`, None without proxy pool.
+        
+        Waits while every proxy is cooling down or out of budget for the site.
+        `current` is kept while it is free, for engines that would have to restart to switch.
+        """
+        if self.proxy_pool is None:
+            return None
+        while not self.stop_execution:
+            proxy = self.proxy_pool.acquire(url, current)
+            if proxy is not None:
+                return proxy
+            wait_seconds = self.proxy_pool.wait_seconds(url)
+            print(f"> Every proxy is cooling down or out of budget for this site, waiting {wait_seconds:.0f} seconds")
+            resume_at = time.time() + wait_seconds
+            while time.time() < resume_at and not self.stop_execution:
+                time.sleep(0.1)
+        return None
+    
+    def report_proxy(self, proxy, url, status, started):
+        """Score a proxy with the status of a request (0=success, 1=block, 2=error) started at `started`"""
+        if proxy is not None:
+            outcome = {0: "success", 1: "block"}.get(status, "error")
+            self.proxy_pool.report(proxy, url, outcome, time.time() - started)
+    
+    def checkout_profile(self, engine, proxy=None):
+        """Return a persistent browser profile for the next browser, None when profiles are off"""
+        if self.profile_pool is None:
+            return None
+        # Clearance cookies are tied to the IP address, so profiles stay with their proxy
+        profile = self.profile_pool.checkout(engine, proxy.server if proxy else None)
+        print(f"> Using browser profile {profile.name}")
+        return profile
+    
+    def release_profile(self, profile, status):
+        """Give a profile back after its browser closed, with the status of its last page (1=block)"""
+        if profile is not None:
+            self.profile_pool.release(profile, blocked=status == 1)
+    
+    def session_user_agent(self, url, profile=None):
+        """
+        Return the user agent for a new browser session on `url`, None for a random one.
+        
+        A profile keeps its own user agent, otherwise the one holding a clearance for the site in the
+        cookie jar is used, since clearance cookies are only honored for the browser that obtained them.
+        """
+        if profile is not None:
+            return profile.user_agent
+        if self.cookie_jar is not None:
+            return self.cookie_jar.clearance_user_agent(url)
+        return None
+    
+    def jar_cookies(self, url, user_agent):
+        """Return the cookies of the cookie jar a session of `user_agent` may send to `url`"""
+        if self.cookie_jar is None or not user_agent:
+            return None
+        return self.cookie_jar.cookies_for(url, user_agent) or None
+    
+    def harvest_cookies(self, status, cookies, user_agent):
+        """Keep the cookies a successful session ended with in the cookie jar"""
+        if self.cookie_jar is not None and status == 0 and cookies:
+            self.cookie_jar.store(user_agent, cookies)
+    
+    def behavior_budget(self, url):
+        """Seconds of human behavior for the next page of `url`: the full budget until its site trusts the session"""
+        if self.session_trust.get(urlsplit(url).hostname, 0) >= TRUSTED_AFTER_PAGES:
+            return 0.0
+        intensity = (self.options.get("Behavior Intensity") or "medium").lower()
+        return BEHAVIOR_BUDGETS.get(intensity, BEHAVIOR_BUDGETS["medium"])
+    
+    def new_browser_session(self, profile=None, user_agent=None):
+        """
+        Pick up the trust of the identity a new browser starts with.
+        
+        A profile, or the cookie jar for a known user agent, hands the cookies of the earlier browsers
+        to the new one, so the sites recognize the session and keep trusting it. A browser without
+        either is a session the sites have not seen yet.
+        """
+        if profile is not None:
+            session = ("profile", profile.name)
+        elif self.cookie_jar is not None and user_agent:
+            session = ("cookie jar", user_agent)
+        else:
+            self.session_trust = {}
+            return
+        self.session_trust = self._known_sessions.setdefault(session, {})
+    
+    def update_session_trust(self, url, blocked):
+        """Count a page the site let through, or start over after a block"""
+        site = urlsplit(url).hostname
+        self.session_trust[site] = 0 if blocked else self.session_trust.get(site, 0) + 1
+    
+    def is_cloudflare_detection_page(self, html_content):
+        # Convert to lowercase for case-insensitive matching
+        html_lower = html_content.lower()
+        
+        # More comprehensive set of Cloudflare indicators
+        cloudflare_indicators = [
+            # Title and meta indicators
+            "<title>just a moment...</title>",
+            '<meta name="robots" content="noindex,nofollow"',
+            '<meta http-equiv="refresh" content="390"',  # Common timeout refresh
+            
+            # Common element IDs and classes
+            'class="loading-spinner"',
+            'class="lds-ring"',
+            'class="main-wrapper"',
+            'class="challenge-',
+            'id="challenge-error-text"',
+            'id="challenge-success-text"',
+            
+            # Common text phrases unique to Cloudflare
+            "verifying you are human",
+            "this may take a few seconds",
+            "needs to review the security of your connection",
+            "enable javascript and cookies to continue",
+            "waiting for",
+            "to respond",
+            "verification successful",
+            "performance & security by",
+            "ray id:",
+            
+            # Cloudflare-specific script and resource references
+            "/cdn-cgi/challenge-platform/",
+            "/cdn-cgi/challenge-platform/h/b/orchestrate/chl_page",
+            "cloudflare",
+            "cloudflareinsights.com/beacon",
+            "cf_chl_opt",
+            "cf-ray",
+            "cf_chl_",
+            "chl_page",
+            
+            # Function calls and JS specific to Cloudflare
+            "turnstile",
+            "challenges.cloudflare.com",
+            "window._cf_chl_opt",
+            "cOgUHash",
+            "cOgUQuery",
+            
+            # Visual elements unique to Cloudflare
+            'div class="lds-ring"><div></div><div></div><div></div><div></div></div>',
+            'background-image:url(data:image/svg+xml;base64,',  # SVG base64 icons
+            
+            # Specific CSS patterns
+            "@keyframes lds-ring{",
+            "animation:lds-ring",
+            
+            # Footer elements
+            'role="contentinfo"',
+            '<a rel="noopener noreferrer" href="https://www.cloudflare.com?utm_source=challenge',
+        ]
+        
+        # Strong indicators that, if any are present, almost certainly indicate a Cloudflare page
+        strong_indicators = [
+            "ray id: <code>",
+            'class="ray-id">ray id:',
+            '/cdn-cgi/challenge-platform/',
+            "window._cf_chl_opt",
+            "cloudflare.com?utm_source=challenge",
+            "challenge-platform/h/b/orchestrate/chl_page"
+        ]
+        
+        # Check if any strong indicators are present
+        
+        # Count how many general indicators are found
+        indicators_found = sum(1 for indicator in cloudflare_indicators if indicator in html_lower)
+        indicators_found += sum(2 for indicator in strong_indicators if indicator in html_lower)
+        
+        # We require a higher threshold for confidence (65% of indicators)
+        threshold = int(len(cloudflare_indicators) * 0.65)
+        
+        print(f"Cloudflare indicators found: {indicators_found}/{len(cloudflare_indicators)}")
+        
+        return indicators_found >= threshold
+    
+    def process_urls_with_playwright(self, urls, engine_type, headless):
+        """Process URLs using Playwright variants"""
+        from playwrightPy import scrape_with_playwright_sync  # Import from your paste.txt file
+        
+        for i, url in enumerate(urls, 1):
+            if self.stop_execution:
+                print(f"\n> Execution stopped permanently")
+                break
+                
+            # Check if execution is suspended
+            self.wait_while_suspended()
+                
+            print(f"\n> [{i}/{len(urls)}] Processing with Playwright ({engine_type}): {url}")
+            
+            proxy = self.acquire_proxy(url)
+            if self.stop_execution:
+                break
+            profile = self.checkout_profile("playwright", proxy)
+            started = time.time()
+            try:
+                # Ask the server to skip the page if it did not change since the cached copy
+                conditional_headers = None
+                if self.response_cache is not None and not self.follows_links(url):
+                    plugin_names = self.plugin_runner.plugin_names(self.crawl_plugins(url))
+                    conditional_headers = self.response_cache.request_headers(url, plugin_names)
+                response_info = {}
+                user_agent = self.session_user_agent(url, profile)
+                # Every page gets its own browser
+                self.new_browser_session(profile, user_agent)
+                html = scrape_with_playwright_sync(
+                    url=url, 
+                    engine=engine_type, 
+                    headless=headless,
+                    conditional_headers=conditional_headers,
+                    response_info=response_info,
+                    proxy=proxy.playwright_settings() if proxy else None,
+                    user_data_dir=profile.path if profile else None,
+                    user_agent=user_agent,
+                    cookies=self.jar_cookies(url, user_agent),
+                    behavior_budget=self.behavior_budget(url),
+                    raw_capture=self.raw_capture
+                )
+                if conditional_headers and response_info.get("status") == 304:
+                    self.report_proxy(proxy, url, 0, started)
+                    self.release_profile(profile, 0)
+                    self.process_not_modified(url)
+                    continue
+                status = self.process_html(html, url, i, response_info.get("headers"))
+                self.harvest_cookies(status, response_info.get("cookies"), response_info.get("user_agent"))
+            except Exception as e:
+                print(f"> Error: {str(e)}")
+                # Report error in process_html with None
+                status = self.process_html(None, url, i)
+            self.report_proxy(proxy, url, status, started)
+            self.release_profile(profile, status)
+
+    def process_urls_with_hero(self, urls, headless):
+        """Process URLs using Ulixee Hero"""
+        from heroPy import scrape_with_js
+        
+        for i, url in enumerate(urls, 1):
+            if self.stop_execution:
+                print(f"\n> Execution stopped permanently")
+                break
+                
+            # Check if execution is suspended
+            self.wait_while_suspended()
+                
+            print(f"\n> [{i}/{len(urls)}] Processing with Ulixee Hero: {url}")
+            
+            proxy = self.acquire_proxy(url)
+            if self.stop_execution:
+                break
+            profile = self.checkout_profile("hero", proxy)
+            started = time.time()
+            try:
+                user_agent = self.session_user_agent(url, profile)
+                # Every page gets its own browser
+                self.new_browser_session(profile, user_agent)
+                response_info = {} if self.cookie_jar is not None else None
+                html = scrape_with_js(url=url, engine="hero", headless=headless, proxy_url=proxy.url if proxy else None,
+                                      user_agent=user_agent, cookies=self.jar_cookies(url, user_agent),
+                                      profile_dir=profile.path if profile else None, response_info=response_info,
+                                      behavior_budget=self.behavior_budget(url), raw_capture=self.raw_capture)
+                status = self.process_html(html, url, i)
+                if response_info is not None:
+                    self.harvest_cookies(status, response_info.get("cookies"), response_info.get("user_agent"))
+            except Exception as e:
+                print(f"> Error: {str(e)}")
+                # Report error in process_html with None
+                status = self.process_html(None, url, i)
+            self.report_proxy(proxy, url, status, started)
+            self.release_profile(profile, status)
+    
+    def process_urls_with_puppeteer(self, urls, engine_type, headless):
+        """Process URLs using Puppeteer variants"""
+        from heroPy import scrape_with_js
+        
+        for i, url in enumerate(urls, 1):
+            if self.stop_execution:
+                print(f"\n> Execution stopped permanently")
+                break
+                
+            # Check if execution is suspended
+            self.wait_while_suspended()
+                
+            print(f"\n> [{i}/{len(urls)}] Processing with {engine_type}: {url}")
+            
+            proxy = self.acquire_proxy(url)
+            if self.stop_execution:
+                break
+            profile = self.checkout_profile("puppeteer", proxy)
+            started = time.time()
+            try:
+                user_agent = self.session_user_agent(url, profile)
+                # Every page gets its own browser
+                self.new_browser_session(profile, user_agent)
+                response_info = {} if self.cookie_jar is not None else None
+                html = scrape_with_js(url=url, engine=engine_type, headless=headless, proxy_url=proxy.url if proxy else None,
+                                      user_agent=user_agent, cookies=self.jar_cookies(url, user_agent),
+                                      profile_dir=profile.path if profile else None, response_info=response_info,
+                                      behavior_budget=self.behavior_budget(url), raw_capture=self.raw_capture)
+                status = self.process_html(html, url, i)
+                if response_info is not None:
+                    self.harvest_cookies(status, response_info.get("cookies"), response_info.get("user_agent"))
+            except Exception as e:
+                print(f"> Error: {str(e)}")
+                # Report error in process_html with None
+                status = self.process_html(None, url, i)
+            self.report_proxy(proxy, url, status, started)
+            self.release_profile(profile, status)
+    
+    def process_urls_with_selenium(self, urls, method, headless, human_behavior, behavior_intensity):
+        """Process URLs using a single Selenium driver instance, restarted when the proxy changes"""
+        from seleniumScrape import create_driver_undetected, create_driver_stealth, create_driver_seleniumbase, create_driver_standard
+        from seleniumScrape import inject_cookies, session_cookies, start_human_behavior, challenge_marker, get_raw_html
+        from seleniumScrape import CONCLUSIVE_CHALLENGE_MARKERS
+        
+        def create_driver(proxy=None, profile=None, user_agent=None):
+            """Create the appropriate driver based on method"""
+            proxy_url = proxy.url if proxy else None
+            profile_dir = profile.path if profile else None
+            user_agent = user_agent or (profile.user_agent if profile else None)
+            print(f"\n> Creating driver ({method})" + (f" through {proxy.server}..." if proxy else "..."))
+            if method == "undetected":
+                driver = create_driver_undetected(headless, proxy_url, profile_dir, user_agent, self.raw_capture)
+            elif method == "stealth":
+                driver = create_driver_stealth(headless, proxy_url, profile_dir, user_agent, self.raw_capture)
+            elif method == "base":
+                driver = create_driver_seleniumbase(headless, proxy_url, profile_dir, user_agent, self.raw_capture)
+            else:  # standard
+                driver = create_driver_standard(headless, proxy_url, profile_dir, user_agent, self.raw_capture)
+            print("> Driver created successfully")
+            return driver
+        
+        # Only the base mode can log in to a proxy, the other modes pass it on Chrome's command line
+        if self.proxy_pool is not None and method != "base":
+            dropped = self.proxy_pool.drop_authenticated()
+            if dropped:
+                print(f"> Skipping {dropped} proxies with credentials, Selenium {method} mode cannot use them")
+            if not len(self.proxy_pool):
+                print("> No proxy without credentials left, scraping without proxies")
+                self.proxy_pool = None
+        
+        driver = None
+        driver_proxy = None
+        profile = None
+        status = 0  # Of the last page, a profile whose last page was blocked counts a block
+        driver_user_agent = None
+        behavior_until = 0.0  # End of the human behavior budget of the previous page
+        try:
+            # Create the driver first, with proxies or the cookie jar it is started for the first URL
+            if self.proxy_pool is None and self.cookie_jar is None:
+                profile = self.checkout_profile("selenium")
+                driver = create_driver(profile=profile)
+            
+            # Process each URL
+            for i, url in enumerate(urls, 1):
+                if self.stop_execution:
+                    print(f"\n> Execution stopped permanently")
+                    break
+                    
+                # Check if execution is suspended
+                self.wait_while_suspended()
+                    
+                print(f"\n> [{i}/{len(urls)}] Processing: {url}")
+                
+                # A browser keeps the proxy it was started with, switching proxies means a new browser
+                proxy = self.acquire_proxy(url, driver_proxy)
+                if self.stop_execution:
+                    break
+                started = time.time()
+                try:
+                    if driver is None or proxy is not driver_proxy:
+                        if driver is not None:
+                            driver.quit()
+                            driver = None
+                        self.release_profile(profile, status)
+                        profile = None
+                        profile = self.checkout_profile("selenium", proxy)
+                        driver = create_driver(proxy, profile, self.session_user_agent(url, profile))
+                        driver_proxy = proxy
+                        behavior_until = 0.0
+                        if self.cookie_jar is not None:
+                            driver_user_agent = driver.execute_script("return navigator.userAgent")
+                        self.new_browser_session(profile, driver_user_agent)
+                    if profile is not None:
+                        profile.touch()
+                    # The clearance of other sessions, the driver keeps its user agent for the whole run
+                    inject_cookies(driver, self.jar_cookies(url, driver_user_agent))
+                    
+                    # The behavior of the previous page ran while it was processed, let it use up its budget
+                    if behavior_until > time.time():
+                        time.sleep(behavior_until - time.time())
+                    
+                    if self.raw_capture:
+                        # The HTML the server sent, the page is neither rendered nor serialized
+                        print("> Capturing the raw response...")
+                        status = self.process_html(get_raw_html(driver, url), url, i)
+                    else:
+                        # Use driver.get directly
+                        print("> Navigating to URL...")
+                        driver.get(url)
+                        
+                        # Apply human behavior if enabled, it runs in the browser while the page is read and processed
+                        if human_behavior:
+                            budget = self.behavior_budget(url)
+                            print(f"> Applying human behavior ({behavior_intensity}, {budget:g}s)...")
+                            behavior_until = start_human_behavior(driver, budget, behavior_intensity)
+                        
+                        # A challenge is recognized in the browser, without transferring the page
+                        marker = challenge_marker(driver)
+                        if marker in CONCLUSIVE_CHALLENGE_MARKERS:
+                            status = self.process_challenge(url, marker)
+                        else:
+                            # Get page source, after a text indicator alone the threshold check on the HTML decides
+                            html = driver.page_source
+                            status = self.process_html(html, url, i)
+                    if self.cookie_jar is not None and status == 0:
+                        try:
+                            self.harvest_cookies(status, *session_cookies(driver, url))
+                        except Exception as e:
+                            print(f"> Could not store the cookies: {str(e)}")
+                        
+                except Exception as e:
+                    print(f"> Error processing URL: {str(e)}")
+                    # Report error in process_html with None
+                    status = self.process_html(None, url, i)
+                self.report_proxy(proxy, url, status, started)
+                    
+            print("\n> All URLs processed successfully")
+                
+        except Exception as e:
+            print(f"\n> Error creating driver: {str(e)}")
+        finally:
+            # Close the driver
+            if driver:
+                try:
+                    print("\n> Closing browser...")
+                    driver.quit()
+                    print("> Browser closed")
+                except Exception as e:
+                    print(f"> Error closing browser: {str(e)}")
+            self.release_profile(profile, status)
+    
+
+    def crawl_plugins(self, url):
+        """Return the plugins a follow-up URL was tagged with, or None for the plugins selected for the run"""
+        tag = self.crawl_tags.get(url)
+        return tag[0] if tag else None
+
+    def below_crawl_depth(self, url):
+        """True if links found on this page are still within the Crawl Depth"""
+        depth = self.crawl_tags[url][1] if url in self.crawl_tags else 0
+        return depth < self.max_crawl_depth
+    
+    def follows_links(self, url):
+        """True if the follow-up URLs of this page would still be queued, so it has to be parsed"""
+        return self.below_crawl_depth(url) and self.plugin_runner.emits_follow_ups(self.crawl_plugins(url))
+
+    def queue_follow_ups(self, url, follow_ups):
+        """Queue the follow-up URLs a plugin returned for a page, unless the depth limit is reached"""
+        depth = (self.crawl_tags[url][1] if url in self.crawl_tags else 0) + 1
+        if depth > self.max_crawl_depth:
+            if self.max_crawl_depth:
+                print(f"> Crawl depth {self.max_crawl_depth} reached, not following {len(follow_ups)} URLs")
+            return
+        queued = []
+        unchanged = 0
+        for follow_up_url, plugins, version in follow_ups:
+            # Pages at the same version as when they were cached keep their rows without being fetched
+            if version is not None and self.response_cache is not None and self.response_cache.is_unchanged(
+                    follow_up_url, version, self.plugin_runner.plugin_names(plugins)):
+                self.plugin_runner.process_cached(follow_up_url, plugins)
+                unchanged += 1
+                continue
+            # The first page linking to a URL decides how it is handled, later ones are deduplicated anyway
+            self.crawl_tags.setdefault(follow_up_url, (plugins, depth, version))
+            queued.append(follow_up_url)
+        self.url_queue.extend(queued)
+        if unchanged:
+            print(f"> Carried forward the cached rows of {unchanged} unchanged pages")
+        print(f"> Queued {len(queued)} follow-up URLs (depth {depth})")
+
+    def process_not_modified(self, url):
+        """Reuse the cached rows of a page the server reported as not modified (HTTP 304)"""
+        print(f"> Not modified, reusing the cached rows of {url}")
+        try:
+            self.plugin_runner.process_cached(url, self.crawl_plugins(url))
+        except Exception as e:
+            print(f"> Error writing cached rows: {str(e)}")
+            self.report_status(2, url)
+            return
+        self.report_status(0, url)
+        self.url_queue.complete(url)
+        if self.url_history is not None:
+            self.url_history.add(url)
+        if self.recrawl_scheduler is not None:
+            self.recrawl_scheduler.record_unchanged(url)
+
+    def process_challenge(self, url, marker=None):
+        """Report a Cloudflare page, e.g. recognized by `marker` in the browser, and return the warning status"""
+        print(f"> Cloudflare detection page found for {url}" + (f" ({marker})" if marker else ""))
+        self.update_session_trust(url, blocked=True)
+        self.report_status(1, url)
+        # Suspend execution on warning
+        self.pause_after_failure("Warning: Cloudflare protection detected")
+        return 1  # Warning
+    
+    def process_html(self, html, url, index, response_headers=None):
+        """Process HTML content that was scraped, report and return its status: 0=success, 1=warning, 2=error"""
+        # Status tracking variable
+        status_code = 0  # Default to success
+            
+        # First determine status
+        if not html:
+            # No HTML (None, or empty from an engine that failed), this is an error
+            print(f"> Error: No HTML content retrieved for {url}")
+            self.report_status(2, url)
+            # Suspend execution on error
+            self.pause_after_failure("Error: Failed to retrieve content")
+            status_code = 2  # Error
+            return status_code
+                
+        # Check if this is a Cloudflare page
+        if self.is_cloudflare_detection_page(html):
+            return self.process_challenge(url)
+        
+        # Check for HTTP 429 response
+        if "HTTP ERROR 429" in html or "Too Many Requests" in html:
+            print(f"> HTTP 429 Too Many Requests error for {url}")
+            self.update_session_trust(url, blocked=True)
+            self.report_status(1, url)  # Using warning status for rate limiting
+            # Suspend execution to prevent further rate limiting
+            self.pause_after_failure("Warning: Rate limit (HTTP 429) detected")
+            status_code = 1  # Warning
+            return status_code
+                
+        # If we got here, it's a successful retrieval
+        print(f"> Success! Retrieved {len(html)} characters of HTML")
+        self.update_session_trust(url, blocked=False)
+        
+        # Apply the selected plugins if not in "Download HTML" mode
+        if self.plugin_runner:
+            try:
+                self.plugin_runner.process(html, url, self.crawl_plugins(url))
+            except Exception as e:
+                print(f"> Error applying plugins: {str(e)}")
+                import traceback
+                traceback.print_exc()  # Print full traceback for debugging
+        
+        try:
+            # Import os explicitly to avoid scope issues
+            import os as os_module
+            
+            # Create output directory if it doesn't exist
+            output_dir = self.html_dir
+            if not os_module.path.exists(output_dir):
+                os_module.makedirs(output_dir)
+                    
+            # Create a safe filename from the URL
+            safe_filename = url.replace("http://", "").replace("https://", "")
+            safe_filename = safe_filename.replace("/", "_").replace(":", "_")
+            if len(safe_filename) > 50:
+                safe_filename = safe_filename[:50]
+            safe_filename = f"{safe_filename}_{index}.html"
+            
+            # Save the file
+            file_path = os_module.path.join(output_dir, safe_filename)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            print(f"> HTML saved to: {file_path}")
+            
+            # Emit success signal
+            self.report_status(0, url)
+            status_code = 0  # Success
+            
+            # Remove this URL from the remaining URLs ONLY if it was successful
+            if status_code == 0:
+                self.url_queue.complete(url)
+                if self.url_history is not None:
+                    self.url_history.add(url)
+                if self.recrawl_scheduler is not None and not self.plugin_runner:
+                    # Without plugins there are no rows to compare, only the fetch time is kept
+                    self.recrawl_scheduler.record(url, None)
+                if self.response_cache is not None:
+                    if response_headers is not None:
+                        self.response_cache.store_response(url, response_headers)
+                    version = self.crawl_tags[url][2] if url in self.crawl_tags else None
+                    if version is not None:
+                        self.response_cache.store_version(url, version)
+            
+        except Exception as e:
+            print(f"> Error saving HTML: {str(e)}")
+            # Error saving the file is still an error
+            self.report_status(2, url)
+            # Stop execution on error
+            self.stop_execution = True
+        
+        return status_code
@@ -5,9 +5,10 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QHBoxLayout, QGridLayout, QPushButton, QLabel, 
                             QLineEdit, QFileDialog, QFrame, QSizePolicy,
                             QTextEdit, QTabWidget, QScrollArea, QFormLayout, QSpinBox, 
-                            QComboBox, QTableWidget, QTableWidgetItem) 
-from PyQt5.QtCore import Qt, QFile, QTextStream
-from PyQt5.QtGui import QColor, QPalette, QFont
+                            QComboBox, QTableView, QListView, QAbstractItemView, QStackedWidget) 
+from PyQt5.QtCore import (Qt, QFile, QTextStream, QAbstractTableModel, QAbstractListModel, QModelIndex,
+                          QTimer, QSortFilterProxyModel)
+from PyQt5.QtGui import QColor, QPalette, QFont, QStandardItemModel, QStandardItem
 
 
 class FlowLayout(QVBoxLayout):
@@ -18,6 +19,314 @@ class FlowLayout(QVBoxLayout):
         self.setContentsMargins(2, 2, 2, 2)
 
 
+class CheckableComboBox(QComboBox):
+    """A dropdown whose items can be checked, to select several of them at once"""
+    def __init__(self, placeholder="", parent=None):
+        super().__init__(parent)
+        self.placeholder = placeholder
+        self.setModel(QStandardItemModel(self))
+        
+        # Show a read-only summary of the checked items instead of the current item
+        self.setEditable(True)
+        self.lineEdit().setReadOnly(True)
+        self.lineEdit().setText(self.placeholder)
+        
+        self.keep_popup_open = False
+        self.view().pressed.connect(self.toggle_item)
+    
+    def addItem(self, text, checked=False):
+        item = QStandardItem(text)
+        item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsUserCheckable)
+        item.setData(Qt.Checked if checked else Qt.Unchecked, Qt.CheckStateRole)
+        self.model().appendRow(item)
+        self.update_summary()
+    
+    def toggle_item(self, index):
+        item = self.model().itemFromIndex(index)
+        item.setCheckState(Qt.Unchecked if item.checkState() == Qt.Checked else Qt.Checked)
+        # Keep the popup open so several items can be checked in a row
+        self.keep_popup_open = True
+        self.update_summary()
+    
+    def hidePopup(self):
+        if self.keep_popup_open:
+            self.keep_popup_open = False
+            return
+        super().hidePopup()
+        self.update_summary()
+    
+    def checked_items(self):
+        """Return the text of every checked item, in display order"""
+        model = self.model()
+        return [model.item(row).text() for row in range(model.rowCount())
+                if model.item(row).checkState() == Qt.Checked]
+    
+    def update_summary(self):
+        checked = self.checked_items()
+        self.lineEdit().setText(", ".join(checked) if checked else self.placeholder)
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    Field / Value / Description summary of the plugin results.
+
+    Incoming results only update the stored values, the view is told about
+    changed cells by a timer at a fixed rate, so the cost of a refresh does
+    not depend on how many results arrived or how long the run has been going.
+    """
+    HEADERS = ["Field", "Value", "Description"]
+    REFRESH_INTERVAL_MS = 500
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.field_names = []  # Row order
+        self.fields = {}  # Field name -> {'row', 'value', 'type', 'summed', 'description'}
+        self.changed_rows = set()
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.flush_changes)
+        self.refresh_timer.start()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.field_names)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        name = self.field_names[index.row()]
+        field = self.fields[name]
+        if index.column() == 0:
+            # Prefix the field name with "Sum of" or "Last" depending on how it is accumulated
+            return f"Sum of {name}" if field['summed'] else f"Last {name}"
+        if index.column() == 1:
+            return self.format_value(field['value'])
+        return str(field['description']) if field['description'] else None
+    
+    @staticmethod
+    def format_value(value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            # Numbers get commas for thousands
+            return f"{value:,}"
+        if isinstance(value, list):
+            # Format lists with limited display
+            value_str = ", ".join(str(item) for item in value[:3])
+            if len(value) > 3:
+                value_str += f"... ({len(value)} items)"
+            return value_str
+        if isinstance(value, dict):
+            # Format dictionaries with summary
+            return f"{{...}} ({len(value)} key-value pairs)"
+        return str(value)
+    
+    def add_results(self, summaries):
+        """Merge ColumnSummary results: summed values are added up, the others replace the last value"""
+        for summary in summaries:
+            field = self.fields.get(summary.name)
+            if field is None:
+                row = len(self.field_names)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.field_names.append(summary.name)
+                self.fields[summary.name] = {
+                    'row': row,
+                    'value': summary.value,
+                    'type': summary.field_type,
+                    'summed': summary.summed,
+                    'description': summary.description
+                }
+                self.endInsertRows()
+                continue
+            
+            if summary.summed and field['summed']:
+                field['value'] += summary.value
+            else:
+                field['value'] = summary.value
+                field['summed'] = summary.summed
+            if summary.description:
+                field['description'] = summary.description
+            self.changed_rows.add(field['row'])
+    
+    def flush_changes(self):
+        """Tell the view which rows changed since the last refresh"""
+        if not self.changed_rows:
+            return
+        first_row, last_row = min(self.changed_rows), max(self.changed_rows)
+        self.changed_rows.clear()
+        self.dataChanged.emit(self.index(first_row, 0), self.index(last_row, len(self.HEADERS) - 1), [Qt.DisplayRole])
+    
+    def clear(self):
+        self.beginResetModel()
+        self.field_names = []
+        self.fields = {}
+        self.changed_rows.clear()
+        self.endResetModel()
+
+
+class UrlListModel(QAbstractListModel):
+    """
+    The URLs of one status tab (Done, Warning or Error).
+
+    URLs are kept as plain strings and drawn by a QListView, which only paints
+    the visible rows. New URLs are appended in groups on a timer, so a fast
+    run does not trigger a view update per URL.
+    """
+    REFRESH_INTERVAL_MS = 250
+    
+    def __init__(self, color, parent=None):
+        super().__init__(parent)
+        self.color = QColor(color)
+        self.urls = []
+        self.pending_urls = []
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.flush_pending)
+        self.refresh_timer.start()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.urls)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.urls[index.row()]
+        if role == Qt.ForegroundRole:
+            return self.color
+        return None
+    
+    def add_url(self, url):
+        self.pending_urls.append(url)
+    
+    def flush_pending(self):
+        """Insert the URLs received since the last refresh in one go"""
+        if not self.pending_urls:
+            return
+        first_row = len(self.urls)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(self.pending_urls) - 1)
+        self.urls.extend(self.pending_urls)
+        self.pending_urls = []
+        self.endInsertRows()
+
+
+class UrlStatusList(QWidget):
+    """A filterable URL list with copy and export buttons, used for each status tab"""
+    def __init__(self, color, parent=None):
+        super().__init__(parent)
+        self.model = UrlListModel(color, self)
+        self.proxy_model = QSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+        self.proxy_model.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.setSpacing(2)
+        
+        # Filter and buttons on top of the list
+        toolbar_layout = QHBoxLayout()
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter URLs...")
+        self.filter_input.textChanged.connect(self.proxy_model.setFilterFixedString)
+        toolbar_layout.addWidget(self.filter_input, 1)
+        
+        self.copy_button = QPushButton("Copy")
+        self.copy_button.setToolTip("Copy the selected URLs, or all shown URLs if none are selected")
+        self.copy_button.clicked.connect(self.copy_urls)
+        toolbar_layout.addWidget(self.copy_button)
+        
+        self.export_button = QPushButton("Export")
+        self.export_button.setToolTip("Save the shown URLs to a text file")
+        self.export_button.clicked.connect(self.export_urls)
+        toolbar_layout.addWidget(self.export_button)
+        layout.addLayout(toolbar_layout)
+        
+        self.view = QListView()
+        self.view.setModel(self.proxy_model)
+        self.view.setUniformItemSizes(True)  # Lets the view skip measuring every row
+        self.view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.view)
+    
+    def add_url(self, url):
+        self.model.add_url(url)
+    
+    def shown_urls(self):
+        """Return the URLs that pass the current filter"""
+        self.model.flush_pending()
+        return [self.proxy_model.index(row, 0).data() for row in range(self.proxy_model.rowCount())]
+    
+    def copy_urls(self):
+        rows = sorted(index.row() for index in self.view.selectionModel().selectedRows())
+        if rows:
+            urls = [self.proxy_model.index(row, 0).data() for row in rows]
+        else:
+            urls = self.shown_urls()
+        QApplication.clipboard().setText('\n'.join(urls))
+    
+    def export_urls(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export URLs", "", "Text Files (*.txt);;All Files (*)")
+        if not file_path:
+            return
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(self.shown_urls()))
+            file.write('\n')
+
+
+class UrlQueueModel(QAbstractListModel):
+    """
+    Read-only view of the remaining URLs of a UrlQueue.
+
+    The worker thread changes the queue, the model checks its version on a
+    timer and refreshes the view at most once per interval.
+    """
+    REFRESH_INTERVAL_MS = 250
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.url_queue = None
+        self.row_count = 0
+        self.seen_version = None
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+    
+    def set_queue(self, url_queue):
+        self.beginResetModel()
+        self.url_queue = url_queue
+        self.row_count = url_queue.remaining_count() if url_queue is not None else 0
+        self.seen_version = url_queue.version if url_queue is not None else None
+        self.endResetModel()
+        if url_queue is not None:
+            self.refresh_timer.start()
+        else:
+            self.refresh_timer.stop()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.row_count
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid() or self.url_queue is None:
+            return None
+        return self.url_queue.url_at(index.row())
+    
+    def refresh(self):
+        if self.url_queue is None or self.url_queue.version == self.seen_version:
+            return
+        self.beginResetModel()
+        self.seen_version = self.url_queue.version
+        self.row_count = self.url_queue.remaining_count()
+        self.endResetModel()
+
+
 class DarkThemeApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -38,7 +347,19 @@ class DarkThemeApp(QMainWindow):
             "Ulixee Hero Mode": None,
             "Playwright": None,
             "Headless": None,
-            "Behavior Intensity": None
+            "Behavior Intensity": None,
+            "HTML Parser": None,
+            "Skip Fetched": None,
+            "Revalidate": None,
+            "Crawl Depth": None,
+            "Recrawl Order": None,
+            "Recrawl Budget": None,
+            "Processes": None,
+            "Shard By": None,
+            "Proxies": None,
+            "Profiles": None,
+            "Cookie Jar": None,
+            "Capture": None
         }
         
         # Create buttons for each row
@@ -48,7 +369,19 @@ class DarkThemeApp(QMainWindow):
             "Human Behavior": [],
             "Playwright": [],
             "Headless": [],
-            "Behavior Intensity": []
+            "Behavior Intensity": [],
+            "HTML Parser": [],
+            "Skip Fetched": [],
+            "Revalidate": [],
+            "Crawl Depth": [],
+            "Recrawl Order": [],
+            "Recrawl Budget": [],
+            "Processes": [],
+            "Shard By": [],
+            "Proxies": [],
+            "Profiles": [],
+            "Cookie Jar": [],
+            "Capture": []
         }
         
         # Create main widget and layout
@@ -180,32 +513,14 @@ class DarkThemeApp(QMainWindow):
         QTabBar::tab:!selected {
             margin-top: 2px;
         }
-        QLabel#in_tab_label {
-            background-color: #1E1E1E;
-            color: #00FF00;
-            border-radius: 4px;
-            padding: 2px 4px;
-            margin: 1px;
-            font-size: 12px;
-            max-height: 16px;
-        }
-        QLabel#warning_tab_label {
-            background-color: #1E1E1E;
-            color: #FFFF00;
-            border-radius: 4px;
-            padding: 2px 4px;
-            margin: 1px;
+        QListView {
+            background-color: #2D2D2D;
+            border: 1px solid #3D3D3D;
             font-size: 12px;
-            max-height: 16px;
         }
-        QLabel#error_tab_label {
-            background-color: #1E1E1E;
-            color: #FF0000;
-            border-radius: 4px;
-            padding: 2px 4px;
-            margin: 1px;
-            font-size: 12px;
-            max-height: 16px;
+        QListView::item:selected {
+            background-color: #FF6600;
+            color: #000000;
         }
         QLabel#data_header {
             font-size: 15px;
@@ -297,7 +612,7 @@ class DarkThemeApp(QMainWindow):
             selection-background-color: #FF6600;
             outline: none;
         }
-        QTableWidget {
+        QTableView {
             background-color: #2D2D2D;
             color: #FFFFFF;
             border: 1px solid #3D3D3D;
@@ -309,10 +624,10 @@ class DarkThemeApp(QMainWindow):
             padding: 5px;
             border: 1px solid #3D3D3D;
         }
-        QTableWidget::item {
+        QTableView::item {
             padding: 5px;
         }
-        QTableWidget::item:selected {
+        QTableView::item:selected {
             background-color: #FF6600;
             color: #000000;
         }
@@ -332,14 +647,12 @@ class DarkThemeApp(QMainWindow):
         plugin_label = QLabel("Parse Mode:")
         dropdown_layout.addWidget(plugin_label)
         
-        # Create dropdown (QComboBox) for plugins
-        self.plugin_dropdown = QComboBox()
+        # Create dropdown for plugins, several plugins can be checked and share each fetched page
+        # With no plugin checked, the raw HTML is only downloaded
+        self.plugin_dropdown = CheckableComboBox("Download HTML")
         self.plugin_dropdown.setMinimumHeight(30)  # Set minimum height
         self.plugin_dropdown.setMinimumWidth(200)  # Set minimum width
         
-        # Add default option
-        self.plugin_dropdown.addItem("Download HTML")
-        
         # Add plugin files
         plugin_files = self.get_plugin_files()
         if len(plugin_files) > 0:
@@ -397,10 +710,21 @@ class DarkThemeApp(QMainWindow):
         
         # Add file path input as a multiline text edit but with reduced height (30% of original)
         self.file_path_input = QTextEdit()
-        self.file_path_input.setMinimumHeight(70)  # Reduced by 70% from 80
-        self.file_path_input.setMaximumHeight(70)  # Fix the height
         self.file_path_input.setAcceptRichText(False)  # Plain text only
-        input_layout.addWidget(self.file_path_input, 1)  # 1 is the stretch factor
+        
+        # While scraping, the same space shows the remaining URLs of the run's queue
+        self.url_queue_model = UrlQueueModel(self)
+        self.url_queue_view = QListView()
+        self.url_queue_view.setModel(self.url_queue_model)
+        self.url_queue_view.setUniformItemSizes(True)
+        self.url_queue_view.setToolTip("Remaining urls, read from the file as the run goes. Load a shorter list to edit them.")
+        
+        self.url_input_stack = QStackedWidget()
+        self.url_input_stack.setMinimumHeight(70)  # Reduced by 70% from 80
+        self.url_input_stack.setMaximumHeight(70)  # Fix the height
+        self.url_input_stack.addWidget(self.file_path_input)
+        self.url_input_stack.addWidget(self.url_queue_view)
+        input_layout.addWidget(self.url_input_stack, 1)  # 1 is the stretch factor
         
         # Add browse button
         self.browse_button = QPushButton("Load URLs")
@@ -436,7 +760,19 @@ class DarkThemeApp(QMainWindow):
             "Playwright": ["standard", "puppeteer +stealth"],
             "Human Behavior": ["true", "false"],
             "Headless": ["true", "false"],
-            "Behavior Intensity": ["low", "medium", "high"]
+            "Behavior Intensity": ["low", "medium", "high"],
+            "HTML Parser": ["lxml", "selectolax", "html.parser"],
+            "Skip Fetched": ["false", "1 day", "7 days", "30 days"],
+            "Revalidate": ["true", "false"],
+            "Crawl Depth": ["0", "1", "2", "3"],
+            "Recrawl Order": ["input", "priority"],
+            "Recrawl Budget": ["all", "100", "1000", "10000"],
+            "Processes": ["1", "4", "8", "16", "32"],
+            "Shard By": ["domain", "hash"],
+            "Proxies": ["false", "true"],
+            "Profiles": ["false", "true"],
+            "Cookie Jar": ["false", "true"],
+            "Capture": ["rendered", "raw"]
         }
         
         # Create buttons for each row
@@ -478,6 +814,18 @@ class DarkThemeApp(QMainWindow):
         self.select_button("Human Behavior", "false")
         self.select_button("Headless", "true")
         self.select_button("Behavior Intensity", "medium")
+        self.select_button("HTML Parser", "lxml")
+        self.select_button("Skip Fetched", "false")
+        self.select_button("Revalidate", "false")
+        self.select_button("Crawl Depth", "0")
+        self.select_button("Recrawl Order", "input")
+        self.select_button("Recrawl Budget", "all")
+        self.select_button("Processes", "1")
+        self.select_button("Shard By", "domain")
+        self.select_button("Proxies", "false")
+        self.select_button("Profiles", "false")
+        self.select_button("Cookie Jar", "false")
+        self.select_button("Capture", "rendered")
         
         # Update intensity buttons based on human behavior
         self.update_intensity_buttons()
@@ -567,46 +915,10 @@ class DarkThemeApp(QMainWindow):
         # Create tab widget
         self.tab_widget = QTabWidget()
         
-        # Create tabs with different colors
-        self.in_tab = QWidget()
-        self.warning_tab = QWidget()
-        self.error_tab = QWidget()
-        
-        # Create scroll areas for each tab
-        self.in_scroll = QScrollArea()
-        self.in_scroll.setWidgetResizable(True)
-        self.warning_scroll = QScrollArea()
-        self.warning_scroll.setWidgetResizable(True)
-        self.error_scroll = QScrollArea()
-        self.error_scroll.setWidgetResizable(True)
-        
-        # Create content widgets for each scroll area
-        self.in_content = QWidget()
-        self.warning_content = QWidget()
-        self.error_content = QWidget()
-        
-        # Create flow layouts for each content widget
-        self.in_layout = FlowLayout(self.in_content)
-        self.warning_layout = FlowLayout(self.warning_content)
-        self.error_layout = FlowLayout(self.error_content)
-        
-        # Set content widgets to scroll areas
-        self.in_scroll.setWidget(self.in_content)
-        self.warning_scroll.setWidget(self.warning_content)
-        self.error_scroll.setWidget(self.error_content)
-        
-        # Set layouts for tabs
-        in_tab_layout = QVBoxLayout(self.in_tab)
-        in_tab_layout.setContentsMargins(0, 0, 0, 0)
-        in_tab_layout.addWidget(self.in_scroll)
-        
-        warning_tab_layout = QVBoxLayout(self.warning_tab)
-        warning_tab_layout.setContentsMargins(0, 0, 0, 0)
-        warning_tab_layout.addWidget(self.warning_scroll)
-        
-        error_tab_layout = QVBoxLayout(self.error_tab)
-        error_tab_layout.setContentsMargins(0, 0, 0, 0)
-        error_tab_layout.addWidget(self.error_scroll)
+        # Create tabs with different colors, each one a virtualized URL list
+        self.in_tab = UrlStatusList("#00FF00")
+        self.warning_tab = UrlStatusList("#FFFF00")
+        self.error_tab = UrlStatusList("#FF0000")
         
         # Add tabs to tab widget with custom colors
         self.tab_widget.addTab(self.in_tab, "Done")
@@ -652,9 +964,9 @@ class DarkThemeApp(QMainWindow):
         table_label.setObjectName("data_header")
         data_layout.addWidget(table_label)
         
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(3)  # Name, Value, Description
-        self.results_table.setHorizontalHeaderLabels(["Field", "Value", "Description"])
+        self.results_model = ResultsTableModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)  # Field, Value, Description
         self.results_table.horizontalHeader().setStretchLastSection(True)
         self.results_table.setColumnWidth(0, 150)  # Set width for Field column
         self.results_table.setColumnWidth(1, 200)  # Set width for Value column
@@ -664,44 +976,42 @@ class DarkThemeApp(QMainWindow):
         # Add data analysis widget to parent layout
         parent_layout.addWidget(self.data_analysis, 2)  # 2 parts for data analysis (right side)
     
+    def show_url_queue(self, url_queue):
+        """Show the remaining URLs of a running queue in place of the input box"""
+        self.url_queue_model.set_queue(url_queue)
+        self.url_input_stack.setCurrentWidget(self.url_queue_view)
+    
+    def show_url_input(self, keep_remaining=True):
+        """Put the remaining URLs of the queue back into the editable input box"""
+        url_queue = self.url_queue_model.url_queue
+        if url_queue is not None and keep_remaining:
+            self.file_path_input.setPlainText('\n'.join(url_queue.remaining()))
+        self.url_queue_model.set_queue(None)
+        self.url_input_stack.setCurrentWidget(self.file_path_input)
+    
     def add_url_to_in_tab(self, url, num=0):
         """Add a URL to the In tab (green)"""
-        label = QLabel(url)
-        label.setObjectName("in_tab_label")
-        label.setFixedHeight(18)  # Set fixed height
-        label.setWordWrap(False)  # Prevent word wrapping
-        label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)  # Align text properly
         if num == 0:
             self.tab_widget.setTabText(0, "Done")
         else:
             self.tab_widget.setTabText(0, "Done "+str(num))
-        self.in_layout.addWidget(label)
+        self.in_tab.add_url(url)
 
     def add_url_to_warning_tab(self, url, num=0):
         """Add a URL to the Warning tab (yellow)"""
-        label = QLabel(url)
-        label.setObjectName("warning_tab_label")
-        label.setFixedHeight(18)  # Set fixed height
-        label.setWordWrap(False)  # Prevent word wrapping
-        label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)  # Align text properly
         if num == 0:
             self.tab_widget.setTabText(1, "Warning")
         else:
             self.tab_widget.setTabText(1, "Warning "+str(num))
-        self.warning_layout.addWidget(label)
+        self.warning_tab.add_url(url)
 
     def add_url_to_error_tab(self, url, num=0):
         """Add a URL to the Error tab (red)"""
-        label = QLabel(url)
-        label.setObjectName("error_tab_label")
-        label.setFixedHeight(18)  # Set fixed height
-        label.setWordWrap(False)  # Prevent word wrapping
-        label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)  # Align text properly 
         if num == 0:
             self.tab_widget.setTabText(2, "Error")
         else:
             self.tab_widget.setTabText(2, "Error "+str(num))
-        self.error_layout.addWidget(label)
+        self.error_tab.add_url(url)
             
     def select_button_by_sender(self, button):
         """
@@ -3,10 +3,14 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException
 import time
 import random
 import os
+import json
+import base64
 from selenium.webdriver.common.action_chains import ActionChains
+from urllib.parse import urlsplit
 import undetected_chromedriver as uc
 from selenium_stealth import stealth
 from seleniumbase import Driver
@@ -22,7 +26,7 @@ def load_user_agents(filepath="user-agents.txt"):
     
     return user_agents
 
-def setup_chrome_options(headless=False, user_agent=None):
+def setup_chrome_options(headless=False, user_agent=None, profile_dir=None):
     """Set up Chrome options with common settings for Cloudflare bypass"""
     options = webdriver.ChromeOptions()
     
@@ -38,7 +42,11 @@ def setup_chrome_options(headless=False, user_agent=None):
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-gpu")
-    options.add_argument("--incognito")
+    if profile_dir:
+        # Persistent profile: cookies and cache are kept between runs
+        options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    else:
+        options.add_argument("--incognito")
     options.add_argument("--disable-extensions")
     
     # Apply user agent
@@ -47,6 +55,67 @@ def setup_chrome_options(headless=False, user_agent=None):
     
     return options
 
+def add_proxy_argument(options, proxy_url=None):
+    """Route the browser through a proxy, e.g. http://host:port"""
+    if not proxy_url:
+        return
+    parts = urlsplit(proxy_url)
+    if parts.username:
+        # Chrome takes no credentials on the command line, only the base mode supports them
+        raise ValueError("Proxy credentials are only supported in base mode")
+    options.add_argument(f"--proxy-server={parts.scheme}://{parts.hostname}:{parts.port}")
+
+def enable_raw_capture(options):
+    """Let driver.get return at once and log the network events, for get_raw_html"""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.page_load_strategy = "none"
+
+def get_raw_html(driver, url, timeout=30):
+    """
+    Return the HTML the server sent for url, taken through DevTools as soon as its body is in.
+    
+    The page is not rendered nor serialized: loading stops once the document arrived.
+    Needs a driver created with raw capture (see enable_raw_capture). Returns None if the document failed.
+    """
+    driver.get_log("performance")  # Drop the events of the previous page
+    driver.get(url)
+    request_id = None
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            params = message.get("params", {})
+            if message["method"] == "Network.responseReceived" and params.get("type") == "Document" \
+                    and request_id is None:
+                request_id = params["requestId"]
+            elif params.get("requestId") == request_id and request_id is not None:
+                if message["method"] == "Network.loadingFailed":
+                    print(f"Loading failed: {params.get('errorText')}")
+                    return None
+                if message["method"] == "Network.loadingFinished":
+                    body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                    # Stop loading the scripts, styles and images of the page
+                    driver.execute_script("window.stop();")
+                    if body.get("base64Encoded"):
+                        return base64.b64decode(body["body"]).decode("utf-8", errors="replace")
+                    return body["body"]
+        time.sleep(0.05)
+    print(f"Timed out waiting for the response of {url}")
+    return None
+
+def inject_cookies(driver, cookies):
+    """Set cookies of the cookie jar through DevTools, which needs no page of their domain to be open"""
+    for cookie in cookies or []:
+        try:
+            driver.execute_cdp_cmd("Network.setCookie", cookie)
+        except Exception as e:
+            print(f"Could not set cookie {cookie.get('name')}: {str(e)}")
+
+def session_cookies(driver, url):
+    """Return the cookies the browser would send to url and the user agent it sends, for the cookie jar"""
+    cookies = driver.execute_cdp_cmd("Network.getCookies", {"urls": [url]}).get("cookies", [])
+    return cookies, driver.execute_script("return navigator.userAgent")
+
 def safe_scroll(driver, intensity="medium"):
     """Fast scroll with minimal delay - significantly shortened"""
     try:
@@ -88,20 +157,70 @@ def add_human_behavior(driver, intensity="medium"):
     if intensity != "low":
         safe_mouse_movements(driver, "low")  # Always use low intensity mouse movements
 
+# Scrolls spread over the budget with timers, so execute_script returns at once and the page can be read meanwhile
+HUMAN_BEHAVIOR_SCRIPT = """
+const budget = arguments[0], steps = arguments[1];
+for (let i = 0; i < steps; i++) {
+    setTimeout(() => {
+        window.scrollBy(0, 200 + Math.floor(Math.random() * 300));
+    }, budget * (i + Math.random()) / steps);
+}
+"""
+
+def start_human_behavior(driver, budget=2.0, intensity="medium"):
+    """
+    Start human-like behavior spread over `budget` seconds and return at once, without sleeping.
+    
+    The scrolls run in the browser while the page is read and processed. A budget of 0 scrolls once.
+    Returns the time the behavior ends, the next page should not be opened before it.
+    """
+    steps = max(1, round(budget * {"low": 1, "medium": 2, "high": 3}.get(intensity, 2)))
+    try:
+        driver.execute_script(HUMAN_BEHAVIOR_SCRIPT, budget * 1000, steps)
+        if budget > 0 and intensity != "low":
+            # One real mouse move, synthetic events would not pass as user input
+            elements = [e for e in driver.find_elements(By.CSS_SELECTOR, "a, button")[:5] if e.is_displayed()]
+            if elements:
+                ActionChains(driver).move_to_element(random.choice(elements)).perform()
+    except Exception as e:
+        print(f"Human behavior error: {str(e)}")
+    return time.time() + budget
+
+# Checked in the browser, only the matching marker comes back instead of the serialized page
+CHALLENGE_CHECK_SCRIPT = """
+const indicators = arguments[0];
+if (window._cf_chl_opt) return 'window._cf_chl_opt';
+if (document.querySelector('#challenge-form, #challenge-running, #cf-challenge-running')) return 'challenge form';
+const text = document.title + '\\n' + (document.body ? document.body.innerText.slice(0, 5000) : '');
+return indicators.find(indicator => text.includes(indicator)) || null;
+"""
+
+# Markers of the check script only a challenge page has, a text indicator can also be part of a normal page
+CONCLUSIVE_CHALLENGE_MARKERS = ("window._cf_chl_opt", "challenge form")
+
+CLOUDFLARE_INDICATORS = [
+    "Checking your browser before accessing",
+    "Just a moment",
+    "Please Wait... | Cloudflare",
+    "DDoS protection by Cloudflare",
+    "Please wait while we verify your browser"
+]
+
+def challenge_marker(driver):
+    """Return the Cloudflare marker found on the current page, or None, with a single script call"""
+    try:
+        return driver.execute_script(CHALLENGE_CHECK_SCRIPT, CLOUDFLARE_INDICATORS)
+    except Exception as e:
+        # The page is navigating, e.g. the challenge redirects to the page
+        print(f"Could not check for CloudFlare: {str(e)}")
+        return None
+
 def is_cloudflare_detected(driver):
     """Check if Cloudflare protection is detected"""
-    cloudflare_indicators = [
-        "Checking your browser before accessing",
-        "Just a moment",
-        "Please Wait... | Cloudflare",
-        "DDoS protection by Cloudflare",
-        "Please wait while we verify your browser"
-    ]
-    
-    for indicator in cloudflare_indicators:
-        if indicator in driver.page_source:
-            print(f"⚠️ CloudFlare protection detected: '{indicator}'")
-            return True
+    marker = challenge_marker(driver)
+    if marker:
+        print(f"⚠️ CloudFlare protection detected: '{marker}'")
+        return True
     return False
 
 def wait_for_cloudflare(driver, timeout=5, headless=False):
@@ -116,16 +235,9 @@ def wait_for_cloudflare(driver, timeout=5, headless=False):
         return False
     
     try:
-        cloudflare_indicators = [
-            "Checking your browser before accessing",
-            "Just a moment",
-            "Please Wait... | Cloudflare",
-            "DDoS protection by Cloudflare",
-            "Please wait while we verify your browser"
-        ]
-        
-        WebDriverWait(driver, timeout).until(
-            lambda d: not any(indicator in d.page_source for indicator in cloudflare_indicators)
+        # Every poll is one small script, the page is not serialized
+        WebDriverWait(driver, timeout, poll_frequency=0.25, ignored_exceptions=(WebDriverException,)).until(
+            lambda d: not d.execute_script(CHALLENGE_CHECK_SCRIPT, CLOUDFLARE_INDICATORS)
         )
         print("CloudFlare challenge appears to be resolved!")
         return True
@@ -133,18 +245,21 @@ def wait_for_cloudflare(driver, timeout=5, headless=False):
         print(f"Timed out waiting for CloudFlare challenge: {str(e)}")
         return False
 
-def create_driver_standard(headless=False):
+def create_driver_standard(headless=False, proxy_url=None, profile_dir=None, user_agent=None, raw_capture=False):
     """Create a standard Selenium Chrome driver"""
-    user_agents = load_user_agents()
-    user_agent = random.choice(user_agents)
-    options = setup_chrome_options(headless, user_agent)
+    if not user_agent:
+        user_agent = random.choice(load_user_agents())
+    options = setup_chrome_options(headless, user_agent, profile_dir)
+    add_proxy_argument(options, proxy_url)
+    if raw_capture:
+        enable_raw_capture(options)
     
     return webdriver.Chrome(options=options)
 
-def create_driver_undetected(headless=False):
+def create_driver_undetected(headless=False, proxy_url=None, profile_dir=None, user_agent=None, raw_capture=False):
     """Create an undetected Chrome driver"""
-    user_agents = load_user_agents()
-    user_agent = random.choice(user_agents)
+    if not user_agent:
+        user_agent = random.choice(load_user_agents())
     
     options = uc.ChromeOptions()
     if headless:
@@ -152,14 +267,22 @@ def create_driver_undetected(headless=False):
     options.add_argument("--window-size=1920,1080")
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument(f"--user-agent={user_agent}")
+    add_proxy_argument(options, proxy_url)
+    if raw_capture:
+        enable_raw_capture(options)
     
+    if profile_dir:
+        return uc.Chrome(options=options, user_data_dir=os.path.abspath(profile_dir))
     return uc.Chrome(options=options)
 
-def create_driver_stealth(headless=False):
+def create_driver_stealth(headless=False, proxy_url=None, profile_dir=None, user_agent=None, raw_capture=False):
     """Create a Selenium driver with stealth mode"""
-    user_agents = load_user_agents()
-    user_agent = random.choice(user_agents)
-    options = setup_chrome_options(headless)
+    if not user_agent:
+        user_agent = random.choice(load_user_agents())
+    options = setup_chrome_options(headless, profile_dir=profile_dir)
+    add_proxy_argument(options, proxy_url)
+    if raw_capture:
+        enable_raw_capture(options)
     
     driver = webdriver.Chrome(options=options)
     
@@ -176,20 +299,31 @@ def create_driver_stealth(headless=False):
     
     return driver
 
-def create_driver_seleniumbase(headless=False):
+def create_driver_seleniumbase(headless=False, proxy_url=None, profile_dir=None, user_agent=None, raw_capture=False):
     """Create a SeleniumBase driver with better Cloudflare bypass capabilities"""
     # Note: SeleniumBase's Driver handles many settings internally when uc=True
+    proxy = None
+    if proxy_url:
+        # SeleniumBase takes user:password@host:port, with the scheme only for socks proxies
+        parts = urlsplit(proxy_url)
+        proxy = parts.netloc if parts.scheme in ("http", "https") else f"{parts.scheme}://{parts.netloc}"
     try:
         # For best Cloudflare bypass, use uc=True for undetected-chromedriver features
         # headless=False is strongly recommended for Cloudflare bypass
-        return Driver(uc=True, incognito=True, headless=headless)
+        # Raw capture: driver.get returns at once and the network events are logged
+        capture_options = {"log_cdp_events": True, "page_load_strategy": "none"} if raw_capture else {}
+        if profile_dir:
+            # Persistent profile instead of incognito, keeps the clearance cookies
+            return Driver(uc=True, headless=headless, proxy=proxy, agent=user_agent,
+                          user_data_dir=os.path.abspath(profile_dir), **capture_options)
+        return Driver(uc=True, incognito=True, headless=headless, proxy=proxy, agent=user_agent, **capture_options)
     except Exception as e:
         print(f"Error creating SeleniumBase driver: {str(e)}")
         # Fallback to undetected_chromedriver
         print("Falling back to undetected_chromedriver...")
-        return create_driver_undetected(headless)
+        return create_driver_undetected(headless, proxy_url, profile_dir, user_agent, raw_capture)
 
-def bypass_cloudflare_with_seleniumbase(url, headless=False, reconnect_time=6):
+def bypass_cloudflare_with_seleniumbase(url, headless=False, reconnect_time=6, cookie_jar=None):
     """
     Use SeleniumBase's specialized methods to bypass Cloudflare protection
     
@@ -197,6 +331,7 @@ def bypass_cloudflare_with_seleniumbase(url, headless=False, reconnect_time=6):
         url: URL to scrape
         headless: Whether to run in headless mode (not recommended for Cloudflare bypass)
         reconnect_time: Time to reconnect, giving browser time to handle JS challenge
+        cookie_jar: Optional CookieJar that receives the clearance cookies of a successful bypass
         
     Returns:
         Tuple of (HTML source, driver) or (None, driver) if failed
@@ -225,6 +360,14 @@ def bypass_cloudflare_with_seleniumbase(url, headless=False, reconnect_time=6):
             print("Failed to bypass Cloudflare challenge")
             return None, driver
         
+        # Keep the clearance for other sessions, of any engine
+        if cookie_jar is not None:
+            try:
+                cookies, user_agent = session_cookies(driver, url)
+                print(f"Stored {cookie_jar.store(user_agent, cookies)} cookies in the cookie jar")
+            except Exception as e:
+                print(f"Could not store the cookies: {str(e)}")
+        
         # Successfully bypassed - return the HTML
         html_source = driver.page_source
         print("Successfully obtained page content after Cloudflare")
@@ -263,7 +406,7 @@ def get_html_with_driver(driver, url, headless=False, human_behavior=True, behav
         return None, None
 
 def getHtmlAdvanced(url, method="seleniumbase", headless=False, human_behavior=True, 
-                    behavior_intensity="medium", auto_close_driver=True, reconnect_time=6):
+                    behavior_intensity="medium", auto_close_driver=True, reconnect_time=6, cookie_jar=None):
     """
     Extract HTML source using the specified method, with improved Cloudflare bypass
     
@@ -275,6 +418,7 @@ def getHtmlAdvanced(url, method="seleniumbase", headless=False, human_behavior=T
         behavior_intensity: Intensity of human behavior (low, medium, high)
         auto_close_driver: Whether to automatically close the driver after scraping
         reconnect_time: For seleniumbase method, time to reconnect for JS challenge
+        cookie_jar: For seleniumbase method, optional CookieJar that receives the clearance cookies
         
     Returns:
         HTML source (or None if Cloudflare is detected and not bypassed)
@@ -284,7 +428,7 @@ def getHtmlAdvanced(url, method="seleniumbase", headless=False, human_behavior=T
         # If using SeleniumBase with its specialized Cloudflare bypass methods
         if method == "seleniumbase":
             print("Using SeleniumBase with specialized Cloudflare bypass methods")
-            html, driver = bypass_cloudflare_with_seleniumbase(url, headless, reconnect_time)
+            html, driver = bypass_cloudflare_with_seleniumbase(url, headless, reconnect_time, cookie_jar)
             if html:
                 print("Successfully bypassed Cloudflare using SeleniumBase specialized methods")
                 return html
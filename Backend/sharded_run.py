@@ -0,0 +1,407 @@
+"""
+Sharded runs: one scrape split over several processes.
+
+A run drives a single browser, so on a large URL list most of the machine
+sits idle. A sharded run starts several shard processes, each running its own
+ScrapePipeline (its own browser engine, plugins and output files) on a part
+of the URLs. The launcher feeds the shards from the UrlQueue of the run and
+relays their statuses and plugin results, so the GUI keeps a single progress
+view and remaining list. When every shard is done, the CSV files the shards
+wrote for each plugin are merged into the usual output file.
+
+URLs are split by a hash of their canonical host ("domain": all requests to
+a site come from one process, so one shard's pauses on a blocked site do not
+slow down the others) or of the whole canonical URL ("hash": an even split
+when a few sites hold most of the URLs). Either way a canonical URL always
+goes to the same shard, so every shard can deduplicate its URLs on its own.
+Follow-up URLs found by a plugin are scraped by the shard that found them.
+
+Usage, without the GUI:
+    python sharded_run.py urls.txt --processes 8 --plugin carmarker_seller_cards.py
+"""
+
+import argparse
+import csv
+import hashlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from plugin_runner import PluginRunner
+from recrawl_scheduler import RECRAWL_BUDGETS, RecrawlScheduler
+from url_dedup import FRESHNESS_WINDOWS, UrlDeduplicator, UrlHistory, canonicalize_url
+from url_queue import UrlQueue
+from url_sources import open_url_source
+
+SHARD_BY = ("domain", "hash")
+
+# URLs sent ahead to each shard, enough to keep its engine busy without holding the list in memory
+SHARD_QUEUE_SIZE = 100
+
+# URLs the launcher holds back for shards whose queue is full, so the URLs of the other shards go on
+DISPATCH_BACKLOG = 10000
+
+# URLs after which the launcher warns if they all went to one shard
+ONE_SHARD_WARNING_URLS = 1000
+
+# Options of a headless run, the defaults of the GUI
+DEFAULT_OPTIONS = {
+    "Selenium Mode": "standard",
+    "Ulixee Hero Mode": None,
+    "Playwright": None,
+    "Human Behavior": "false",
+    "Headless": "true",
+    "Behavior Intensity": "medium",
+    "HTML Parser": "lxml",
+    "Skip Fetched": "false",
+    "Revalidate": "false",
+    "Crawl Depth": "0",
+    "Recrawl Order": "input",
+    "Recrawl Budget": "all",
+    "Proxies": "false",
+    "Profiles": "false",
+    "Cookie Jar": "false",
+    "Capture": "rendered",
+}
+
+
+def parse_options(pairs: List[str]) -> Dict[str, Optional[str]]:
+    """Return the options of a headless run, the GUI defaults updated with "Name=value" pairs"""
+    options = dict(DEFAULT_OPTIONS)
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        options[name.strip()] = value.strip()
+    return options
+
+
+def shard_for(url: str, shard_count: int, shard_by: str = "domain") -> int:
+    """Return the shard (0 to shard_count - 1) that scrapes a URL"""
+    key = canonicalize_url(url)
+    if shard_by == "domain":
+        key = urlsplit(key).hostname or key
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shard_count
+
+
+def _run_shard(shard_index, options, timeout_value, plugin_files, output_dir, html_dir,
+               url_input, events, stop_event):
+    """Entry point of a shard process: scrape the URLs the launcher sends until it sends None"""
+    from scrape_pipeline import ScrapePipeline
+
+    def send_status(status, url):
+        events.put(("status", shard_index, status, url))
+
+    def send_results(summaries):
+        # Field types can be enums of plugin modules loaded in this process only, send their names
+        events.put(("results", shard_index, [
+            summary._replace(field_type=getattr(summary.field_type, 'name', summary.field_type))
+            for summary in summaries
+        ], None))
+
+    pipeline = ScrapePipeline(options, UrlQueue(iter(url_input.get, None)), timeout_value,
+                              plugin_files=plugin_files, status_callback=send_status,
+                              results_callback=send_results, output_dir=output_dir, html_dir=html_dir)
+    pipeline.history_part_offset = shard_index * UrlHistory.PARTS_PER_WRITER
+    pipeline.reorder_urls = False
+
+    def stop_when_asked():
+        # Polled, a process that exits while waiting on the event would block the launcher setting it
+        while not stop_event.is_set():
+            time.sleep(0.5)
+        pipeline.stop_execution = True
+
+    threading.Thread(target=stop_when_asked, daemon=True).start()
+    try:
+        pipeline.run()
+    finally:
+        events.put(("done", shard_index, None, None))
+
+
+def merge_shards(shard_root: str, output_file: Optional[str] = None, output_dir: str = "scraped_data",
+                 timestamp: Optional[int] = None) -> List[str]:
+    """
+    Merge the CSV files the shards of a run wrote for each plugin into one file per plugin.
+
+    Shards whose files have different columns (plugins without declared fields)
+    are merged under the union of their headers, missing cells stay empty.
+
+    Args:
+        shard_root: Directory holding one sub-directory per shard
+        output_file: Optional custom CSV path, named like the output of a single process run
+        output_dir: Directory for the default timestamped CSV files
+        timestamp: Timestamp of the default file names, now if not given
+
+    Returns:
+        Paths of the merged CSV files
+    """
+    shard_files: Dict[str, List[str]] = {}
+    for shard_name in sorted(os.listdir(shard_root)):
+        shard_dir = os.path.join(shard_root, shard_name)
+        if not os.path.isdir(shard_dir):
+            continue
+        for file_name in sorted(os.listdir(shard_dir)):
+            if file_name.endswith('.csv'):
+                # Shard files are named <timestamp>_<plugin>.csv
+                plugin_name = os.path.splitext(file_name.partition('_')[2])[0]
+                shard_files.setdefault(plugin_name, []).append(os.path.join(shard_dir, file_name))
+
+    timestamp = timestamp or int(time.time())
+    merged_paths = []
+    for plugin_name, paths in shard_files.items():
+        fieldnames = []
+        for path in paths:
+            with open(path, newline='', encoding='utf-8') as f:
+                for name in next(csv.reader(f), []):
+                    if name not in fieldnames:
+                        fieldnames.append(name)
+
+        csv_path = PluginRunner._csv_path_for(f"{plugin_name}.py", timestamp, output_file, output_dir,
+                                              len(shard_files) > 1)
+        rows = 0
+        with open(csv_path, 'a', newline='', encoding='utf-8') as merged:
+            writer = csv.DictWriter(merged, fieldnames, restval='')
+            if merged.tell() == 0:
+                writer.writeheader()
+            for path in paths:
+                with open(path, newline='', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        writer.writerow(row)
+                        rows += 1
+        print(f"> Merged {rows} rows of {len(paths)} shards to: {csv_path}")
+        merged_paths.append(csv_path)
+    return merged_paths
+
+
+class ShardedRun:
+    """
+    Scrapes the URLs of a queue in several shard processes and merges their output.
+
+    Has the same run(), url_queue, stop_execution and is_suspended as
+    ScrapePipeline, so the GUI's worker runs either one.
+    """
+
+    def __init__(self, options, url_queue, timeout_value, processes, shard_by="domain", output_file=None,
+                 plugin_files=None, status_callback=None, results_callback=None,
+                 output_dir="scraped_data", html_dir="scraped_html"):
+        """
+        Args:
+            options: Selected option per GUI option row
+            url_queue: UrlQueue of the run, URLs stay in it until a shard reports them successful
+            timeout_value: Seconds a shard pauses after an error or a block
+            processes: Number of shard processes
+            shard_by: "domain" or "hash", see shard_for
+            output_file: Optional custom CSV path for the merged plugin results
+            plugin_files: Plugins applied to every page, empty to only download HTML
+            status_callback: Called with (status, url) for every URL of every shard: 0=success, 1=warning, 2=error
+            results_callback: Called with the ColumnSummary list of every batch a shard wrote
+            output_dir: Directory for the merged CSV files, the shard files go in a sub-directory
+            html_dir: Directory the shards save the HTML of every page to, one sub-directory per shard
+        """
+        self.options = options
+        self.url_queue = url_queue if isinstance(url_queue, UrlQueue) else UrlQueue(url_queue)
+        self.timeout_seconds = timeout_value
+        self.processes = max(1, int(processes))
+        self.shard_by = shard_by if shard_by in SHARD_BY else "domain"
+        self.custom_output_file = output_file
+        self.plugin_files = plugin_files or []
+        self.status_callback = status_callback
+        self.results_callback = results_callback
+        self.output_dir = output_dir
+        self.html_dir = html_dir
+        self.stop_execution = False    # Flag to stop every shard
+        self.is_suspended = False      # Shards pause and resume by themselves, kept for the GUI
+        self._done_shards = set()      # Shards whose process has finished, they take no more URLs
+
+    def run(self):
+        """Scrape every URL of the queue in the shard processes, returns when all of them are done"""
+        # Spawned, so each shard starts a clean interpreter instead of a copy of the GUI
+        context = multiprocessing.get_context("spawn")
+        timestamp = int(time.time())
+        shard_root = os.path.join(self.output_dir, f"shards_{timestamp}")
+        events = context.Queue()
+        stop_event = context.Event()
+        inputs = [context.Queue(SHARD_QUEUE_SIZE) for _ in range(self.processes)]
+
+        # The priority order is worked out once for the whole run, before the URLs are split
+        if self.options.get("Recrawl Order") == "priority":
+            scheduler = RecrawlScheduler()
+            try:
+                self.url_queue.reorder(scheduler.order)
+            finally:
+                scheduler.close()
+            print(f"> Ordered {self.url_queue.remaining_count()} URLs by recrawl priority")
+            budget = RECRAWL_BUDGETS.get(self.options.get("Recrawl Budget"))
+            if budget is not None:
+                self.url_queue.take_limit = budget
+                print(f"> Scraping the first {budget} of them, the others wait for the next run")
+
+        # Skipped URLs leave the remaining list here, the shards never see them
+        deduplicator = UrlDeduplicator()
+        freshness_window = FRESHNESS_WINDOWS.get(self.options.get("Skip Fetched"))
+        if freshness_window:
+            deduplicator.history = UrlHistory(window_seconds=freshness_window)
+        self.url_queue.url_filter = deduplicator.accept
+
+        print(f"\n> Scraping in {self.processes} processes, URLs split by {self.shard_by}")
+        shards = []
+        for shard_index, url_input in enumerate(inputs):
+            shard = context.Process(
+                target=_run_shard, name=f"shard-{shard_index}",
+                args=(shard_index, self.options, self.timeout_seconds, self.plugin_files,
+                      os.path.join(shard_root, f"shard_{shard_index}"),
+                      os.path.join(self.html_dir, f"shard_{shard_index}"),
+                      url_input, events, stop_event))
+            shard.start()
+            shards.append(shard)
+
+        dispatcher = threading.Thread(target=self._dispatch, args=(inputs,), daemon=True)
+        dispatcher.start()
+        try:
+            self._relay_events(events, shards, stop_event)
+        finally:
+            stop_event.set()
+            for shard in shards:
+                shard.join(5)
+                if shard.is_alive():
+                    shard.terminate()
+            dispatcher.join(5)
+            self.url_queue.url_filter = None
+            if deduplicator.duplicates or deduplicator.recently_fetched:
+                print(f"\n> Skipped {deduplicator.duplicates} duplicate and "
+                      f"{deduplicator.recently_fetched} recently fetched URLs")
+
+        if os.path.isdir(shard_root):
+            try:
+                merge_shards(shard_root, self.custom_output_file, self.output_dir, timestamp)
+            except Exception as e:
+                print(f"> Error merging shard results, they are kept in {shard_root}: {str(e)}")
+
+    def _dispatch(self, inputs):
+        """
+        Send the URLs of the queue to their shards, then tell every shard there are no more.
+
+        A shard whose queue is full gets its next URLs held back in a backlog, while the
+        URLs of the other shards keep going, up to DISPATCH_BACKLOG URLs held back in all.
+        """
+        backlogs = [deque() for _ in inputs]
+        backlog_size = 0
+        dispatched = 0
+        shards_used = set()
+        exhausted = False
+        try:
+            while not self.stop_execution and len(self._done_shards) < len(inputs):
+                # Hand the held back URLs to the shards that have room again
+                for shard_index, backlog in enumerate(backlogs):
+                    if shard_index in self._done_shards:
+                        # A URL of a shard that stopped early stays in the remaining list
+                        backlog_size -= len(backlog)
+                        backlog.clear()
+                    while backlog:
+                        try:
+                            inputs[shard_index].put_nowait(backlog[0])
+                        except queue.Full:
+                            break
+                        backlog.popleft()
+                        backlog_size -= 1
+
+                if exhausted or backlog_size >= DISPATCH_BACKLOG:
+                    if not backlog_size and exhausted:
+                        break
+                    # Every shard with URLs to take is busy
+                    time.sleep(0.1)
+                    continue
+
+                url = self.url_queue.take()
+                if url is None:
+                    exhausted = True
+                    continue
+                shard_index = shard_for(url, len(inputs), self.shard_by)
+                backlogs[shard_index].append(url)
+                backlog_size += 1
+
+                dispatched += 1
+                shards_used.add(shard_index)
+                if dispatched == ONE_SHARD_WARNING_URLS and len(shards_used) == 1 and len(inputs) > 1:
+                    print(f"> The first {dispatched} URLs all went to one process, most likely a single site "
+                          f"with Shard By {self.shard_by}. Shard By hash spreads them over every process")
+        finally:
+            for shard_index, url_input in enumerate(inputs):
+                while shard_index not in self._done_shards:
+                    try:
+                        url_input.put(None, timeout=0.5)
+                        break
+                    except queue.Full:
+                        if self.stop_execution:
+                            # The shard stops by itself, it is not waiting for more URLs
+                            break
+
+    def _relay_events(self, events, shards, stop_event):
+        """Pass the statuses and results of the shards on until every shard is done"""
+        while len(self._done_shards) < len(shards):
+            if self.stop_execution:
+                stop_event.set()
+            try:
+                kind, shard_index, first, second = events.get(timeout=0.5)
+            except queue.Empty:
+                # A shard that crashed before it could say it is done
+                for shard_index, shard in enumerate(shards):
+                    if shard.exitcode is not None and shard_index not in self._done_shards:
+                        print(f"> Shard {shard_index} exited with code {shard.exitcode}")
+                        self._done_shards.add(shard_index)
+                continue
+
+            if kind == "status":
+                if first == 0:
+                    self.url_queue.complete(second)
+                if self.status_callback is not None:
+                    self.status_callback(first, second)
+            elif kind == "results":
+                if self.results_callback is not None:
+                    self.results_callback(first)
+            elif kind == "done":
+                self._done_shards.add(shard_index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape a URL list in several processes, without the GUI")
+    parser.add_argument("url_file", help="Text file with one URL per line, or a CSV file with a url column")
+    parser.add_argument("-p", "--processes", type=int, default=os.cpu_count() or 1, help="Number of shard processes")
+    parser.add_argument("--shard-by", choices=SHARD_BY, default="domain", help="Split the URLs by site or evenly")
+    parser.add_argument("--plugin", action="append", default=[],
+                        help="Plugin file inside the Plugins directory, can be given several times")
+    parser.add_argument("-o", "--output", help="Custom CSV path for the plugin results")
+    parser.add_argument("--timeout", type=int, default=30, help="Seconds to pause after an error or a block")
+    parser.add_argument("--option", action="append", default=[], metavar="NAME=VALUE",
+                        help='Option as named in the GUI, e.g. "Selenium Mode=undetected"')
+    args = parser.parse_args()
+
+    options = parse_options(args.option)
+
+    counts = [0, 0, 0]  # Successes, warnings, errors
+    last_report = [time.time()]
+    url_queue = UrlQueue(open_url_source(args.url_file))
+
+    def report(status, url):
+        counts[status] += 1
+        if time.time() - last_report[0] >= 10:
+            last_report[0] = time.time()
+            print(f"> Progress: {counts[0]} done, {counts[1]} warnings, {counts[2]} errors, "
+                  f"{url_queue.remaining_count()} remaining")
+
+    run = ShardedRun(options, url_queue, args.timeout, args.processes, args.shard_by, args.output,
+                     args.plugin, status_callback=report)
+    try:
+        run.run()
+    except KeyboardInterrupt:
+        run.stop_execution = True
+    print(f"> Finished: {counts[0]} done, {counts[1]} warnings, {counts[2]} errors, "
+          f"{url_queue.remaining_count()} remaining")
+
+
+if __name__ == "__main__":
+    main()
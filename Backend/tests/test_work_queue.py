@@ -0,0 +1,89 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from work_queue import MAX_ATTEMPTS, Coordinator, LeaseQueue, QueueClient
+
+URL = "https://www.cardmarket.com/en/Magic/Users/Seller/Offers/Singles"
+
+
+class CoordinatorQueueTest(unittest.TestCase):
+    """A LeaseQueue served by a local coordinator, used by two workers."""
+
+    LEASE_SECONDS = 0.05
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.queue = LeaseQueue(os.path.join(self.directory, "crawl.sqlite"))
+        self.coordinator = Coordinator(self.queue, port=0)
+        threading.Thread(target=self.coordinator.serve_forever, daemon=True).start()
+        self.client = QueueClient(*self.coordinator.server_address)
+
+    def tearDown(self):
+        self.client.close()
+        self.coordinator.shutdown()
+        self.coordinator.server_close()
+        self.queue.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def lease_and_expire(self, worker):
+        leased = self.client.lease(worker, 10, self.LEASE_SECONDS)
+        time.sleep(self.LEASE_SECONDS * 2)
+        return leased
+
+    def test_listens_locally_by_default(self):
+        self.assertEqual(self.coordinator.server_address[0], "127.0.0.1")
+
+    def test_expired_lease_goes_to_another_worker(self):
+        self.assertEqual(self.client.add([URL]), 1)
+        self.assertEqual(self.lease_and_expire("worker-a")[0][0], URL)
+
+        leased = self.client.lease("worker-b", 10)
+        self.assertEqual([task[0] for task in leased], [URL])
+        self.assertEqual(self.client.counts()["leased"], 1)
+
+    def test_heartbeat_keeps_the_lease(self):
+        self.client.add([URL])
+        self.client.lease("worker-a", 10, self.LEASE_SECONDS)
+        self.assertEqual(self.client.heartbeat("worker-a", 60), 1)
+        time.sleep(self.LEASE_SECONDS * 2)
+        self.assertEqual(self.client.lease("worker-b", 10), [])
+
+    def test_expired_leases_are_given_up_after_max_attempts(self):
+        self.client.add([URL])
+        for attempt in range(MAX_ATTEMPTS):
+            self.assertEqual(len(self.lease_and_expire(f"worker-{attempt}")), 1)
+
+        self.assertEqual(self.client.lease("worker-last", 10), [])
+        self.assertEqual(self.client.counts()["failed"], 1)
+
+    def test_failed_url_is_requeued_then_given_up(self):
+        self.client.add([URL])
+        states = []
+        for attempt in range(MAX_ATTEMPTS):
+            self.assertEqual(len(self.client.lease("worker-a", 10)), 1)
+            states.append(self.client.fail("worker-a", URL, "error"))
+        self.assertEqual(states, ["pending"] * (MAX_ATTEMPTS - 1) + ["failed"])
+
+    def test_release_does_not_count_as_attempt(self):
+        self.client.add([URL])
+        for _ in range(MAX_ATTEMPTS + 1):
+            self.assertEqual(len(self.client.lease("worker-a", 10)), 1)
+            self.assertEqual(self.client.release("worker-a"), 1)
+        self.assertEqual(self.client.counts()["pending"], 1)
+
+    def test_completed_url_is_not_leased_again(self):
+        self.client.add([URL, URL + "?page=2"])
+        leased = self.client.lease("worker-a", 10)
+        self.assertEqual(self.client.complete("worker-a", [task[0] for task in leased]), 2)
+        self.assertEqual(self.client.counts(), {"pending": 0, "leased": 0, "done": 2, "failed": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,285 @@
+"""
+URL canonicalization and deduplication.
+
+Trivially different spellings of the same page (http vs https, upper case
+host, default port, tracking parameters, parameter order, trailing slash,
+fragment) are reduced to one canonical form before anything is fetched:
+
+- Within a run, every canonical URL is fetched once (an in-memory hash set).
+- Across runs, URLs fetched successfully are recorded in a persistent Bloom
+  filter, and URLs fetched within a freshness window (e.g. the last 7 days)
+  can be skipped. The history is split into one filter per time bucket (a
+  day by default), so old fetches expire by deleting whole bucket files.
+
+The Bloom filter never forgets a recorded URL but may, with a small
+configurable probability, report a URL that was not fetched. Such a URL is
+skipped until its bucket leaves the window.
+"""
+
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from and never change the page
+TRACKING_PARAMETERS = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "ref_src", "spm",
+}
+TRACKING_PARAMETER_PREFIXES = ("utm_",)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Freshness windows offered in the GUI
+FRESHNESS_WINDOWS = {
+    "1 day": 86400,
+    "7 days": 7 * 86400,
+    "30 days": 30 * 86400,
+}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Return the canonical form of a URL, used as its identity for deduplication.
+
+    The scheme is normalized to https, the host is lower-cased and stripped of
+    a default port, tracking parameters and the fragment are removed, the
+    remaining query parameters are sorted and a trailing slash is dropped.
+    The result is only a key: the URL fetched is still the original one.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+
+    host = (parts.hostname or "").rstrip(".")
+    netloc = host
+    if parts.port and parts.port not in (_DEFAULT_PORTS.get(parts.scheme.lower()), _DEFAULT_PORTS.get(scheme)):
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        credentials = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{credentials}@{netloc}"
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMETERS and not key.lower().startswith(TRACKING_PARAMETER_PREFIXES)
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def url_digest(url: str) -> bytes:
+    """Return a 16-byte hash of the canonical form of a URL"""
+    return hashlib.blake2b(canonicalize_url(url).encode("utf-8"), digest_size=16).digest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte digests, using double hashing."""
+
+    _HEADER = struct.Struct("<4sQII")  # magic, number of bits, number of hashes, number of items
+    _MAGIC = b"BLM1"
+
+    def __init__(self, capacity: int = 500000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.bit_count = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.bit_count / capacity * math.log(2))))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: bytes):
+        first, second = struct.unpack("<QQ", digest)
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.bit_count
+
+    def add(self, digest: bytes):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    def save(self, path: str):
+        """Write the filter atomically, so an interrupted save never leaves a broken file"""
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self._HEADER.pack(self._MAGIC, self.bit_count, self.hash_count, self.count))
+            f.write(self.bits)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BloomFilter":
+        with open(path, "rb") as f:
+            magic, bit_count, hash_count, count = cls._HEADER.unpack(f.read(cls._HEADER.size))
+            if magic != cls._MAGIC:
+                raise ValueError(f"{path} is not a Bloom filter file")
+            bloom = cls.__new__(cls)
+            bloom.bit_count = bit_count
+            bloom.hash_count = hash_count
+            bloom.count = count
+            bloom.bits = bytearray(f.read())
+            # Capacity is not stored, derive it back from the filter size
+            bloom.capacity = max(1, int(bit_count * math.log(2) / hash_count))
+        return bloom
+
+
+class UrlHistory:
+    """
+    Persistent record of the URLs fetched within a freshness window.
+
+    Each time bucket (a day by default) has its own Bloom filters, stored as
+    bloom_<bucket start>_<part>.bin in the history directory. A URL is
+    considered fresh if any bucket inside the window contains it. Buckets
+    that left the window are deleted when the history is loaded or saved.
+
+    Several processes can share a history directory: each one writes only its
+    own parts, numbered from its `part_offset`, and reads everyone's.
+    """
+
+    # Part numbers reserved for each writer
+    PARTS_PER_WRITER = 1000
+
+    def __init__(self, directory: str = "url_history", window_seconds: int = 7 * 86400,
+                 bucket_seconds: int = 86400, capacity: int = 500000, error_rate: float = 0.001,
+                 part_offset: int = 0):
+        self.directory = directory
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.part_offset = part_offset
+        self._lock = threading.Lock()
+        self.buckets: Dict[int, List[BloomFilter]] = {}
+        self._own_parts: Dict[int, List[BloomFilter]] = {}  # The parts this writer adds to and saves
+        self._dirty_buckets = set()
+        self.load()
+
+    def _current_bucket(self) -> int:
+        now = int(time.time())
+        return now - now % self.bucket_seconds
+
+    def _oldest_fresh_bucket(self) -> int:
+        return self._current_bucket() - self.window_seconds + self.bucket_seconds
+
+    def _bucket_path(self, bucket: int, part: int) -> str:
+        return os.path.join(self.directory, f"bloom_{bucket}_{part}.bin")
+
+    def _bucket_files(self):
+        """Yield (bucket, part, path) for every filter file in the directory"""
+        for file_name in os.listdir(self.directory):
+            if not (file_name.startswith("bloom_") and file_name.endswith(".bin")):
+                continue
+            try:
+                bucket, part = (int(value) for value in file_name[len("bloom_"):-len(".bin")].split("_"))
+            except ValueError:
+                continue
+            yield bucket, part, os.path.join(self.directory, file_name)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Already removed by another process sharing the history
+
+    def load(self):
+        """Load the buckets inside the window and delete the expired ones"""
+        if not os.path.isdir(self.directory):
+            return
+        oldest = self._oldest_fresh_bucket()
+        own_parts = range(self.part_offset, self.part_offset + self.PARTS_PER_WRITER)
+        for bucket, part, path in sorted(self._bucket_files()):
+            if bucket < oldest:
+                self._remove(path)
+                continue
+            try:
+                bloom = BloomFilter.load(path)
+            except Exception as e:
+                print(f"> Ignoring unreadable URL history file {path}: {str(e)}")
+                continue
+            self.buckets.setdefault(bucket, []).append(bloom)
+            if part in own_parts:
+                self._own_parts.setdefault(bucket, []).append(bloom)
+        fetched = sum(bloom.count for blooms in self.buckets.values() for bloom in blooms)
+        print(f"> Loaded URL history: {fetched:,} fetches within the last {self.window_seconds // 86400} days")
+
+    def contains_digest(self, digest: bytes) -> bool:
+        oldest = self._oldest_fresh_bucket()
+        with self._lock:
+            return any(digest in bloom
+                       for bucket, blooms in self.buckets.items() if bucket >= oldest
+                       for bloom in blooms)
+
+    def __contains__(self, url: str) -> bool:
+        return self.contains_digest(url_digest(url))
+
+    def add(self, url: str):
+        """Record a successful fetch of a URL in the current bucket"""
+        digest = url_digest(url)
+        bucket = self._current_bucket()
+        with self._lock:
+            blooms = self._own_parts.setdefault(bucket, [])
+            if not blooms or blooms[-1].is_full:
+                # Start a new part rather than let the false positive rate grow
+                blooms.append(BloomFilter(self.capacity, self.error_rate))
+                self.buckets.setdefault(bucket, []).append(blooms[-1])
+            blooms[-1].add(digest)
+            self._dirty_buckets.add(bucket)
+
+    def save(self):
+        """Write the buckets changed in this run and drop the expired ones"""
+        oldest = self._oldest_fresh_bucket()
+        with self._lock:
+            if self._dirty_buckets and not os.path.exists(self.directory):
+                os.makedirs(self.directory, exist_ok=True)
+            for bucket in self._dirty_buckets:
+                for part, bloom in enumerate(self._own_parts[bucket], self.part_offset):
+                    bloom.save(self._bucket_path(bucket, part))
+            self._dirty_buckets.clear()
+            expired = [bucket for bucket in self.buckets if bucket < oldest]
+            if expired and os.path.isdir(self.directory):
+                for bucket, _, path in list(self._bucket_files()):
+                    if bucket < oldest:
+                        self._remove(path)
+            for bucket in expired:
+                del self.buckets[bucket]
+                self._own_parts.pop(bucket, None)
+
+
+class UrlDeduplicator:
+    """
+    Decides which URLs of a run are fetched: each canonical URL once per run,
+    and none that the optional history saw within its freshness window.
+    """
+
+    def __init__(self, history: Optional[UrlHistory] = None):
+        self.history = history
+        self.seen = set()  # 8-byte prefixes of the canonical URL digests
+        self.duplicates = 0
+        self.recently_fetched = 0
+
+    def accept(self, url: str) -> bool:
+        digest = url_digest(url)
+        key = digest[:8]
+        if key in self.seen:
+            self.duplicates += 1
+            print(f"> Skipping duplicate URL: {url}")
+            return False
+        self.seen.add(key)
+        if self.history is not None and self.history.contains_digest(digest):
+            self.recently_fetched += 1
+            print(f"> Skipping recently fetched URL: {url}")
+            return False
+        return True
@@ -0,0 +1,218 @@
+"""
+Queue of the URLs waiting to be scraped in a run.
+
+The worker thread takes URLs from the queue one at a time and reports the
+successful ones, while the GUI shows the remaining URLs as a view of the same
+queue. URLs that fail stay in the queue, so after the run (or a cancel) the
+remaining list is exactly what still has to be scraped, in the original order.
+
+The queue reads its URLs lazily from any iterable, e.g. a UrlSource streaming
+a file from disk, so a list of millions of URLs is never held in memory.
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Optional
+
+# URLs a view may read from the source ahead of the worker, the ones past them are shown as UNREAD_URL
+VIEW_READ_AHEAD = 1000
+UNREAD_URL = "…"
+
+
+class UrlQueue:
+    """
+    Thread-safe queue of the URLs of one run.
+
+    The remaining URLs are, in order: the ones that were taken but did not
+    succeed, the ones being processed, and the ones not taken yet. Taking the
+    next URL and completing the current one are O(1), whatever the size of
+    the run.
+    """
+
+    def __init__(self, urls: Iterable[str] = (), total: Optional[int] = None,
+                 url_filter: Optional[Callable[[str], bool]] = None):
+        """
+        Args:
+            urls: URLs of the run, read lazily when they are needed
+            total: Number of URLs if known, e.g. from a line count, used until the source is exhausted
+            url_filter: Optional function returning False for URLs to skip, e.g. UrlDeduplicator.accept
+        """
+        self._lock = threading.Lock()
+        self._source = iter(urls)
+        self._read_count = 0
+        self._pending = deque()  # Read from the source but not taken yet
+        self._retained = []  # Taken but not completed, e.g. errors and warnings
+        self._current = None
+        self._taken = {}  # Taken with take() and not completed, in the order they were taken
+        self.url_filter = url_filter
+        self.skipped = 0  # URLs dropped by the filter, no longer part of the remaining list
+        self.take_limit = None  # URLs handed out at most, e.g. a recrawl budget, the others stay remaining
+        self._handed_out = 0
+        if total is None:
+            if hasattr(urls, '__len__'):
+                total = len(urls)
+            elif callable(getattr(urls, 'count', None)):
+                # A UrlSource, counted without reading its URLs
+                total = urls.count()
+        self.total = total or 0
+        # Incremented on every change so views can skip refreshing an unchanged queue
+        self.version = 0
+
+    def _read_ahead(self, count: int):
+        """Move up to `count` more URLs from the source into the pending buffer (lock held)"""
+        while count > 0 and self._source is not None:
+            url = next(self._source, None)
+            if url is None:
+                # Source exhausted, the number of URLs is now exact
+                self._source = None
+                self.total = self._read_count
+                self.version += 1
+                break
+            self._pending.append(url)
+            self._read_count += 1
+            count -= 1
+
+    def _unread_count(self) -> int:
+        if self._source is None:
+            return 0
+        return max(self.total - self._read_count, 0)
+
+    def next(self) -> Optional[str]:
+        """
+        Take the next URL to process, or None when the queue is exhausted.
+
+        A previously taken URL that was not completed is kept in the remaining list.
+        URLs rejected by the filter are skipped and leave the remaining list.
+        """
+        with self._lock:
+            if self._current is not None:
+                self._retained.append(self._current)
+            self._current = self._take_pending()
+            self.version += 1
+            return self._current
+
+    def take(self) -> Optional[str]:
+        """
+        Take the next URL while others are still being processed, or None when the queue is exhausted.
+
+        Every taken URL stays in the remaining list until it is completed, so
+        several workers can process URLs of the same queue at once.
+        """
+        with self._lock:
+            url = self._take_pending()
+            if url is not None:
+                self._taken[url] = None
+            self.version += 1
+            return url
+
+    def _take_pending(self) -> Optional[str]:
+        """Pop the next URL accepted by the filter (lock held)"""
+        if self.take_limit is not None and self._handed_out >= self.take_limit:
+            return None
+        while True:
+            if not self._pending:
+                self._read_ahead(1)
+            if not self._pending:
+                return None
+            url = self._pending.popleft()
+            if self.url_filter is None or self.url_filter(url):
+                self._handed_out += 1
+                return url
+            self.skipped += 1
+            # Not part of the run any more, and no longer counted as read so the unread estimate holds
+            self.total -= 1
+            self._read_count -= 1
+
+    def extend(self, urls: Iterable[str]):
+        """Add URLs found during the run, taken before the URLs not read from the source yet"""
+        with self._lock:
+            added = len(self._pending)
+            self._pending.extend(urls)
+            added = len(self._pending) - added
+            # Counted as read, so the estimate of the unread URLs stays right
+            self._read_count += added
+            self.total += added
+            self.version += 1
+
+    def reorder(self, order: Callable[[List[str]], List[str]]):
+        """
+        Put the URLs not taken yet in a new order, e.g. RecrawlScheduler.order.
+
+        The whole source is read, so this gives up streaming for the run.
+        """
+        with self._lock:
+            while self._source is not None:
+                self._read_ahead(10000)
+            self._pending = deque(order(list(self._pending)))
+            self.version += 1
+
+    def complete(self, url: str):
+        """Remove a successfully processed URL from the remaining list"""
+        with self._lock:
+            if self._current == url:
+                self._current = None
+                self.version += 1
+            elif url in self._taken:
+                del self._taken[url]
+                self.version += 1
+
+    def remaining_count(self) -> int:
+        with self._lock:
+            return (len(self._retained) + len(self._taken) + (self._current is not None) + len(self._pending)
+                    + self._unread_count())
+
+    def url_at(self, position: int) -> Optional[str]:
+        """
+        Return the remaining URL at a position, or None if the queue has changed since it was counted.
+
+        Only the first VIEW_READ_AHEAD URLs not taken yet are read from the source for a view, the
+        positions past them are UNREAD_URL, so scrolling a huge list never loads it into memory.
+        """
+        with self._lock:
+            if position < len(self._retained):
+                return self._retained[position]
+            position -= len(self._retained)
+            if position < len(self._taken):
+                return list(self._taken)[position]
+            position -= len(self._taken)
+            if self._current is not None:
+                if position == 0:
+                    return self._current
+                position -= 1
+            if len(self._pending) <= position < VIEW_READ_AHEAD:
+                self._read_ahead(position - len(self._pending) + 1)
+            if position < len(self._pending):
+                return self._pending[position]
+            if position < len(self._pending) + self._unread_count():
+                return UNREAD_URL
+            return None
+
+    def remaining(self) -> List[str]:
+        """Return all remaining URLs in their original order"""
+        return list(self.iter_remaining())
+
+    def iter_remaining(self) -> Iterator[str]:
+        """
+        Yield the remaining URLs in their original order, reading the rest of the source lazily.
+
+        Meant for carrying the remaining URLs over to the next run, after this queue is no longer used.
+        """
+        with self._lock:
+            current = [self._current] if self._current is not None else []
+            buffered = self._retained + list(self._taken) + current + list(self._pending)
+            source = self._source
+        yield from buffered
+        if source is not None:
+            yield from source
+
+    def __len__(self) -> int:
+        """Number of URLs of the run, without the ones the filter skipped"""
+        return self.total
+
+    def __iter__(self) -> Iterator[str]:
+        """Take URLs until the queue is exhausted"""
+        while True:
+            url = self.next()
+            if url is None:
+                return
+            yield url
@@ -0,0 +1,189 @@
+"""
+Lazy sources of URLs for a run.
+
+A URL list can have millions of lines, too many to hold in the input box or
+to split into a list up front. A UrlSource reads its URLs from disk one line
+at a time each time it is iterated, cleaning them up on the way, and gives
+the size of the list from a fast line count instead of reading every URL.
+
+Supported sources: plain text (one URL per line), gzip-compressed text, one
+column of a CSV file (optionally gzip-compressed), and any iterable or
+generator.
+"""
+
+import csv
+import gzip
+import io
+import os
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+# Lists longer than this are streamed from disk instead of being loaded into the input box
+LARGE_URL_LIST_LINES = 10000
+
+_COUNT_CHUNK_SIZE = 1024 * 1024
+
+
+def normalize_url(line: str) -> Optional[str]:
+    """
+    Clean up one line of a URL list.
+
+    Returns:
+        The URL without surrounding whitespace and trailing comma, or None for an empty line
+    """
+    url = line.strip()
+    if url.endswith(','):
+        url = url[:-1].rstrip()
+    return url or None
+
+
+def normalize_urls(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the cleaned up URLs of some lines, skipping the empty ones"""
+    for line in lines:
+        url = normalize_url(line)
+        if url is not None:
+            yield url
+
+
+def _is_gzip(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(2) == b'\x1f\x8b'
+
+
+def _open_binary(path: str):
+    return gzip.open(path, 'rb') if _is_gzip(path) else open(path, 'rb')
+
+
+def _open_text(path: str):
+    return io.TextIOWrapper(_open_binary(path), encoding='utf-8', errors='replace', newline='')
+
+
+def count_lines(path: str) -> int:
+    """
+    Count the lines of a (possibly gzip-compressed) file by counting newline bytes in large chunks.
+
+    Empty lines are counted too, so for a URL list this is an upper bound of the number of URLs.
+    """
+    lines = 0
+    last_byte = b'\n'
+    with _open_binary(path) as f:
+        while True:
+            chunk = f.read(_COUNT_CHUNK_SIZE)
+            if not chunk:
+                break
+            lines += chunk.count(b'\n')
+            last_byte = chunk[-1:]
+    # A last line without a newline still counts
+    if last_byte != b'\n':
+        lines += 1
+    return lines
+
+
+class UrlSource(ABC):
+    """Base class of the URL sources: re-iterable, with a cheap estimate of the number of URLs."""
+
+    description = "urls"
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[str]:
+        """Yield the URLs from the start, every time the source is iterated"""
+
+    def count(self) -> Optional[int]:
+        """Return the (approximate) number of URLs without reading them all, or None if unknown"""
+        return None
+
+
+class TextFileSource(UrlSource):
+    """One URL per line of a text file, gzip-compressed or not."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.description = os.path.basename(path)
+        self._count = None
+
+    def __iter__(self) -> Iterator[str]:
+        with _open_text(self.path) as f:
+            yield from normalize_urls(f)
+
+    def count(self) -> int:
+        if self._count is None:
+            self._count = count_lines(self.path)
+        return self._count
+
+
+class CsvColumnSource(UrlSource):
+    """The URLs in one column of a CSV file, gzip-compressed or not."""
+
+    def __init__(self, path: str, column: Union[str, int, None] = None):
+        """
+        Args:
+            path: CSV file with a header row
+            column: Column name or index, by default the "url" column if there is one, else the first column
+        """
+        self.path = path
+        self.column = column
+        self.description = os.path.basename(path)
+        self._count = None
+
+    def _column_index(self, header) -> int:
+        if isinstance(self.column, int):
+            return self.column
+        names = [name.strip().lower() for name in header]
+        wanted = (self.column or 'url').strip().lower()
+        if wanted in names:
+            return names.index(wanted)
+        if self.column is not None:
+            raise ValueError(f"Column '{self.column}' not found in {self.path}")
+        return 0
+
+    def __iter__(self) -> Iterator[str]:
+        with _open_text(self.path) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            index = self._column_index(header)
+            for row in reader:
+                if index < len(row):
+                    url = normalize_url(row[index])
+                    if url is not None:
+                        yield url
+
+    def count(self) -> int:
+        if self._count is None:
+            # Without the header row
+            self._count = max(count_lines(self.path) - 1, 0)
+        return self._count
+
+
+class IterableSource(UrlSource):
+    """URLs from an iterable, or from a function returning a new generator for each pass."""
+
+    def __init__(self, urls: Union[Iterable[str], Callable[[], Iterable[str]]], count: Optional[int] = None,
+                 description: str = "urls"):
+        self.urls = urls
+        self._count = count if count is not None else (len(urls) if hasattr(urls, '__len__') else None)
+        self.description = description
+
+    def __iter__(self) -> Iterator[str]:
+        urls = self.urls() if callable(self.urls) else self.urls
+        return normalize_urls(urls)
+
+    def count(self) -> Optional[int]:
+        return self._count
+
+
+def open_url_source(path: str, column: Union[str, int, None] = None) -> UrlSource:
+    """
+    Return the URL source for a file, chosen from its extension.
+
+    .csv and .csv.gz files are read as CSV (the "url" column, or `column`),
+    anything else as one URL per line. Gzip compression is detected from the
+    file content.
+    """
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.csv') or column is not None:
+        return CsvColumnSource(path, column)
+    return TextFileSource(path)
@@ -0,0 +1,535 @@
+"""
+Work queue shared by headless workers on several machines.
+
+The URLs of a crawl are added to a LeaseQueue, a SQLite file. Workers lease
+a few URLs at a time, scrape them with their own ScrapePipeline and report
+back. A lease lasts `lease_seconds`, and a running worker keeps extending its
+leases with a heartbeat. When a worker dies its heartbeats stop, its leases
+run out and its URLs go back to the queue for the other workers. A URL that
+failed (or whose worker died) MAX_ATTEMPTS times is given up on.
+
+The queue file can be put on a volume shared by the machines, or served by a
+small coordinator on one of them (`serve`, JSON lines over TCP), which is
+safer on network file systems with unreliable locking. Workers talk to both
+the same way, through open_work_queue. The coordinator has no authentication:
+anyone who can reach its port can read and change the queue, so it listens on
+127.0.0.1 unless given another --host, which should be on a private network.
+
+Each worker writes its CSV files locally and uploads the new rows to the
+queue before reporting their URLs as done, so the rows of every finished URL
+are kept centrally, one directory per worker next to the queue file. A
+worker that dies between the two steps gets its URLs scraped again, which
+can repeat a few rows but never loses any. `merge` combines the rows of all
+workers into one CSV per plugin.
+
+Follow-up URLs found by a plugin go back to the queue with their plugins,
+depth and version, so they are shared by all workers too. The queue
+deduplicates URLs by their canonical form across the whole crawl.
+
+Usage, from the Backend folder:
+    python work_queue.py add crawl.sqlite urls.txt
+    python work_queue.py serve crawl.sqlite --host 0.0.0.0 --port 8765
+    python work_queue.py work coordinator-host:8765 --plugin carmarker_seller_cards.py
+    python work_queue.py status crawl.sqlite
+    python work_queue.py merge crawl.sqlite -o seller_cards.csv
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from scrape_pipeline import ScrapePipeline
+from sharded_run import merge_shards, parse_options
+from url_dedup import canonicalize_url
+from url_queue import UrlQueue
+from url_sources import open_url_source
+
+# Times a URL is handed out before it is given up on
+MAX_ATTEMPTS = 3
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Methods of the queue a coordinator serves to remote workers
+COORDINATOR_METHODS = ("add_tasks", "lease", "heartbeat", "complete", "fail", "release", "append_results", "counts")
+
+
+def _safe_name(name: str) -> str:
+    """Return a name that can be used as a file or directory name"""
+    return re.sub(r'[^\w.-]', '_', os.path.basename(str(name))) or "_"
+
+
+class LeaseQueue:
+    """URLs of a crawl in a SQLite file, leased to workers until they report them done."""
+
+    def __init__(self, path: str = "work_queue.sqlite", max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        # Uploaded worker rows are kept next to the queue file
+        self.results_dir = os.path.splitext(path)[0] + "_results"
+        self._lock = threading.Lock()
+        # Transactions are started explicitly, so two workers never lease the same URL
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        with self._transaction():
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS urls ("
+                "key TEXT PRIMARY KEY, url TEXT, plugins TEXT, depth INTEGER, version TEXT, "
+                "state TEXT, worker TEXT, lease_until REAL, attempts INTEGER, error TEXT)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS urls_state ON urls (state, lease_until)")
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in one write transaction, waiting for the other workers' transactions"""
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def add_tasks(self, tasks: Iterable[Sequence]) -> int:
+        """
+        Add URLs to the queue, skipping the ones it already has.
+
+        Args:
+            tasks: (url, plugin files or None, depth, version or None) of each URL
+
+        Returns:
+            Number of URLs added
+        """
+        rows = [(canonicalize_url(url), url, json.dumps(list(plugins)) if plugins else None, depth, version)
+                for url, plugins, depth, version in tasks]
+        with self._transaction() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO urls VALUES (?, ?, ?, ?, ?, 'pending', NULL, NULL, 0, NULL)", rows)
+            return connection.total_changes - before
+
+    def add(self, urls: Iterable[str], batch_size: int = 10000) -> int:
+        """Add input URLs, handled by the plugins the workers were started with. Returns the number added"""
+        added = 0
+        batch = []
+        for url in urls:
+            batch.append((url, None, 0, None))
+            if len(batch) >= batch_size:
+                added += self.add_tasks(batch)
+                batch = []
+        return added + self.add_tasks(batch)
+
+    def lease(self, worker: str, count: int, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[list]:
+        """
+        Lease up to `count` URLs to a worker, the oldest first.
+
+        Returns:
+            [url, plugin files or None, depth, version or None] of each leased URL
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            # URLs of workers that stopped sending heartbeats go back to the queue
+            connection.execute(
+                "UPDATE urls SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, error = 'lease expired' WHERE state = 'leased' AND lease_until < ?",
+                (self.max_attempts, now))
+            rows = connection.execute(
+                "SELECT key, url, plugins, depth, version FROM urls WHERE state = 'pending' ORDER BY rowid LIMIT ?",
+                (count,)).fetchall()
+            connection.executemany(
+                "UPDATE urls SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE key = ?",
+                [(worker, now + lease_seconds, row[0]) for row in rows])
+        return [[url, json.loads(plugins) if plugins else None, depth, version]
+                for _, url, plugins, depth, version in rows]
+
+    def heartbeat(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+        """Extend the leases of a worker that is still running. Returns the number of leases extended"""
+        with self._transaction() as connection:
+            return connection.execute(
+                "UPDATE urls SET lease_until = ? WHERE state = 'leased' AND worker = ?",
+                (time.time() + lease_seconds, worker)).rowcount
+
+    def complete(self, worker: str, urls: Sequence[str]) -> int:
+        """Mark URLs as done, after their rows were uploaded. Returns the number marked"""
+        with self._transaction() as connection:
+            return connection.executemany(
+                "UPDATE urls SET state = 'done', worker = ?, error = NULL WHERE key = ? AND state != 'done'",
+                [(worker, canonicalize_url(url)) for url in urls]).rowcount
+
+    def fail(self, worker: str, url: str, error: str = "") -> str:
+        """Give a URL that could not be scraped back to the queue, or up after MAX_ATTEMPTS. Returns its new state"""
+        key = canonicalize_url(url)
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE urls SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, error = ? WHERE key = ? AND state = 'leased' AND worker = ?",
+                (self.max_attempts, error, key, worker))
+            row = connection.execute("SELECT state FROM urls WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else "unknown"
+
+    def release(self, worker: str) -> int:
+        """Give back the leases of a worker that stops, without counting them as attempts"""
+        with self._transaction() as connection:
+            return connection.execute(
+                "UPDATE urls SET state = 'pending', worker = NULL, attempts = MAX(attempts - 1, 0) "
+                "WHERE state = 'leased' AND worker = ?", (worker,)).rowcount
+
+    def append_results(self, worker: str, file_name: str, text: str):
+        """Append rows a worker uploaded to its copy of one of its CSV files"""
+        worker_dir = os.path.join(self.results_dir, _safe_name(worker))
+        with self._lock:
+            if not os.path.exists(worker_dir):
+                os.makedirs(worker_dir)
+            with open(os.path.join(worker_dir, _safe_name(file_name)), 'a', newline='', encoding='utf-8') as f:
+                f.write(text)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of URLs per state: pending, leased, done and failed"""
+        with self._lock:
+            counts = dict(self._connection.execute("SELECT state, COUNT(*) FROM urls GROUP BY state"))
+        return {state: counts.get(state, 0) for state in ("pending", "leased", "done", "failed")}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class QueueClient:
+    """A LeaseQueue served by a coordinator, with the same methods."""
+
+    def __init__(self, host: str, port: int = DEFAULT_PORT, timeout: float = 60):
+        self.address = (host, port)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._stream = None
+
+    def _call(self, method: str, *args):
+        """Call a queue method on the coordinator, reconnecting once if the connection dropped"""
+        request = (json.dumps({"method": method, "args": args}) + "\n").encode('utf-8')
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._stream is None:
+                        self._stream = socket.create_connection(self.address, self.timeout).makefile('rwb')
+                    self._stream.write(request)
+                    self._stream.flush()
+                    line = self._stream.readline()
+                    if not line:
+                        raise ConnectionError("Coordinator closed the connection")
+                    break
+                except OSError:
+                    self._close_stream()
+                    if attempt:
+                        raise
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(f"Coordinator error: {response['error']}")
+        return response["result"]
+
+    def _close_stream(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except OSError:
+                pass
+            self._stream = None
+
+    def add_tasks(self, tasks):
+        return self._call("add_tasks", [list(task) for task in tasks])
+
+    def add(self, urls, batch_size=1000):
+        added = 0
+        batch = []
+        for url in urls:
+            batch.append((url, None, 0, None))
+            if len(batch) >= batch_size:
+                added += self.add_tasks(batch)
+                batch = []
+        return added + self.add_tasks(batch)
+
+    def lease(self, worker, count, lease_seconds=DEFAULT_LEASE_SECONDS):
+        return self._call("lease", worker, count, lease_seconds)
+
+    def heartbeat(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        return self._call("heartbeat", worker, lease_seconds)
+
+    def complete(self, worker, urls):
+        return self._call("complete", worker, list(urls))
+
+    def fail(self, worker, url, error=""):
+        return self._call("fail", worker, url, error)
+
+    def release(self, worker):
+        return self._call("release", worker)
+
+    def append_results(self, worker, file_name, text):
+        return self._call("append_results", worker, file_name, text)
+
+    def counts(self):
+        return self._call("counts")
+
+    def close(self):
+        with self._lock:
+            self._close_stream()
+
+
+class Coordinator(socketserver.ThreadingTCPServer):
+    """Serves a LeaseQueue to remote workers, one JSON request and response per line."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, work_queue: LeaseQueue, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.work_queue = work_queue
+        super().__init__((host, port), _CoordinatorHandler)
+
+
+class _CoordinatorHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get("method") not in COORDINATOR_METHODS:
+                    raise ValueError(f"Unknown method: {request.get('method')}")
+                result = getattr(self.server.work_queue, request["method"])(*request.get("args", []))
+                response = {"result": result}
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+
+def open_work_queue(target: str):
+    """Return the queue of a "host:port" coordinator address, or of a queue file path"""
+    if re.fullmatch(r"[\w.-]+:\d+", target):
+        host, port = target.rsplit(":", 1)
+        return QueueClient(host, int(port))
+    return LeaseQueue(target)
+
+
+class LeasedUrlQueue(UrlQueue):
+    """UrlQueue of a worker: its URLs are leased from the work queue, its follow-up URLs go back to it."""
+
+    def __init__(self, worker: "QueueWorker"):
+        super().__init__(worker.leased_urls())
+        self.worker = worker
+
+    # No local filter: the work queue already deduplicates across workers,
+    # and a URL leased again after its lease ran out has to be scraped again
+    url_filter = property(lambda self: None, lambda self, value: None)
+
+    def extend(self, urls: Iterable[str]):
+        self.worker.queue_follow_ups(urls)
+
+
+class QueueWorker:
+    """
+    Headless worker: scrapes URLs leased from a work queue until the queue is empty.
+
+    Runs a ScrapePipeline whose URLs come from the queue, keeps its leases
+    alive from a heartbeat thread and uploads its rows before reporting URLs done.
+    """
+
+    # Seconds between two uploads of new rows
+    UPLOAD_SECONDS = 30
+    # Seconds to wait for URLs while other workers still hold leases
+    POLL_SECONDS = 5
+
+    def __init__(self, work_queue, options, timeout_value, plugin_files=None, worker_id=None,
+                 batch_size=10, lease_seconds=DEFAULT_LEASE_SECONDS, output_dir="scraped_data",
+                 html_dir="scraped_html"):
+        """
+        Args:
+            work_queue: LeaseQueue or QueueClient, see open_work_queue
+            options: Selected option per GUI option row
+            timeout_value: Seconds to pause after an error or a block
+            plugin_files: Plugins applied to every input URL, empty to only download HTML
+            worker_id: Name of the worker in the queue, host name and process id by default
+            batch_size: URLs leased at a time
+            lease_seconds: How long a lease lasts without heartbeat
+            output_dir: Directory for the worker's local CSV files, in a sub-directory per worker
+            html_dir: Directory the HTML of every page is saved to
+        """
+        self.work_queue = work_queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.output_dir = os.path.join(output_dir, f"worker_{_safe_name(self.worker_id)}")
+        self.completed = []  # Successful URLs whose rows are not uploaded yet
+        self.uploaded = {}  # CSV file name -> bytes uploaded so far
+        self.last_upload = time.time()
+        self.counts = [0, 0, 0]  # Successes, warnings, errors
+        self._stopped = threading.Event()
+        self.pipeline = ScrapePipeline(options, LeasedUrlQueue(self), timeout_value, plugin_files=plugin_files,
+                                       status_callback=self.report_status, output_dir=self.output_dir,
+                                       html_dir=html_dir)
+        # The queue hands out the URLs in the order they were added
+        self.pipeline.reorder_urls = False
+
+    def leased_urls(self) -> Iterator[str]:
+        """Yield leased URLs until the queue has none left, waiting while other workers hold leases"""
+        while not self.pipeline.stop_execution:
+            tasks = self.work_queue.lease(self.worker_id, self.batch_size, self.lease_seconds)
+            if not tasks:
+                # Report the finished URLs first, they count as leased until then
+                self.upload_results()
+                counts = self.work_queue.counts()
+                if not counts["pending"] and not counts["leased"]:
+                    return
+                time.sleep(self.POLL_SECONDS)
+                continue
+            for url, plugins, depth, version in tasks:
+                if plugins or depth or version is not None:
+                    self.pipeline.crawl_tags[url] = (tuple(plugins) if plugins else None, depth, version)
+                yield url
+
+    def queue_follow_ups(self, urls: Iterable[str]):
+        """Add follow-up URLs to the work queue, with the plugins, depth and version the pipeline tagged them with"""
+        tasks = []
+        for url in urls:
+            plugins, depth, version = self.pipeline.crawl_tags.get(url, (None, 0, None))
+            tasks.append((url, list(plugins) if plugins else None, depth, version))
+        added = self.work_queue.add_tasks(tasks)
+        if added < len(tasks):
+            print(f"> {len(tasks) - added} follow-up URLs were already in the work queue")
+
+    def report_status(self, status, url):
+        """Send failed URLs back to the queue, collect the successful ones for the next upload"""
+        self.counts[status] += 1
+        if status == 0:
+            self.completed.append(url)
+            if time.time() - self.last_upload >= self.UPLOAD_SECONDS:
+                self.upload_results()
+        else:
+            state = self.work_queue.fail(self.worker_id, url, "warning" if status == 1 else "error")
+            if state == "failed":
+                print(f"> Giving up on {url} after {MAX_ATTEMPTS} attempts")
+
+    def upload_results(self):
+        """Upload the rows written since the last upload, then report their URLs done"""
+        completed = self.completed
+        self.completed = []
+        try:
+            if os.path.isdir(self.output_dir):
+                for file_name in sorted(os.listdir(self.output_dir)):
+                    if not file_name.endswith('.csv'):
+                        continue
+                    offset = self.uploaded.get(file_name, 0)
+                    with open(os.path.join(self.output_dir, file_name), 'rb') as f:
+                        f.seek(offset)
+                        data = f.read()
+                    if data:
+                        self.work_queue.append_results(self.worker_id, file_name, data.decode('utf-8'))
+                        self.uploaded[file_name] = offset + len(data)
+            if completed:
+                self.work_queue.complete(self.worker_id, completed)
+        except Exception as e:
+            # Tried again with the next upload, the leases stay alive meanwhile
+            print(f"> Error uploading results: {str(e)}")
+            self.completed = completed + self.completed
+        self.last_upload = time.time()
+
+    def _send_heartbeats(self):
+        while not self._stopped.wait(self.lease_seconds / 3):
+            try:
+                self.work_queue.heartbeat(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"> Error sending heartbeat: {str(e)}")
+
+    def run(self):
+        """Scrape leased URLs until the queue is empty or the worker is stopped"""
+        print(f"> Worker {self.worker_id} started")
+        heartbeat = threading.Thread(target=self._send_heartbeats, daemon=True)
+        heartbeat.start()
+        try:
+            self.pipeline.run()
+        finally:
+            self._stopped.set()
+            self.upload_results()
+            # URLs leased but not scraped are handed to the other workers right away
+            self.work_queue.release(self.worker_id)
+            print(f"> Worker {self.worker_id} finished: {self.counts[0]} done, "
+                  f"{self.counts[1]} warnings, {self.counts[2]} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Share one crawl between headless workers on several machines")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Add the URLs of a file to a queue")
+    add.add_argument("queue", help="Queue file or coordinator host:port")
+    add.add_argument("url_file", help="Text file with one URL per line, or a CSV file with a url column")
+
+    serve = commands.add_parser("serve", help="Serve a queue file to remote workers")
+    serve.add_argument("queue", help="Queue file")
+    serve.add_argument("--host", default=DEFAULT_HOST,
+                       help="Address to listen on, e.g. 0.0.0.0 for other machines. There is no authentication, "
+                            "only listen on a private network")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+
+    work = commands.add_parser("work", help="Scrape URLs of a queue until it is empty")
+    work.add_argument("queue", help="Queue file or coordinator host:port")
+    work.add_argument("--plugin", action="append", default=[],
+                      help="Plugin file inside the Plugins directory, can be given several times")
+    work.add_argument("--timeout", type=int, default=30, help="Seconds to pause after an error or a block")
+    work.add_argument("--batch", type=int, default=10, help="URLs leased at a time")
+    work.add_argument("--lease", type=int, default=DEFAULT_LEASE_SECONDS, help="Seconds a lease lasts without heartbeat")
+    work.add_argument("--worker-id", help="Name of the worker, host name and process id by default")
+    work.add_argument("--option", action="append", default=[], metavar="NAME=VALUE",
+                      help='Option as named in the GUI, e.g. "Selenium Mode=undetected"')
+
+    status = commands.add_parser("status", help="Show the number of URLs per state")
+    status.add_argument("queue", help="Queue file or coordinator host:port")
+
+    merge = commands.add_parser("merge", help="Merge the rows uploaded by all workers, one CSV per plugin")
+    merge.add_argument("queue", help="Queue file")
+    merge.add_argument("-o", "--output", help="Custom CSV path for the merged results")
+
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        results_dir = os.path.splitext(args.queue)[0] + "_results"
+        if not os.path.isdir(results_dir):
+            print(f"> No results uploaded yet: {results_dir}")
+            return
+        merge_shards(results_dir, args.output)
+        return
+
+    work_queue = open_work_queue(args.queue)
+    try:
+        if args.command == "add":
+            added = work_queue.add(open_url_source(args.url_file))
+            print(f"> Added {added} URLs to {args.queue}")
+        elif args.command == "serve":
+            with Coordinator(work_queue, args.host, args.port) as coordinator:
+                print(f"> Serving {args.queue} on {args.host}:{args.port}")
+                try:
+                    coordinator.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+        elif args.command == "work":
+            worker = QueueWorker(work_queue, parse_options(args.option), args.timeout, args.plugin,
+                                 args.worker_id, args.batch, args.lease)
+            try:
+                worker.run()
+            except KeyboardInterrupt:
+                # The worker already gave its leases back
+                pass
+        elif args.command == "status":
+            counts = work_queue.counts()
+            print("> " + ", ".join(f"{count} {state}" for state, count in counts.items()))
+    finally:
+        work_queue.close()
+
+
+if __name__ == "__main__":
+    main()